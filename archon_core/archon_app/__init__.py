@@ -1,6 +1,19 @@
 """Archon Core application package."""
+from __future__ import annotations
 
-from .config import AppConfig, load_config
-from .cli import main
+from typing import Any
 
 __all__ = ["AppConfig", "load_config", "main"]
+
+
+def __getattr__(name: str) -> Any:
+    # Resolved on first access so ``import archon_app`` stays cheap.
+    if name in {"AppConfig", "load_config"}:
+        from . import config
+
+        return getattr(config, name)
+    if name == "main":
+        from .cli import main
+
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,267 @@
+"""Benchmarks for the repository, service, token and CLI hot paths."""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+import json
+import os
+from pathlib import Path
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .config import AppConfig
+from .data.factory import create_repository
+from .data.models import PRIORITY_NAMES, Task
+from .security.auth import TokenManager
+from .services.task_service import TaskService
+from .utils import exporter
+
+DEFAULT_SIZES = (1_000, 100_000)
+RESULTS_FORMAT = 1
+_SUFFIXES = {"json": ".json", "journal": ".jsonl", "sqlite": ".db"}
+
+
+@dataclass(slots=True)
+class BenchmarkResult:
+    """Timing of ``operations`` repetitions of one benchmark against a store of ``size`` tasks."""
+
+    name: str
+    size: int
+    operations: int
+    seconds: float
+    peak_bytes: Optional[int] = None
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.size}"
+
+    @property
+    def latency_us(self) -> float:
+        return self.seconds / self.operations * 1e6 if self.operations else 0.0
+
+    @property
+    def ops_per_second(self) -> float:
+        return self.operations / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        record = asdict(self)
+        record["latency_us"] = round(self.latency_us, 3)
+        record["ops_per_second"] = round(self.ops_per_second, 1)
+        return record
+
+
+@dataclass(slots=True)
+class Regression:
+    """A benchmark whose latency grew beyond the allowed tolerance."""
+
+    key: str
+    baseline_us: float
+    current_us: float
+
+    @property
+    def ratio(self) -> float:
+        return self.current_us / self.baseline_us if self.baseline_us else float("inf")
+
+
+def generate_tasks(count: int, seed: int = 0) -> List[Task]:
+    """Build ``count`` deterministic synthetic tasks; roughly a third are completed."""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    tasks = []
+    for index in range(count):
+        created_at = start + timedelta(seconds=index)
+        completed = index % 3 == 0
+        tasks.append(
+            Task(
+                identifier=f"bench-{index:08d}",
+                title=f"Synthetic task {index}",
+                owner=f"owner-{rng.randrange(64):02d}",
+                priority=PRIORITY_NAMES[rng.randrange(len(PRIORITY_NAMES))],
+                description="x" * rng.randrange(0, 64),
+                created_at=created_at,
+                completed_at=created_at + timedelta(minutes=5) if completed else None,
+                completion_token="synthetic" if completed else None,
+            )
+        )
+    return tasks
+
+
+class _Runner:
+    def __init__(self, trace_memory: bool):
+        self._trace_memory = trace_memory
+        self.results: List[BenchmarkResult] = []
+
+    def measure(self, name: str, size: int, operations: int, func: Callable[[], Any]) -> Any:
+        if self._trace_memory:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            value = func()
+        finally:
+            elapsed = time.perf_counter() - started
+            peak = None
+            if self._trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        self.results.append(BenchmarkResult(name, size, operations, elapsed, peak))
+        return value
+
+
+def _store_config(workdir: Path, size: int, backend: str, fmt: str) -> AppConfig:
+    return AppConfig(
+        environment="benchmark",
+        database_path=workdir / f"tasks-{size}{_SUFFIXES.get(backend, '.json')}",
+        token_ttl=900,
+        database_backend=backend,
+        database_format=fmt,
+    )
+
+
+def _bench_store(
+    runner: _Runner, workdir: Path, size: int, backend: str, fmt: str, reads: int, writes: int, seed: int
+) -> None:
+    config = _store_config(workdir, size, backend, fmt)
+    tasks = generate_tasks(size, seed)
+    seeding = create_repository(config)
+    runner.measure("bulk_load", size, size, lambda: seeding.replace_all(tasks))
+    seeding.close()
+    del tasks
+
+    repository = runner.measure("cold_open", size, 1, lambda: _open(config))
+    service = TaskService(repository, TokenManager(ttl_seconds=config.token_ttl))
+    rng = random.Random(seed)
+    try:
+        ids = [f"bench-{rng.randrange(size):08d}" for _ in range(reads)]
+        runner.measure("get", size, len(ids), lambda: [service.get_task(identifier) for identifier in ids])
+        runner.measure("list", size, size, lambda: sum(1 for _ in service.iter_tasks()))
+        runner.measure(
+            "list_filtered", size, 1, lambda: sum(1 for _ in service.iter_tasks(owner="owner-01", limit=100))
+        )
+
+        new_tasks = [Task(title=f"Fresh task {index}", owner="bench", priority="medium") for index in range(writes)]
+        runner.measure("save", size, writes, lambda: [repository.save(task) for task in new_tasks])
+        open_ids = [task.identifier for task in service.iter_tasks(completed=False, limit=writes)]
+        runner.measure("complete", size, len(open_ids), lambda: [service.complete_task(i) for i in open_ids])
+        remaining = [task.identifier for task in service.iter_tasks(completed=False, limit=writes)]
+        runner.measure("complete_many", size, len(remaining), lambda: service.complete_many(remaining))
+
+        total = repository.count()
+        output = workdir / f"export-{size}.jsonl"
+        runner.measure(
+            "export_jsonl", size, total, lambda: exporter.export_tasks(service.iter_tasks(), output, "jsonl")
+        )
+        output.unlink(missing_ok=True)
+        runner.measure("purge", size, total, service.purge_tasks)
+    finally:
+        service.close()
+
+
+def _open(config: AppConfig):
+    repository = create_repository(config)
+    repository.count()  # Force the store to be read.
+    return repository
+
+
+def _bench_tokens(runner: _Runner, count: int) -> None:
+    manager = TokenManager(ttl_seconds=900)
+    payloads = [{"task_id": f"bench-{index:08d}"} for index in range(count)]
+    tokens = runner.measure("token_issue", count, count, lambda: manager.issue_tokens(payloads))
+    runner.measure("token_validate", count, count, lambda: manager.validate_tokens(tokens))
+    cached = TokenManager(ttl_seconds=900, cache_size=count)
+    tokens = cached.issue_tokens(payloads)
+    cached.validate_tokens(tokens)
+    runner.measure("token_validate_cached", count, count, lambda: cached.validate_tokens(tokens))
+    # Other tokens and tasks revoked, so validation gets past the empty-store shortcut.
+    revoking = TokenManager(ttl_seconds=900)
+    revoking.revoke(revoking.issue_tokens({"task_id": f"revoked-{index}"} for index in range(100)))
+    revoking.revoke_task("revoked-task")
+    tokens = revoking.issue_tokens(payloads)
+    runner.measure("token_validate_revocations", count, count, lambda: revoking.validate_tokens(tokens))
+
+
+def measure_cli_startup(runs: int = 5) -> List[float]:
+    """Return wall-clock seconds of ``archon-core --help`` in fresh interpreters."""
+    command = [sys.executable, "-c", "from archon_app.cli import main; main()", "--help"]
+    # Make the package importable in the child even when it is not installed.
+    search_path = [str(Path(__file__).resolve().parents[1]), os.environ.get("PYTHONPATH", "")]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, search_path)))
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, env=env)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def run_benchmarks(
+    sizes: Iterable[int] = DEFAULT_SIZES,
+    *,
+    backend: str = "json",
+    fmt: str = "json",
+    reads: int = 1_000,
+    writes: int = 20,
+    tokens: int = 10_000,
+    startup_runs: int = 5,
+    trace_memory: bool = False,
+    seed: int = 0,
+    workdir: Path | None = None,
+) -> List[BenchmarkResult]:
+    """Run every benchmark and return the results.
+
+    Each size gets a fresh synthetic store in ``workdir`` (a temporary directory
+    by default). With ``trace_memory`` every benchmark also records its peak
+    Python allocation, at a considerable cost in speed.
+    """
+    runner = _Runner(trace_memory)
+    with tempfile.TemporaryDirectory(prefix="archon-bench-") as tmp:
+        root = workdir or Path(tmp)
+        root.mkdir(parents=True, exist_ok=True)
+        for size in sizes:
+            _bench_store(runner, root, size, backend, fmt, reads, writes, seed)
+    if tokens:
+        _bench_tokens(runner, tokens)
+    if startup_runs:
+        timings = measure_cli_startup(startup_runs)
+        runner.results.append(BenchmarkResult("cli_startup", 0, 1, statistics.median(timings)))
+    return runner.results
+
+
+def results_document(results: Iterable[BenchmarkResult], **settings: Any) -> Dict[str, Any]:
+    """Wrap ``results`` with enough metadata to judge whether two runs are comparable."""
+    return {
+        "format": RESULTS_FORMAT,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": settings,
+        "results": [result.to_dict() for result in results],
+    }
+
+
+def load_results(path: Path) -> Dict[str, float]:
+    """Return per-operation latency in microseconds by benchmark key from a results file."""
+    document = json.loads(path.read_text(encoding="utf-8"))
+    if document.get("format") != RESULTS_FORMAT:
+        raise ValueError(f"Unsupported benchmark results format in {path}")
+    return {f"{record['name']}@{record['size']}": float(record["latency_us"]) for record in document["results"]}
+
+
+def compare_results(
+    results: Iterable[BenchmarkResult], baseline: Dict[str, float], tolerance: float = 0.25
+) -> List[Regression]:
+    """Return benchmarks more than ``tolerance`` (a fraction) slower than ``baseline``."""
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.key)
+        if reference is None:
+            continue
+        if result.latency_us > reference * (1 + tolerance):
+            regressions.append(Regression(result.key, reference, result.latency_us))
+    return regressions
@@ -1,25 +1,126 @@
 """Command line interface for the Archon Core application."""
 from __future__ import annotations
 
+from datetime import datetime
 import json
+import os
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, TextIO, Tuple
 
 import click
 
-from .config import AppConfig, load_config
-from .data.repository import FileTaskRepository
-from .security.auth import TokenManager
-from .services.task_service import TaskService
-from .utils.exporter import export_tasks_to_yaml
-from .utils.formatting import format_task_table
+from .utils import exporter
+from .utils.formatting import format_duration, format_table, iter_task_table
+from .utils.jsonl import iter_jsonl, iter_numbered_jsonl
 from .utils.logging import configure_logging
 
+if TYPE_CHECKING:  # pragma: no cover - imported lazily at runtime
+    from .config import AppConfig
+    from .data.changes import ChangeFeed
+    from .services.task_service import TaskService
+
+# Heavy modules (repositories, token manager, server, PyYAML) are imported inside
+# the commands that need them: scripts invoke the CLI in tight loops, and
+# ``--help`` or a refused ``purge`` should not pay for them.
+
 
 def _build_service(config: AppConfig) -> TaskService:
-    repo = FileTaskRepository(config.database_path)
-    token_manager = TokenManager(ttl_seconds=config.token_ttl)
-    return TaskService(repository=repo, token_manager=token_manager)
+    from .data import identifiers
+    from .data.factory import create_repository
+    from .security.auth import TokenManager
+    from .security.revocation import RevocationStore
+    from .services.notifications import build_notifier
+    from .services.task_service import TaskService
+
+    identifiers.set_scheme(config.id_scheme)
+    repo = create_repository(config)
+    revocations = RevocationStore(config.revocations_path, refresh_interval=config.revocation_refresh)
+    token_manager = TokenManager(
+        ttl_seconds=config.token_ttl, cache_size=config.token_cache_size, revocations=revocations
+    )
+    notifier = build_notifier(config.notifications)
+    return TaskService(repository=repo, token_manager=token_manager, notifier=notifier)
+
+
+class AppContext:
+    """Per-invocation state; configuration and service are built on first use."""
+
+    def __init__(self, ctx: click.Context, config_path: Optional[Path]):
+        self._ctx = ctx
+        self._config_path = config_path
+        self._config: Optional[AppConfig] = None
+        self._service: Optional[TaskService] = None
+
+    @property
+    def config(self) -> AppConfig:
+        if self._config is None:
+            from .config import load_config
+
+            self._config = load_config(str(self._config_path) if self._config_path else None)
+            if self._config.metrics_enabled:
+                self._enable_metrics(self._config.metrics_path)
+        return self._config
+
+    def _enable_metrics(self, path: Path) -> None:
+        from .utils import metrics
+
+        metrics.enable()
+
+        def flush() -> None:
+            # Fold this invocation's numbers into the shared totals read by ``stats``.
+            metrics.persist(path)
+            metrics.enable(False)
+
+        self._ctx.call_on_close(flush)
+
+    @property
+    def service(self) -> TaskService:
+        if self._service is None:
+            self._service = _build_service(self.config)
+            self._ctx.call_on_close(self._service.close)
+        return self._service
+
+
+_FILTER_OPTIONS = [
+    click.option("--owner", help="Only include tasks with this owner."),
+    click.option(
+        "--priority",
+        type=click.Choice(["low", "medium", "high"], case_sensitive=False),
+        help="Only include tasks with this priority.",
+    ),
+    click.option("--completed/--open", "completed", default=None, help="Only include completed or open tasks."),
+    click.option("--offset", type=click.IntRange(min=0), default=0, help="Skip this many matching tasks."),
+    click.option("--limit", type=click.IntRange(min=1), default=None, help="Return at most this many tasks."),
+]
+
+
+def _filter_options(command):
+    for option in reversed(_FILTER_OPTIONS):
+        command = option(command)
+    return command
+
+
+def _error_message(exc: Exception) -> str:
+    # KeyError quotes its message when converted with str().
+    return str(exc.args[0]) if exc.args else str(exc)
+
+
+def _read_task_specs(stream: TextIO) -> Iterator[Dict[str, Any]]:
+    for line_number, record in iter_numbered_jsonl(stream):
+        if not isinstance(record, dict):
+            raise click.BadParameter(
+                f"line {line_number}: expected a task object, got {record!r}", param_hint="SOURCE"
+            )
+        yield record
+
+
+def _read_identifiers(stream: TextIO) -> Iterator[str]:
+    for record in iter_jsonl(stream):
+        if isinstance(record, dict):
+            record = record.get("identifier") or record.get("task_id")
+        if not isinstance(record, str) or not record:
+            raise click.ClickException(f"Expected a task identifier, got {record!r}")
+        yield record
 
 
 @click.group()
@@ -29,15 +130,29 @@ def _build_service(config: AppConfig) -> TaskService:
     help="Path to a configuration file (JSON or YAML).",
 )
 @click.option("--verbose", is_flag=True, help="Enable verbose logging output.")
+@click.option(
+    "--profile", "profile_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Profile the command and write the result to this file.",
+)
+@click.option(
+    "--profiler", type=click.Choice(["cprofile", "sample"]), default="cprofile", show_default=True,
+    help="cprofile writes a pstats dump; sample writes folded stacks for flame graphs.",
+)
 @click.pass_context
-def main(ctx: click.Context, config_path: Optional[Path], verbose: bool) -> None:
+def main(
+    ctx: click.Context, config_path: Optional[Path], verbose: bool, profile_path: Optional[Path], profiler: str
+) -> None:
     """Archon Core task orchestration toolkit."""
     configure_logging(verbose=verbose)
-    config = load_config(str(config_path) if config_path else None)
-    ctx.obj = {
-        "config": config,
-        "service": _build_service(config),
-    }
+    if profile_path:
+        from .utils.profiling import CommandProfiler
+
+        command_profiler = CommandProfiler(profile_path, profiler)
+        command_profiler.start()
+        # Registered first so it runs last and covers the service shutdown too.
+        ctx.call_on_close(command_profiler.stop)
+    ctx.obj = AppContext(ctx, config_path)
 
 
 @main.command("create")
@@ -48,18 +163,108 @@ def main(ctx: click.Context, config_path: Optional[Path], verbose: bool) -> None
 @click.pass_context
 def create_task(ctx: click.Context, title: str, owner: str, priority: str, description: str) -> None:
     """Create a new task."""
-    service: TaskService = ctx.obj["service"]
+    service: TaskService = ctx.obj.service
     task = service.create_task(title=title, owner=owner, priority=priority, description=description)
     click.echo(f"Task created with id {task.identifier}")
 
 
 @main.command("list")
+@_filter_options
+@click.option("--format", "fmt", type=click.Choice(["table", "jsonl"]), default="table", show_default=True)
+@click.option("--count", "count_only", is_flag=True, help="Print only the number of matching tasks.")
+@click.option("--since", type=click.DateTime(), help="Only include tasks created at or after this time (UTC).")
+@click.option("--until", type=click.DateTime(), help="Only include tasks created before this time (UTC).")
+@click.option("--newest-first", is_flag=True, help="List the most recently created tasks first.")
 @click.pass_context
-def list_tasks(ctx: click.Context) -> None:
-    """List all tasks."""
-    service: TaskService = ctx.obj["service"]
-    tasks = service.list_tasks()
-    click.echo(format_task_table(tasks))
+def list_tasks(
+    ctx: click.Context,
+    fmt: str,
+    count_only: bool,
+    since: Optional[datetime],
+    until: Optional[datetime],
+    newest_first: bool,
+    **filters,
+) -> None:
+    """List tasks, streaming rows as they are read."""
+    service: TaskService = ctx.obj.service
+    by_creation = since is not None or until is not None or newest_first
+    if count_only:
+        filters.pop("offset", None)
+        filters.pop("limit", None)
+        if by_creation:
+            click.echo(sum(1 for _ in service.iter_created(since=since, until=until, **filters)))
+        else:
+            click.echo(service.count_tasks(**filters))
+        return
+    if by_creation:
+        tasks = service.iter_created(since=since, until=until, newest_first=newest_first, **filters)
+    else:
+        tasks = service.iter_tasks(**filters)
+    if fmt == "jsonl":
+        for task in tasks:
+            click.echo(json.dumps(task.to_dict()))
+    else:
+        for line in iter_task_table(tasks):
+            click.echo(line)
+
+
+@main.command("search")
+@click.argument("query", required=False, default="")
+@click.option("--owner", help="Only include tasks with this owner.")
+@click.option(
+    "--priority",
+    type=click.Choice(["low", "medium", "high"], case_sensitive=False),
+    help="Only include tasks with this priority.",
+)
+@click.option("--prefix", is_flag=True, help="Let the last word match as a prefix.")
+@click.option("--offset", type=click.IntRange(min=0), default=0, help="Skip this many results.")
+@click.option("--limit", type=click.IntRange(min=1), default=20, show_default=True, help="Results per page.")
+@click.option("--format", "fmt", type=click.Choice(["table", "jsonl"]), default="table", show_default=True)
+@click.option("--rebuild", is_flag=True, help="Rebuild the index from the task store first.")
+@click.pass_context
+def search_tasks(
+    ctx: click.Context,
+    query: str,
+    owner: Optional[str],
+    priority: Optional[str],
+    prefix: bool,
+    offset: int,
+    limit: int,
+    fmt: str,
+    rebuild: bool,
+) -> None:
+    """Full-text search over task titles and descriptions, best matches first (requires search.enabled)."""
+    config: AppConfig = ctx.obj.config
+    if not config.search["enabled"]:
+        raise click.UsageError("Search is disabled; set search.enabled in the configuration")
+    from .data.search import SearchIndex
+
+    index = SearchIndex(config.search["path"])
+    service: TaskService = ctx.obj.service  # builds the index on first use
+    if rebuild:
+        count = index.rebuild(service.iter_tasks())
+        click.echo(f"Indexed {count} tasks", err=True)
+    if not query:
+        return
+    total, hits = index.search(query, owner=owner, priority=priority, prefix=prefix, offset=offset, limit=limit)
+    try:
+        found = service.get_tasks(identifier for identifier, _ in hits)
+    except KeyError:
+        # Writers that run without search enabled can leave stale entries behind.
+        found = []
+        for identifier, _ in hits:
+            try:
+                found.append(service.get_task(identifier))
+            except KeyError:
+                continue
+    scores = dict(hits)
+    if fmt == "jsonl":
+        for task in found:
+            click.echo(json.dumps({**task.to_dict(), "score": round(scores[task.identifier], 4)}))
+        return
+    for line in iter_task_table(found):
+        click.echo(line)
+    click.echo(f"{offset + 1 if hits else 0}-{offset + len(hits)} of {total} matches", err=True)
 
 
 @main.command("complete")
@@ -67,20 +272,187 @@ def list_tasks(ctx: click.Context) -> None:
 @click.pass_context
 def complete_task(ctx: click.Context, task_id: str) -> None:
     """Mark a task as completed."""
-    service: TaskService = ctx.obj["service"]
+    service: TaskService = ctx.obj.service
     token = service.complete_task(task_id)
     click.echo(json.dumps({"task_id": task_id, "completion_token": token}))
 
 
+@main.command("revoke")
+@click.argument("tokens", nargs=-1)
+@click.option("--task", "task_ids", multiple=True, help="Revoke every completion token issued so far for this task.")
+@click.pass_context
+def revoke_tokens(ctx: click.Context, tokens: Tuple[str, ...], task_ids: Tuple[str, ...]) -> None:
+    """Revoke completion tokens before they expire."""
+    if not tokens and not task_ids:
+        raise click.UsageError("Give at least one token or --task.")
+    service: TaskService = ctx.obj.service
+    try:
+        revoked = service.revoke_tokens(tokens)
+        for task_id in task_ids:
+            service.revoke_completion(task_id)
+    except (KeyError, ValueError) as exc:
+        raise click.ClickException(_error_message(exc)) from exc
+    click.echo(json.dumps({"tokens_revoked": revoked, "tasks_revoked": list(task_ids)}))
+
+
+@main.command("create-many")
+@click.argument("source", type=click.File("r", encoding="utf-8"), default="-")
+@click.pass_context
+def create_many(ctx: click.Context, source: TextIO) -> None:
+    """Create tasks from a JSONL file (or stdin), one task object per line."""
+    service: TaskService = ctx.obj.service
+    try:
+        tasks = service.create_many(_read_task_specs(source))
+    except ValueError as exc:
+        raise click.ClickException(_error_message(exc)) from exc
+    for task in tasks:
+        click.echo(json.dumps({"task_id": task.identifier}))
+
+
+@main.command("complete-many")
+@click.argument("source", type=click.File("r", encoding="utf-8"), default="-")
+@click.pass_context
+def complete_many(ctx: click.Context, source: TextIO) -> None:
+    """Complete the tasks listed in a JSONL file (or stdin)."""
+    service: TaskService = ctx.obj.service
+    try:
+        tokens = service.complete_many(_read_identifiers(source))
+    except (KeyError, ValueError) as exc:
+        raise click.ClickException(_error_message(exc)) from exc
+    for task_id, token in tokens.items():
+        click.echo(json.dumps({"task_id": task_id, "completion_token": token}))
+
+
+@main.command("delete-many")
+@click.argument("source", type=click.File("r", encoding="utf-8"), default="-")
+@click.pass_context
+def delete_many(ctx: click.Context, source: TextIO) -> None:
+    """Delete the tasks listed in a JSONL file (or stdin)."""
+    service: TaskService = ctx.obj.service
+    try:
+        count = service.delete_many(_read_identifiers(source))
+    except (KeyError, ValueError) as exc:
+        raise click.ClickException(_error_message(exc)) from exc
+    click.echo(f"Deleted {count} tasks")
+
+
 @main.command("export")
 @click.argument("output", type=click.Path(dir_okay=False, path_type=Path))
+@_filter_options
+@click.option("--format", "fmt", type=click.Choice(exporter.EXPORT_FORMATS), default="yaml", show_default=True)
+@click.option("--incremental", is_flag=True, help="Only export tasks changed since the last checkpoint.")
+@click.option(
+    "--checkpoint",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Checkpoint file for --incremental [default: OUTPUT.checkpoint].",
+)
 @click.pass_context
-def export_tasks(ctx: click.Context, output: Path) -> None:
-    """Export all tasks to a YAML file."""
-    service: TaskService = ctx.obj["service"]
-    tasks = service.list_tasks()
-    export_tasks_to_yaml(tasks, output)
-    click.echo(f"Exported {len(tasks)} tasks to {output}")
+def export_tasks(
+    ctx: click.Context, output: Path, fmt: str, incremental: bool, checkpoint: Optional[Path], **filters
+) -> None:
+    """Export tasks to a YAML or JSONL file, writing records incrementally."""
+    if incremental:
+        _export_incremental(ctx.obj.config, output, fmt, checkpoint, filters)
+        return
+    service: TaskService = ctx.obj.service
+    count = exporter.export_tasks(service.iter_tasks(**filters), output, fmt)
+    click.echo(f"Exported {count} tasks to {output}")
+
+
+def _change_feed(config: AppConfig) -> ChangeFeed:
+    from .data.changes import ChangeFeed
+
+    if not config.changes["enabled"]:
+        raise click.UsageError("The change feed is disabled; set changes.enabled in the configuration")
+    return ChangeFeed(config.changes["path"])
+
+
+def _export_incremental(
+    config: AppConfig, output: Path, fmt: str, checkpoint: Optional[Path], filters: Dict[str, Any]
+) -> None:
+    # Reads only the feed past the checkpoint; the task store is never loaded.
+    from .data.changes import collapse, load_checkpoint, save_checkpoint
+    from .data.repository import select_tasks
+
+    feed = _change_feed(config)
+    checkpoint = checkpoint or output.with_name(output.name + ".checkpoint")
+    since = load_checkpoint(checkpoint)
+    delta = collapse(feed.read(since), since)
+    count = exporter.export_tasks(select_tasks(delta.tasks.values(), **filters), output, fmt)
+    save_checkpoint(checkpoint, delta.last_seq)
+    click.echo(f"Exported {count} tasks changed after #{since} to {output} (now at #{delta.last_seq})")
+    if delta.reset:
+        click.echo("The store was replaced since the checkpoint; tasks not exported were removed.")
+    elif delta.deleted:
+        click.echo(f"{len(delta.deleted)} tasks were deleted; run 'changes --since {since}' for their ids.")
+
+
+@main.command("changes")
+@click.option("--since", type=click.IntRange(min=0), default=0, show_default=True, help="Last sequence number seen.")
+@click.option("--limit", type=click.IntRange(min=1), default=None, help="Print at most this many changes.")
+@click.option("--watch", is_flag=True, help="Keep running and print new changes as they happen.")
+@click.option("--interval", type=click.FloatRange(min=0.01), default=1.0, show_default=True, help="Polling interval.")
+@click.pass_context
+def changes(ctx: click.Context, since: int, limit: Optional[int], watch: bool, interval: float) -> None:
+    """Print task changes after sequence number SINCE as JSON lines (requires changes.enabled)."""
+    feed = _change_feed(ctx.obj.config)
+    stream = feed.follow(since, interval) if watch else feed.read(since, limit)
+    try:
+        for count, change in enumerate(stream, start=1):
+            click.echo(json.dumps(change.to_dict(), separators=(",", ":")))
+            if watch and limit is not None and count >= limit:
+                break
+    except KeyboardInterrupt:
+        pass
+
+
+@main.command("import")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False, allow_dash=True, path_type=Path))
+@click.option(
+    "--format", "fmt", type=click.Choice(["auto", "yaml", "json", "jsonl"]), default="auto", show_default=True,
+    help="Input format; auto infers it from the file extension.",
+)
+@click.option(
+    "--mode", type=click.Choice(["merge", "replace"]), default="merge", show_default=True,
+    help="merge upserts imported tasks; replace discards every task not in the backup.",
+)
+@click.option("--batch-size", type=click.IntRange(min=1), default=10000, show_default=True, help="Tasks per commit.")
+@click.option(
+    "--chunk-size", type=click.IntRange(min=1), default=1000, show_default=True, help="Records per worker job.",
+)
+@click.option("--workers", type=click.IntRange(min=0), default=None, help="Decoder processes [default: CPU count].")
+@click.pass_context
+def import_tasks(
+    ctx: click.Context,
+    source: Path,
+    fmt: str,
+    mode: str,
+    batch_size: int,
+    chunk_size: int,
+    workers: Optional[int],
+) -> None:
+    """Stream tasks from a YAML, JSON or JSONL backup into the store."""
+    from .utils import importer
+
+    if fmt == "auto" and str(source) == "-":
+        fmt = "jsonl"
+    elif fmt == "auto":
+        try:
+            fmt = importer.detect_format(source)
+        except ValueError as exc:
+            raise click.UsageError(str(exc)) from exc
+    if workers is None:
+        workers = os.cpu_count() or 1
+    service: TaskService = ctx.obj.service
+    with click.open_file(str(source), "r", encoding="utf-8") as fh:
+        batches = importer.iter_task_batches(
+            fh, fmt, batch_size=batch_size, chunk_size=chunk_size, workers=workers
+        )
+        try:
+            count = service.import_batches(batches, replace=mode == "replace")
+        except ValueError as exc:
+            raise click.ClickException(_error_message(exc)) from exc
+    click.echo(f"Imported {count} tasks from {source}")
 
 
 @main.command("purge")
@@ -90,6 +462,404 @@ def purge_tasks(ctx: click.Context, force: bool) -> None:
     """Purge all tasks from the repository."""
     if not force:
         raise click.UsageError("Refusing to purge without --force")
-    service: TaskService = ctx.obj["service"]
+    service: TaskService = ctx.obj.service
     count = service.purge_tasks()
     click.echo(f"Purged {count} tasks")
+
+
+@main.command("archive")
+@click.option(
+    "--older-than",
+    "older_than",
+    type=click.FloatRange(min=0),
+    help="Archive tasks completed more than this many days ago [default: archive.older_than_days].",
+)
+@click.pass_context
+def archive_tasks(ctx: click.Context, older_than: Optional[float]) -> None:
+    """Move old completed tasks into compressed archive segments (requires archive.enabled)."""
+    from datetime import timedelta
+
+    service: TaskService = ctx.obj.service
+    days = ctx.obj.config.archive["older_than_days"] if older_than is None else older_than
+    try:
+        count = service.archive_completed(timedelta(days=days))
+    except ValueError as exc:
+        raise click.UsageError(str(exc)) from exc
+    click.echo(f"Archived {count} tasks completed more than {days:g} days ago")
+
+
+@main.command("stats")
+@click.option("--format", "fmt", type=click.Choice(["prometheus", "json"]), default="prometheus", show_default=True)
+@click.option("--reset", is_flag=True, help="Clear the recorded metrics after printing them.")
+@click.pass_context
+def stats(ctx: click.Context, fmt: str, reset: bool) -> None:
+    """Print metrics recorded by earlier commands (enable with metrics.enabled or ARCHON_METRICS=1)."""
+    from .utils import metrics
+
+    path = ctx.obj.config.metrics_path
+    snapshot = metrics.load(path)
+    if fmt == "json":
+        click.echo(json.dumps(snapshot, indent=2))
+    else:
+        click.echo(metrics.to_prometheus(snapshot), nl=False)
+    if reset:
+        path.unlink(missing_ok=True)
+
+
+def _parse_quantiles(ctx: click.Context, param: click.Parameter, value: str) -> List[float]:
+    try:
+        quantiles = [float(part) for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise click.BadParameter("expected comma-separated numbers such as 0.5,0.95") from None
+    if not quantiles or any(not 0 <= q <= 1 for q in quantiles):
+        raise click.BadParameter("quantiles must be between 0 and 1")
+    return quantiles
+
+
+@main.command("report")
+@click.option(
+    "--by",
+    type=click.Choice(["owner,priority", "owner", "priority", "none"]),
+    default="owner,priority",
+    show_default=True,
+    help="Fields to group by.",
+)
+@click.option("--owner", help="Only include tasks with this owner.")
+@click.option(
+    "--priority",
+    type=click.Choice(["low", "medium", "high"], case_sensitive=False),
+    help="Only include tasks with this priority.",
+)
+@click.option(
+    "--quantiles", default="0.5,0.95,0.99", show_default=True, callback=_parse_quantiles,
+    help="Completion-latency quantiles to show.",
+)
+@click.option("--format", "fmt", type=click.Choice(["table", "json"]), default="table", show_default=True)
+@click.option("--rebuild", is_flag=True, help="Recompute the aggregates from the task store first.")
+@click.pass_context
+def report(
+    ctx: click.Context,
+    by: str,
+    owner: Optional[str],
+    priority: Optional[str],
+    quantiles: List[float],
+    fmt: str,
+    rebuild: bool,
+) -> None:
+    """Task counts and completion latency (created to completed) per group.
+
+    With aggregates.enabled this reads the maintained aggregates and never
+    loads the tasks; otherwise it scans the store.
+    """
+    from .data.aggregates import AggregateStore, TaskAggregates
+
+    config: AppConfig = ctx.obj.config
+    if config.aggregates["enabled"]:
+        store = AggregateStore(config.aggregates["path"])
+        if rebuild:
+            tasks = ctx.obj.service.iter_tasks()
+            if config.archive["enabled"]:
+                from .data.archive import TaskArchive, with_archived
+
+                # Archived tasks still count towards the maintained aggregates.
+                tasks = with_archived(tasks, TaskArchive(Path(config.archive["path"])))
+            store.rebuild(tasks)
+        elif not store.exists:
+            ctx.obj.service  # builds the aggregates on first use
+        aggregates = store.load()
+    else:
+        aggregates = TaskAggregates.from_tasks(ctx.obj.service.iter_tasks())
+    fields = [] if by == "none" else by.split(",")
+    groups = aggregates.summarize(fields, owner=owner, priority=priority)
+    labels = [f"p{q * 100:g}" for q in quantiles]
+    if fmt == "json":
+        rows = []
+        for key, group in groups:
+            latency: Dict[str, Any] = {"mean": group.latency.mean}
+            latency.update(zip(labels, group.latency.quantiles(quantiles)))
+            rows.append({**dict(zip(fields, key)), "open": group.open, "completed": group.completed, "latency": latency})
+        click.echo(json.dumps(rows, indent=2))
+        return
+    headers = [name.capitalize() for name in fields] + ["Open", "Completed", "Mean", *labels]
+    click.echo(
+        format_table(
+            headers,
+            (
+                [
+                    *key,
+                    str(group.open),
+                    str(group.completed),
+                    format_duration(group.latency.mean),
+                    *(format_duration(value) for value in group.latency.quantiles(quantiles)),
+                ]
+                for key, group in groups
+            ),
+        )
+    )
+
+
+@main.group("snapshot")
+def snapshot() -> None:
+    """Point-in-time copies of the task store, taken without pausing writers."""
+
+
+def _snapshot_store(ctx: click.Context):
+    from .data.snapshot import SnapshotStore
+
+    config: AppConfig = ctx.obj.config
+    return SnapshotStore(config, config.snapshots["path"])
+
+
+@snapshot.command("create")
+@click.option("--name", help="Snapshot name (default: the current UTC time).")
+@click.option(
+    "--incremental", is_flag=True, help="Store only the changes since the last snapshot (requires changes.enabled)."
+)
+@click.pass_context
+def snapshot_create(ctx: click.Context, name: Optional[str], incremental: bool) -> None:
+    """Take a snapshot of the task store."""
+    try:
+        manifest = _snapshot_store(ctx).create(name, incremental=incremental)
+    except ValueError as exc:
+        raise click.ClickException(_error_message(exc)) from exc
+    click.echo(json.dumps(manifest))
+
+
+@snapshot.command("list")
+@click.option("--format", "fmt", type=click.Choice(["table", "jsonl"]), default="table", show_default=True)
+@click.pass_context
+def snapshot_list(ctx: click.Context, fmt: str) -> None:
+    """List snapshots, oldest first."""
+    manifests = _snapshot_store(ctx).list()
+    if fmt == "jsonl":
+        for manifest in manifests:
+            click.echo(json.dumps(manifest))
+        return
+    rows = (
+        [manifest["name"], manifest["kind"], manifest["base"] or "-", manifest["created_at"], str(manifest["bytes"])]
+        for manifest in manifests
+    )
+    click.echo(format_table(["Name", "Kind", "Base", "Created", "Bytes"], rows))
+
+
+@snapshot.command("restore")
+@click.argument("name")
+@click.option("--force", is_flag=True, help="Confirm replacing the current tasks.")
+@click.pass_context
+def snapshot_restore(ctx: click.Context, name: str, force: bool) -> None:
+    """Replace the task store with snapshot NAME."""
+    if not force:
+        raise click.UsageError("Refusing to restore without --force")
+    try:
+        count = _snapshot_store(ctx).restore(name)
+    except (KeyError, ValueError) as exc:
+        raise click.ClickException(_error_message(exc)) from exc
+    click.echo(f"Restored {count} tasks from {name}")
+
+
+@main.command("migrate")
+@click.argument("source", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.argument("target", type=click.Path(dir_okay=False, path_type=Path))
+def migrate_store(source: Path, target: Path) -> None:
+    """Import a JSON task store into an SQLite database."""
+    from .data.sqlite import SqliteTaskRepository
+
+    repo = SqliteTaskRepository(target)
+    try:
+        count = repo.import_json(source)
+    finally:
+        repo.close()
+    click.echo(f"Imported {count} tasks from {source} into {target}")
+
+
+@main.command("reshard")
+@click.option("--shards", type=click.IntRange(min=1), required=True, help="New number of shard files.")
+@click.option(
+    "--target",
+    type=click.Path(file_okay=False, path_type=Path),
+    help="Write the sharded store here instead of replacing the configured one.",
+)
+@click.pass_context
+def reshard_store(ctx: click.Context, shards: int, target: Optional[Path]) -> None:
+    """Redistribute the configured JSON or sharded store across a new number of shards.
+
+    Stop other processes using the store first.
+    """
+    from .data.codecs import get_codec
+    from .data.sharded import reshard
+
+    config: AppConfig = ctx.obj.config
+    count = reshard(config.database_path, shards, target=target, codec=get_codec(config.database_format))
+    click.echo(f"Resharded {count} tasks into {shards} shards at {target or config.database_path}")
+
+
+@main.command("run")
+@click.option("--owner", help="Only run tasks with this owner.")
+@click.option(
+    "--priority",
+    type=click.Choice(["low", "medium", "high"], case_sensitive=False),
+    help="Only run tasks with this priority.",
+)
+@click.option("--limit", type=click.IntRange(min=1), default=None, help="Run at most this many tasks.")
+@click.option(
+    "--handler",
+    default="archon_app.services.dispatch:log_handler",
+    show_default=True,
+    help="Callable run for each task, as module:function.",
+)
+@click.option("--workers", type=click.IntRange(min=1), default=4, show_default=True, help="Worker pool size.")
+@click.option("--pool", type=click.Choice(["thread", "process"]), default="thread", show_default=True)
+@click.option("--lease-timeout", type=click.FloatRange(min=0.001), default=30.0, show_default=True)
+@click.option("--max-attempts", type=click.IntRange(min=1), default=3, show_default=True)
+@click.option("--batch-size", type=click.IntRange(min=1), default=256, show_default=True, help="Completions per write.")
+@click.option("--fair/--no-fair", default=False, show_default=True, help="Take turns between owners.")
+@click.pass_context
+def run_tasks(
+    ctx: click.Context,
+    owner: Optional[str],
+    priority: Optional[str],
+    limit: Optional[int],
+    handler: str,
+    workers: int,
+    pool: str,
+    lease_timeout: float,
+    max_attempts: int,
+    batch_size: int,
+    fair: bool,
+) -> None:
+    """Execute open tasks by priority on a worker pool and mark them completed."""
+    from .services.dispatch import Dispatcher, load_handler
+
+    try:
+        func = load_handler(handler)
+    except (ImportError, ValueError) as exc:
+        raise click.BadParameter(str(exc), param_hint="--handler") from exc
+    service: TaskService = ctx.obj.service
+    dispatcher = Dispatcher(
+        service,
+        func,
+        workers=workers,
+        pool=pool,
+        lease_timeout=lease_timeout,
+        max_attempts=max_attempts,
+        batch_size=batch_size,
+        fair=fair,
+    )
+    dispatcher.submit(service.iter_tasks(owner=owner, priority=priority, completed=False, limit=limit))
+    stats = dispatcher.run()
+    click.echo(
+        f"Dispatched {stats.dispatched} tasks in {stats.seconds:.2f}s ({stats.per_second:.0f}/s): "
+        f"{stats.completed} completed, {stats.failed} failed, {stats.retried} retried, {stats.expired} expired"
+    )
+
+
+@main.command("serve")
+@click.option("--host", default="127.0.0.1", show_default=True, help="Interface to bind.")
+@click.option("--port", type=click.IntRange(0, 65535), default=8080, show_default=True, help="Port to listen on.")
+@click.option("--workers", type=click.IntRange(min=1), default=4, show_default=True, help="Repository I/O threads.")
+@click.pass_context
+def serve(ctx: click.Context, host: str, port: int, workers: int) -> None:
+    """Run a long-lived HTTP/JSON API over a warm repository."""
+    from .server import run_server
+
+    service: TaskService = ctx.obj.service
+    archive = ctx.obj.config.archive
+    scheduler = None
+    if archive["enabled"] and archive["interval"] > 0:
+        from datetime import timedelta
+
+        from .data.archive import ArchiveScheduler
+
+        older_than = timedelta(days=archive["older_than_days"])
+        scheduler = ArchiveScheduler(lambda: service.archive_completed(older_than), archive["interval"])
+        scheduler.start()
+    try:
+        run_server(service, host=host, port=port, workers=workers)
+    finally:
+        if scheduler is not None:
+            scheduler.stop()
+
+
+@main.command("bench")
+@click.option(
+    "--size", "sizes", type=click.IntRange(min=1), multiple=True,
+    help="Synthetic store size; repeat for several (default: 1000 and 100000).",
+)
+@click.option(
+    "--backend", type=click.Choice(["json", "journal", "sqlite"]), default="json", show_default=True,
+)
+@click.option(
+    "--format", "fmt", type=click.Choice(["json", "jsonl", "binary"]), default="json", show_default=True,
+    help="Encoding of the JSON backend.",
+)
+@click.option("--reads", type=click.IntRange(min=1), default=1000, show_default=True, help="Lookups per store.")
+@click.option("--writes", type=click.IntRange(min=1), default=20, show_default=True, help="Writes per store.")
+@click.option("--tokens", type=click.IntRange(min=0), default=10000, show_default=True, help="Tokens to issue.")
+@click.option("--startup-runs", type=click.IntRange(min=0), default=5, show_default=True)
+@click.option("--memory", is_flag=True, help="Record peak allocations (slows every benchmark down).")
+@click.option("--output", type=click.Path(dir_okay=False, path_type=Path), help="Write JSON results here.")
+@click.option(
+    "--baseline", type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    help="Fail if any benchmark is slower than in this results file.",
+)
+@click.option("--tolerance", type=click.FloatRange(min=0), default=0.25, show_default=True)
+def bench(
+    sizes: tuple[int, ...],
+    backend: str,
+    fmt: str,
+    reads: int,
+    writes: int,
+    tokens: int,
+    startup_runs: int,
+    memory: bool,
+    output: Optional[Path],
+    baseline: Optional[Path],
+    tolerance: float,
+) -> None:
+    """Benchmark repository, service, token and CLI hot paths on synthetic stores."""
+    from . import benchmarks
+
+    settings = {
+        "sizes": list(sizes or benchmarks.DEFAULT_SIZES),
+        "backend": backend,
+        "format": fmt,
+        "reads": reads,
+        "writes": writes,
+        "tokens": tokens,
+        "memory": memory,
+    }
+    results = benchmarks.run_benchmarks(
+        settings["sizes"],
+        backend=backend,
+        fmt=fmt,
+        reads=reads,
+        writes=writes,
+        tokens=tokens,
+        startup_runs=startup_runs,
+        trace_memory=memory,
+    )
+    click.echo(f"{'benchmark':<28}{'ops':>10}{'latency (us)':>16}{'ops/s':>14}{'peak (KiB)':>12}")
+    for result in results:
+        peak = f"{result.peak_bytes // 1024}" if result.peak_bytes is not None else "-"
+        click.echo(
+            f"{result.key:<28}{result.operations:>10}{result.latency_us:>16.2f}"
+            f"{result.ops_per_second:>14.1f}{peak:>12}"
+        )
+    if output:
+        document = benchmarks.results_document(results, **settings)
+        output.write_text(json.dumps(document, indent=2), encoding="utf-8")
+        click.echo(f"Wrote results to {output}")
+    if baseline:
+        try:
+            reference = benchmarks.load_results(baseline)
+        except ValueError as exc:
+            raise click.ClickException(str(exc)) from exc
+        regressions = benchmarks.compare_results(results, reference, tolerance)
+        for regression in regressions:
+            click.echo(
+                f"REGRESSION {regression.key}: {regression.baseline_us:.2f}us -> "
+                f"{regression.current_us:.2f}us ({regression.ratio:.2f}x)",
+                err=True,
+            )
+        if regressions:
+            raise click.ClickException(f"{len(regressions)} benchmark(s) regressed beyond {tolerance:.0%}")
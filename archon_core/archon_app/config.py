@@ -7,20 +7,68 @@ import os
 from pathlib import Path
 from typing import Any, Dict, MutableMapping
 
-from .utils.yaml_support import safe_load
-
 
 _DEFAULTS: Dict[str, Any] = {
     "environment": "development",
     "database": {
         "path": "./archon-data.json",
+        "backend": "auto",
+        "format": "json",
+        "shards": 16,
+        "columnar": False,
+        "compaction_threshold": 8 * 1024 * 1024,
+    },
+    "tasks": {
+        # "random" or "ulid" (time-ordered); existing identifiers keep working either way.
+        "id_scheme": "random",
     },
     "security": {
         "token_ttl": 900,
+        "token_cache_size": 4096,
+        # Revoked completion tokens, shared by every process using this file.
+        "revocations_path": "./archon-revocations.db",
+        "revocation_refresh": 1.0,
     },
     "notifications": {
         "email_enabled": False,
         "sms_enabled": False,
+        "sink": "log",
+        "path": "./archon-notifications.jsonl",
+        "queue_size": 10000,
+        "workers": 1,
+        "batch_size": 100,
+        "flush_interval": 0.2,
+        "max_retries": 3,
+        "backoff": 0.1,
+        "overflow": "drop_oldest",
+    },
+    "search": {
+        "enabled": False,
+        # Defaults to a directory next to the database ("<database path>.search").
+        "path": None,
+    },
+    "aggregates": {
+        "enabled": False,
+        # Defaults to a file next to the database ("<database path>.aggregates.json").
+        "path": None,
+    },
+    "changes": {
+        "enabled": False,
+        "path": "./archon-changes.jsonl",
+    },
+    "snapshots": {
+        # Defaults to a directory next to the database ("<database path>.snapshots").
+        "path": None,
+    },
+    "archive": {
+        "enabled": False,
+        "path": "./archon-archive",
+        "older_than_days": 30,
+        "interval": 0,
+    },
+    "metrics": {
+        "enabled": False,
+        "path": "./archon-metrics.json",
     },
 }
 
@@ -32,31 +80,120 @@ class AppConfig:
     environment: str
     database_path: Path
     token_ttl: int
-    notifications: Dict[str, bool] = field(default_factory=dict)
+    notifications: Dict[str, Any] = field(default_factory=dict)
+    search: Dict[str, Any] = field(default_factory=lambda: dict(_DEFAULTS["search"]))
+    aggregates: Dict[str, Any] = field(default_factory=lambda: dict(_DEFAULTS["aggregates"]))
+    changes: Dict[str, Any] = field(default_factory=lambda: dict(_DEFAULTS["changes"]))
+    archive: Dict[str, Any] = field(default_factory=lambda: dict(_DEFAULTS["archive"]))
+    snapshots: Dict[str, Any] = field(default_factory=lambda: dict(_DEFAULTS["snapshots"]))
+    database_backend: str = "auto"
+    database_format: str = "json"
+    database_shards: int = _DEFAULTS["database"]["shards"]
+    database_columnar: bool = False
+    compaction_threshold: int = _DEFAULTS["database"]["compaction_threshold"]
+    token_cache_size: int = _DEFAULTS["security"]["token_cache_size"]
+    revocations_path: Path = Path(_DEFAULTS["security"]["revocations_path"])
+    revocation_refresh: float = _DEFAULTS["security"]["revocation_refresh"]
+    id_scheme: str = _DEFAULTS["tasks"]["id_scheme"]
+    metrics_enabled: bool = False
+    metrics_path: Path = Path(_DEFAULTS["metrics"]["path"])
 
     @classmethod
     def from_mapping(cls, mapping: MutableMapping[str, Any]) -> "AppConfig":
         """Create a configuration object from a mapping."""
         environment = str(mapping.get("environment", _DEFAULTS["environment"]))
         database_cfg = mapping.get("database", {}) or {}
+        tasks_cfg = mapping.get("tasks", {}) or {}
         security_cfg = mapping.get("security", {}) or {}
         notifications_cfg = mapping.get("notifications", {}) or {}
+        search_cfg = mapping.get("search", {}) or {}
+        aggregates_cfg = mapping.get("aggregates", {}) or {}
+        changes_cfg = mapping.get("changes", {}) or {}
+        archive_cfg = mapping.get("archive", {}) or {}
+        snapshots_cfg = mapping.get("snapshots", {}) or {}
+        metrics_cfg = mapping.get("metrics", {}) or {}
 
         database_path = Path(database_cfg.get("path", _DEFAULTS["database"]["path"])).expanduser()
+        database_backend = str(database_cfg.get("backend", _DEFAULTS["database"]["backend"])).lower()
+        database_format = str(database_cfg.get("format", _DEFAULTS["database"]["format"])).lower()
+        database_shards = int(database_cfg.get("shards", _DEFAULTS["database"]["shards"]))
+        database_columnar = _parse_flag(database_cfg.get("columnar", _DEFAULTS["database"]["columnar"]))
+        compaction_threshold = int(
+            database_cfg.get("compaction_threshold", _DEFAULTS["database"]["compaction_threshold"])
+        )
+        id_scheme = str(tasks_cfg.get("id_scheme", _DEFAULTS["tasks"]["id_scheme"])).lower()
         token_ttl = int(security_cfg.get("token_ttl", _DEFAULTS["security"]["token_ttl"]))
+        token_cache_size = int(security_cfg.get("token_cache_size", _DEFAULTS["security"]["token_cache_size"]))
+        revocations_path = Path(
+            security_cfg.get("revocations_path", _DEFAULTS["security"]["revocations_path"])
+        ).expanduser()
+        revocation_refresh = float(
+            security_cfg.get("revocation_refresh", _DEFAULTS["security"]["revocation_refresh"])
+        )
 
-        notifications: Dict[str, bool] = {
-            "email_enabled": bool(notifications_cfg.get("email_enabled", False)),
-            "sms_enabled": bool(notifications_cfg.get("sms_enabled", False)),
-        }
+        notifications: Dict[str, Any] = {**_DEFAULTS["notifications"], **notifications_cfg}
+        notifications["email_enabled"] = bool(notifications["email_enabled"])
+        notifications["sms_enabled"] = bool(notifications["sms_enabled"])
+        search: Dict[str, Any] = {**_DEFAULTS["search"], **search_cfg}
+        search["enabled"] = _parse_flag(search["enabled"])
+        search["path"] = (
+            Path(str(search["path"])).expanduser()
+            if search["path"]
+            else database_path.with_name(database_path.name + ".search")
+        )
+        aggregates: Dict[str, Any] = {**_DEFAULTS["aggregates"], **aggregates_cfg}
+        aggregates["enabled"] = _parse_flag(aggregates["enabled"])
+        aggregates["path"] = (
+            Path(str(aggregates["path"])).expanduser()
+            if aggregates["path"]
+            else database_path.with_name(database_path.name + ".aggregates.json")
+        )
+        changes: Dict[str, Any] = {**_DEFAULTS["changes"], **changes_cfg}
+        changes["enabled"] = _parse_flag(changes["enabled"])
+        changes["path"] = Path(str(changes["path"])).expanduser()
+        archive: Dict[str, Any] = {**_DEFAULTS["archive"], **archive_cfg}
+        archive["enabled"] = _parse_flag(archive["enabled"])
+        archive["path"] = Path(str(archive["path"])).expanduser()
+        archive["older_than_days"] = float(archive["older_than_days"])
+        archive["interval"] = float(archive["interval"])
+        snapshots: Dict[str, Any] = {**_DEFAULTS["snapshots"], **snapshots_cfg}
+        snapshots["path"] = (
+            Path(str(snapshots["path"])).expanduser()
+            if snapshots["path"]
+            else database_path.with_name(database_path.name + ".snapshots")
+        )
+        metrics_enabled = _parse_flag(metrics_cfg.get("enabled", _DEFAULTS["metrics"]["enabled"]))
+        metrics_path = Path(metrics_cfg.get("path", _DEFAULTS["metrics"]["path"])).expanduser()
         return cls(
             environment=environment,
             database_path=database_path,
             token_ttl=token_ttl,
             notifications=notifications,
+            search=search,
+            aggregates=aggregates,
+            changes=changes,
+            archive=archive,
+            snapshots=snapshots,
+            database_backend=database_backend,
+            database_format=database_format,
+            database_shards=database_shards,
+            database_columnar=database_columnar,
+            compaction_threshold=compaction_threshold,
+            token_cache_size=token_cache_size,
+            revocations_path=revocations_path,
+            revocation_refresh=revocation_refresh,
+            id_scheme=id_scheme,
+            metrics_enabled=metrics_enabled,
+            metrics_path=metrics_path,
         )
 
 
+def _parse_flag(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in {"1", "true", "yes", "on"}
+    return bool(value)
+
+
 def _load_json(path: Path) -> Dict[str, Any]:
     if not path.exists():
         return {}
@@ -65,6 +202,8 @@ def _load_json(path: Path) -> Dict[str, Any]:
 
 
 def _load_yaml(path: Path) -> Dict[str, Any]:
+    from .utils.yaml_support import safe_load
+
     if not path.exists():
         return {}
     with path.open("r", encoding="utf-8") as fh:
@@ -86,8 +225,20 @@ def load_config(config_path: str | None = None) -> AppConfig:
         env_overrides["environment"] = env
     if db_path := os.getenv("ARCHON_DB_PATH"):
         env_overrides.setdefault("database", {})["path"] = db_path
+    if db_backend := os.getenv("ARCHON_DB_BACKEND"):
+        env_overrides.setdefault("database", {})["backend"] = db_backend
+    if db_format := os.getenv("ARCHON_DB_FORMAT"):
+        env_overrides.setdefault("database", {})["format"] = db_format
+    if id_scheme := os.getenv("ARCHON_ID_SCHEME"):
+        env_overrides.setdefault("tasks", {})["id_scheme"] = id_scheme
+    if metrics_flag := os.getenv("ARCHON_METRICS"):
+        env_overrides.setdefault("metrics", {})["enabled"] = metrics_flag
+    if metrics_path := os.getenv("ARCHON_METRICS_PATH"):
+        env_overrides.setdefault("metrics", {})["path"] = metrics_path
     if ttl := os.getenv("ARCHON_TOKEN_TTL"):
         env_overrides.setdefault("security", {})["token_ttl"] = int(ttl)
+    if revocations_path := os.getenv("ARCHON_REVOCATIONS_PATH"):
+        env_overrides.setdefault("security", {})["revocations_path"] = revocations_path
 
     merged: Dict[str, Any] = {
         **_DEFAULTS,
@@ -95,7 +246,7 @@ def load_config(config_path: str | None = None) -> AppConfig:
     }
     for section, values in env_overrides.items():
         if isinstance(values, MutableMapping):
-            merged.setdefault(section, {}).update(values)
+            merged[section] = {**(merged.get(section) or {}), **values}
         else:
             merged[section] = values
 
@@ -0,0 +1,398 @@
+"""Incrementally maintained task counts and completion-latency histograms."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import json
+import math
+from pathlib import Path
+from threading import RLock
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+from ..utils import metrics
+from ..utils.fileio import FileLock, atomic_write_text
+from .codecs import to_epoch_us
+from .models import Task
+from .repository import DelegatingRepository, TaskRepository
+
+GROUP_FIELDS = ("owner", "priority")
+_VERSION = 1
+# Buckets grow by 2% so any quantile is within 1% of a recorded value.
+_GAMMA = 1.02
+_LOG_GAMMA = math.log(_GAMMA)
+_MIN_SECONDS = 0.001
+_MIN_COMPACT_BYTES = 1024 * 1024
+
+
+class LatencyHistogram:
+    """Log-bucketed histogram of durations in seconds, in the style of DDSketch.
+
+    Bucket ``i`` covers ``(MIN * GAMMA**(i-1), MIN * GAMMA**i]`` and everything
+    up to one millisecond lands in bucket 0, so a quantile estimate is within
+    1% of a recorded value. Histograms are merged by adding bucket counts, and
+    a value can be removed again, which is what keeps them incremental.
+    """
+
+    __slots__ = ("buckets", "count", "total_us")
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+
+    @staticmethod
+    def _index(seconds: float) -> int:
+        if seconds <= _MIN_SECONDS:
+            return 0
+        return math.ceil(math.log(seconds / _MIN_SECONDS) / _LOG_GAMMA)
+
+    def add(self, seconds: float, count: int = 1) -> None:
+        seconds = max(0.0, seconds)
+        index = self._index(seconds)
+        remaining = self.buckets.get(index, 0) + count
+        if remaining:
+            self.buckets[index] = remaining
+        else:
+            del self.buckets[index]
+        self.count += count
+        self.total_us += count * round(seconds * 1_000_000)
+
+    def remove(self, seconds: float) -> None:
+        self.add(seconds, -1)
+
+    def merge(self, other: "LatencyHistogram") -> None:
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total_us += other.total_us
+
+    @property
+    def mean(self) -> float | None:
+        return self.total_us / self.count / 1_000_000 if self.count else None
+
+    def quantile(self, q: float) -> float | None:
+        """Estimated ``q`` quantile in seconds, or ``None`` when empty."""
+        return self.quantiles([q])[0]
+
+    def quantiles(self, qs: Sequence[float]) -> List[float | None]:
+        """Estimates for several quantiles from a single pass over the buckets."""
+        if any(not 0 <= q <= 1 for q in qs):
+            raise ValueError("Quantile must be between 0 and 1")
+        if self.count <= 0:
+            return [None] * len(qs)
+        order = sorted(range(len(qs)), key=qs.__getitem__)
+        results: List[float | None] = [None] * len(qs)
+        buckets = iter(sorted(self.buckets.items()))
+        index, seen = next(buckets)
+        for position in order:
+            rank = qs[position] * (self.count - 1)
+            while seen <= rank:
+                following = next(buckets, None)
+                if following is None:
+                    break
+                index, seen = following[0], seen + following[1]
+            # Midpoint (in relative terms) of the bucket's range.
+            results[position] = _MIN_SECONDS * 2 * _GAMMA**index / (_GAMMA + 1)
+        return results
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"buckets": sorted(self.buckets.items()), "count": self.count, "total_us": self.total_us}
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "LatencyHistogram":
+        histogram = cls()
+        histogram.buckets = {int(index): int(count) for index, count in payload["buckets"]}
+        histogram.count = int(payload["count"])
+        histogram.total_us = int(payload["total_us"])
+        return histogram
+
+
+def _latency(task: Task) -> float | None:
+    if task.completed_at is None:
+        return None
+    return (to_epoch_us(task.completed_at) - to_epoch_us(task.created_at)) / 1_000_000
+
+
+@dataclass(slots=True)
+class GroupStats:
+    open: int = 0
+    completed: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    @property
+    def total(self) -> int:
+        return self.open + self.completed
+
+    def merge(self, other: "GroupStats") -> None:
+        self.open += other.open
+        self.completed += other.completed
+        self.latency.merge(other.latency)
+
+
+class TaskAggregates:
+    """Open/completed counts and completion latencies per ``(owner, priority)``.
+
+    Every figure is a sum over tasks, so adding and removing single tasks keeps
+    it exact, and coarser groupings are merges of the fine-grained groups.
+    """
+
+    def __init__(self) -> None:
+        self._groups: Dict[Tuple[str, str], GroupStats] = {}
+
+    @classmethod
+    def from_tasks(cls, tasks: Iterable[Task]) -> "TaskAggregates":
+        aggregates = cls()
+        for task in tasks:
+            aggregates.add(task)
+        return aggregates
+
+    def __len__(self) -> int:
+        return len(self._groups)
+
+    def update(self, owner: str, priority: str, latency: float | None, sign: int) -> None:
+        """Add (``sign=1``) or remove (``sign=-1``) one task; ``latency`` is ``None`` while it is open."""
+        key = (owner, priority)
+        stats = self._groups.get(key)
+        if stats is None:
+            stats = self._groups[key] = GroupStats()
+        if latency is None:
+            stats.open += sign
+        else:
+            stats.completed += sign
+            stats.latency.add(latency, sign)
+        if not stats.total:
+            del self._groups[key]
+
+    def add(self, task: Task) -> None:
+        self.update(task.owner, task.priority, _latency(task), 1)
+
+    def remove(self, task: Task) -> None:
+        self.update(task.owner, task.priority, _latency(task), -1)
+
+    def summarize(
+        self, by: Sequence[str] = GROUP_FIELDS, *, owner: str | None = None, priority: str | None = None
+    ) -> List[Tuple[Tuple[str, ...], GroupStats]]:
+        """Merge groups down to the fields in ``by`` (possibly none), sorted by key."""
+        for name in by:
+            if name not in GROUP_FIELDS:
+                raise ValueError(f"Cannot group by {name!r}; choose from {', '.join(GROUP_FIELDS)}")
+        positions = [GROUP_FIELDS.index(name) for name in by]
+        merged: Dict[Tuple[str, ...], GroupStats] = {}
+        for key, stats in self._groups.items():
+            if owner is not None and key[0] != owner:
+                continue
+            if priority is not None and key[1] != priority.lower():
+                continue
+            target = tuple(key[position] for position in positions)
+            if target not in merged:
+                merged[target] = GroupStats()
+            merged[target].merge(stats)
+        return sorted(merged.items())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": _VERSION,
+            "groups": [
+                {
+                    "owner": owner,
+                    "priority": priority,
+                    "open": stats.open,
+                    "completed": stats.completed,
+                    "latency": stats.latency.to_dict(),
+                }
+                for (owner, priority), stats in sorted(self._groups.items())
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "TaskAggregates":
+        if payload.get("version") != _VERSION:
+            raise ValueError("Unsupported aggregates version")
+        aggregates = cls()
+        for group in payload["groups"]:
+            aggregates._groups[(group["owner"], group["priority"])] = GroupStats(
+                group["open"], group["completed"], LatencyHistogram.from_dict(group["latency"])
+            )
+        return aggregates
+
+
+class AggregateStore:
+    """:class:`TaskAggregates` persisted as a JSON snapshot plus an append-only delta log.
+
+    A write appends one line listing the ``(owner, priority, sign, latency)``
+    contributions it adds and removes, so its cost does not depend on the
+    number of groups. Readers replay only the lines they have not seen yet.
+    Once the log outgrows the snapshot it is folded into a new snapshot of the
+    next generation; log lines from an older generation are ignored, which
+    keeps readers that race a compaction from counting a change twice.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._delta_path = path.with_name(path.name + ".delta")
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._file_lock = FileLock(path)
+        self._lock = RLock()
+        self._signature: Tuple[int, int, int] | None = None
+        self._offset = 0
+        self._generation = 0
+        self._aggregates = TaskAggregates()
+
+    @property
+    def exists(self) -> bool:
+        return self._path.exists()
+
+    def lock(self):
+        """Exclusive lock serializing aggregate writers (and the store writes they mirror)."""
+        return self._file_lock.acquire()
+
+    def _snapshot_signature(self) -> Tuple[int, int, int] | None:
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+    def _sync(self) -> None:
+        signature = self._snapshot_signature()
+        try:
+            delta_size = self._delta_path.stat().st_size
+        except FileNotFoundError:
+            delta_size = 0
+        if signature != self._signature or delta_size < self._offset:
+            self._load_snapshot()
+            self._signature = signature
+            self._offset = 0
+        if delta_size > self._offset:
+            with self._delta_path.open("rb") as fh:
+                fh.seek(self._offset)
+                for line in fh:
+                    if not line.endswith(b"\n"):
+                        break
+                    record = json.loads(line)
+                    if record["generation"] == self._generation:
+                        self._replay(record["changes"])
+                    self._offset += len(line)
+
+    def _load_snapshot(self) -> None:
+        try:
+            payload = json.loads(self._path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            self._aggregates, self._generation = TaskAggregates(), 0
+            return
+        self._aggregates = TaskAggregates.from_dict(payload)
+        self._generation = payload["generation"]
+
+    def _replay(self, changes: List[list]) -> None:
+        for owner, priority, sign, latency in changes:
+            self._aggregates.update(owner, priority, latency, sign)
+
+    def _write_snapshot(self, aggregates: TaskAggregates) -> None:
+        generation = self._generation + 1
+        atomic_write_text(
+            self._path, json.dumps({"generation": generation, **aggregates.to_dict()}, separators=(",", ":"))
+        )
+        self._delta_path.write_bytes(b"")
+        self._aggregates, self._generation = aggregates, generation
+        self._signature = self._snapshot_signature()
+        self._offset = 0
+
+    def load(self) -> TaskAggregates:
+        """Current aggregates; treat the result as read-only."""
+        with self._lock:
+            self._sync()
+            return self._aggregates
+
+    def apply(self, removed: Iterable[Task], added: Iterable[Task]) -> None:
+        """Subtract the ``removed`` task states, add the ``added`` ones and persist."""
+        changes = [[task.owner, task.priority, -1, _latency(task)] for task in removed]
+        changes.extend([task.owner, task.priority, 1, _latency(task)] for task in added)
+        if not changes:
+            return
+        with self.lock(), self._lock, metrics.timer("aggregates.apply"):
+            self._sync()
+            record = {"generation": self._generation, "changes": changes}
+            payload = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+            with self._delta_path.open("ab") as fh:
+                fh.write(payload)
+            self._replay(changes)
+            self._offset += len(payload)
+            snapshot_size = self._signature[2] if self._signature else 0
+            if self._offset > max(_MIN_COMPACT_BYTES, snapshot_size):
+                self._write_snapshot(self._aggregates)
+
+    def rebuild(self, tasks: Iterable[Task]) -> TaskAggregates:
+        """Recompute the aggregates from ``tasks`` and persist them."""
+        with self.lock(), self._lock:
+            self._sync()
+            self._write_snapshot(TaskAggregates.from_tasks(tasks))
+            return self._aggregates
+
+
+class AggregatingRepository(DelegatingRepository):
+    """Wrap ``backing`` so ``store`` follows every save, delete and replace.
+
+    Writes read the stored version of each task first so that its old
+    contribution can be subtracted. The aggregate lock is held across each store
+    write and its aggregate update. Missing aggregates are built from
+    ``backing`` on construction.
+
+    Archived tasks keep counting: archiving moves tasks below this wrapper
+    rather than deleting them through it.
+    """
+
+    def __init__(self, backing: TaskRepository, store: AggregateStore):
+        super().__init__(backing)
+        self._store = store
+        if not store.exists:
+            with store.lock():
+                if not store.exists:
+                    store.rebuild(backing.iter_tasks())
+
+    @property
+    def store(self) -> AggregateStore:
+        return self._store
+
+    def _stored(self, identifiers: List[str]) -> List[Task]:
+        return self._backing.get_many(identifiers, missing_ok=True)
+
+    def save(self, task: Task) -> Task:
+        self.save_many([task])
+        return task
+
+    def save_many(self, tasks: Iterable[Task]) -> List[Task]:
+        tasks = list(tasks)
+        # The last of several saves of one identifier is the one that sticks.
+        latest = list({task.identifier: task for task in tasks}.values())
+        with self._store.lock():
+            previous = self._stored([task.identifier for task in latest])
+            self._backing.save_many(tasks)
+            self._store.apply(previous, latest)
+        return tasks
+
+    def delete(self, identifier: str) -> None:
+        self.delete_many([identifier])
+
+    def delete_many(self, identifiers: Iterable[str]) -> None:
+        identifiers = list(dict.fromkeys(identifiers))
+        with self._store.lock():
+            previous = self._stored(identifiers)
+            self._backing.delete_many(identifiers)
+            self._store.apply(previous, [])
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        tasks = list(tasks)
+        with self._store.lock():
+            self._backing.replace_all(tasks)
+            self._store.rebuild({task.identifier: task for task in tasks}.values())
+
+    def purge(self) -> int:
+        with self._store.lock():
+            count = self._backing.purge()
+            self._store.rebuild([])
+        return count
+
+    def replace_batches(self, batches: Iterable[List[Task]]) -> int:
+        with self._store.lock():
+            count = self._backing.replace_batches(batches)
+            self._store.rebuild(self._backing.iter_tasks())
+        return count
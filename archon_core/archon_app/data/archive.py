@@ -0,0 +1,313 @@
+"""Compressed, immutable cold storage for completed tasks."""
+from __future__ import annotations
+
+from bisect import bisect_right
+from datetime import datetime, timezone
+import gzip
+import json
+import logging
+from pathlib import Path
+from threading import Event, Lock, Thread
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from ..utils.fileio import atomic_write_bytes, atomic_write_text
+from .models import Task
+from .repository import DelegatingRepository, TaskRepository
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SIZE = 512
+_SEGMENT_SUFFIX = ".seg.gz"
+_INDEX_SUFFIX = ".idx.json"
+_TOMBSTONE_SUFFIX = ".del.json"
+_CLEAR_SUFFIX = ".clear"
+_INDEX_VERSION = 1
+
+
+def _as_utc(value: datetime) -> datetime:
+    # Naive timestamps are stored as UTC throughout the package.
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _written_ns(name: str) -> int:
+    # Segment and tombstone names end in the hex ``time_ns`` at which they were written.
+    return int(name.rsplit(".", 1)[-1], 16)
+
+
+def _bucket(task: Task) -> str:
+    assert task.completed_at is not None
+    return _as_utc(task.completed_at).strftime("%Y-%m")
+
+
+class TaskArchive:
+    """Directory of archive segments, one or more per month of completion.
+
+    A segment holds tasks sorted by identifier in gzip members of
+    ``BLOCK_SIZE`` JSON lines each; the concatenation is itself a valid gzip
+    file. Its index, written after the segment and therefore marking it as
+    complete, records the first identifier and byte range of every block, so a
+    lookup decompresses at most one block per segment. Segments are never
+    modified once written.
+
+    Deleting archived tasks writes a tombstone file instead, listing the
+    identifiers; it hides them in every segment written before it, so a task
+    archived again later under the same identifier is visible again. Clearing
+    the archive writes an empty marker that hides every earlier segment.
+    """
+
+    def __init__(self, directory: Path):
+        self._directory = directory
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._lock = Lock()
+        self._indexes: List[Dict[str, Any]] = []
+        self._tombstones: Dict[str, int] = {}
+        self._signature: Tuple[int, int] | None = None
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """Indexes of all complete segments, newest first."""
+        return self._load()[0]
+
+    def _load(self) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        with self._lock:
+            stat = self._directory.stat()
+            signature = (stat.st_mtime_ns, stat.st_ino)
+            if signature != self._signature:
+                markers = self._directory.glob(f"*{_CLEAR_SUFFIX}")
+                cleared_ns = max((_written_ns(path.name[: -len(_CLEAR_SUFFIX)]) for path in markers), default=0)
+                indexes = []
+                for path in self._directory.glob(f"*{_INDEX_SUFFIX}"):
+                    name = path.name[: -len(_INDEX_SUFFIX)]
+                    if _written_ns(name) < cleared_ns:
+                        continue
+                    index = json.loads(path.read_text(encoding="utf-8"))
+                    index["name"] = name
+                    indexes.append(index)
+                indexes.sort(key=lambda index: index["name"], reverse=True)
+                tombstones: Dict[str, int] = {}
+                for path in self._directory.glob(f"*{_TOMBSTONE_SUFFIX}"):
+                    deleted_ns = _written_ns(path.name[: -len(_TOMBSTONE_SUFFIX)])
+                    for identifier in json.loads(path.read_text(encoding="utf-8")):
+                        tombstones[identifier] = max(deleted_ns, tombstones.get(identifier, 0))
+                self._indexes = indexes
+                self._tombstones = tombstones
+                self._signature = signature
+            return list(self._indexes), self._tombstones
+
+    def write(self, tasks: Iterable[Task]) -> List[str]:
+        """Store completed ``tasks`` in new segments, one per completion month."""
+        buckets: Dict[str, List[Task]] = {}
+        for task in tasks:
+            if task.completed_at is None:
+                raise ValueError(f"Task {task.identifier!r} is not completed")
+            buckets.setdefault(_bucket(task), []).append(task)
+        return [self._write_segment(bucket, members) for bucket, members in sorted(buckets.items())]
+
+    def _write_segment(self, bucket: str, tasks: List[Task]) -> str:
+        tasks.sort(key=lambda task: task.identifier)
+        payload = bytearray()
+        blocks = []
+        for start in range(0, len(tasks), BLOCK_SIZE):
+            chunk = tasks[start : start + BLOCK_SIZE]
+            text = "".join(json.dumps(task.to_dict(), separators=(",", ":")) + "\n" for task in chunk)
+            data = gzip.compress(text.encode("utf-8"), mtime=0)
+            blocks.append([chunk[0].identifier, len(payload), len(data)])
+            payload += data
+        completed = sorted(_as_utc(task.completed_at) for task in tasks if task.completed_at)
+        name = f"{bucket}.{time.time_ns():x}"
+        atomic_write_bytes(self._directory / f"{name}{_SEGMENT_SUFFIX}", bytes(payload))
+        index = {
+            "version": _INDEX_VERSION,
+            "bucket": bucket,
+            "count": len(tasks),
+            "completed_from": completed[0].isoformat(),
+            "completed_to": completed[-1].isoformat(),
+            "last_identifier": tasks[-1].identifier,
+            "blocks": blocks,
+        }
+        atomic_write_text(self._directory / f"{name}{_INDEX_SUFFIX}", json.dumps(index))
+        return name
+
+    def _read_block(self, name: str, offset: int, length: int) -> str:
+        with (self._directory / f"{name}{_SEGMENT_SUFFIX}").open("rb") as fh:
+            fh.seek(offset)
+            return gzip.decompress(fh.read(length)).decode("utf-8")
+
+    def get(self, identifier: str) -> Task:
+        needle = f'"identifier":{json.dumps(identifier)},'
+        indexes, tombstones = self._load()
+        deleted_ns = tombstones.get(identifier, 0)
+        for index in indexes:
+            blocks = index["blocks"]
+            if not blocks or identifier < blocks[0][0] or identifier > index["last_identifier"]:
+                continue
+            if _written_ns(index["name"]) < deleted_ns:
+                continue
+            position = bisect_right(blocks, identifier, key=lambda block: block[0]) - 1
+            _, offset, length = blocks[position]
+            text = self._read_block(index["name"], offset, length)
+            found = text.find(needle)
+            if found != -1:
+                start = text.rfind("\n", 0, found) + 1
+                return Task.from_dict(json.loads(text[start : text.index("\n", found)]))
+        raise KeyError(f"Task {identifier!r} not found")
+
+    def delete(self, identifiers: Iterable[str]) -> int:
+        """Hide the archived tasks among ``identifiers``; returns how many ids were tombstoned.
+
+        Only the identifier range of each segment is checked, so no block is
+        decompressed. An id that falls inside a range without being archived
+        costs a few tombstone bytes and hides nothing.
+        """
+        ranges = [(index["blocks"][0][0], index["last_identifier"]) for index in self.segments() if index["blocks"]]
+        candidates = [
+            identifier
+            for identifier in dict.fromkeys(identifiers)
+            if any(first <= identifier <= last for first, last in ranges)
+        ]
+        if candidates:
+            path = self._directory / f"{time.time_ns():x}{_TOMBSTONE_SUFFIX}"
+            atomic_write_text(path, json.dumps(candidates))
+        return len(candidates)
+
+    def clear(self) -> int:
+        """Hide every archived task and return how many distinct tasks that removed."""
+        identifiers = {task.identifier for task in self.iter_tasks()}
+        if identifiers:
+            (self._directory / f"{time.time_ns():x}{_CLEAR_SUFFIX}").touch()
+        return len(identifiers)
+
+    def iter_tasks(self) -> Iterator[Task]:
+        """Stream every archived task, segment by segment."""
+        indexes, tombstones = self._load()
+        for index in indexes:
+            written_ns = _written_ns(index["name"])
+            with gzip.open(self._directory / f"{index['name']}{_SEGMENT_SUFFIX}", "rt", encoding="utf-8") as fh:
+                for line in fh:
+                    task = Task.from_dict(json.loads(line))
+                    if tombstones.get(task.identifier, 0) <= written_ns:
+                        yield task
+
+
+def with_archived(tasks: Iterable[Task], archive: TaskArchive) -> Iterator[Task]:
+    """Yield ``tasks``, then every archived task not among them (the hot copy wins)."""
+    seen = set()
+    for task in tasks:
+        seen.add(task.identifier)
+        yield task
+    for task in archive.iter_tasks():
+        if task.identifier not in seen:
+            seen.add(task.identifier)
+            yield task
+
+
+class ArchiveTaskRepository(DelegatingRepository):
+    """Wrap ``backing`` (the hot store) so lookups by identifier fall back to ``archive``.
+
+    Archived tasks are read-only: they are returned by ``get``/``get_many`` but
+    not by listings, counts or filters, which only cover the hot store.
+    Deleting a task removes it from both, and replacing or purging the store
+    also clears the archive. Wrappers above this one see archived tasks through
+    ``get_many`` but never see the move itself, which goes straight to ``backing``.
+    """
+
+    def __init__(self, backing: TaskRepository, archive: TaskArchive):
+        super().__init__(backing)
+        self._archive = archive
+
+    @property
+    def archive(self) -> TaskArchive:
+        return self._archive
+
+    def archive_completed(self, cutoff: datetime) -> int:
+        """Move tasks completed before ``cutoff`` into the archive and return how many moved.
+
+        Segments are written before the tasks leave the hot store, so a crash in
+        between leaves duplicates (the hot copy wins) rather than losing tasks.
+        """
+        cutoff = _as_utc(cutoff)
+        tasks = [
+            task
+            for task in self._backing.iter_tasks(completed=True)
+            if task.completed_at is not None and _as_utc(task.completed_at) < cutoff
+        ]
+        if not tasks:
+            return 0
+        self._archive.write(tasks)
+        self._backing.delete_many(task.identifier for task in tasks)
+        return len(tasks)
+
+    def get(self, identifier: str) -> Task:
+        try:
+            return self._backing.get(identifier)
+        except KeyError:
+            return self._archive.get(identifier)
+
+    def get_many(self, identifiers: Iterable[str], *, missing_ok: bool = False) -> List[Task]:
+        identifiers = list(identifiers)
+        hot = {task.identifier: task for task in self._backing.get_many(identifiers, missing_ok=True)}
+        found = []
+        for identifier in identifiers:
+            task = hot.get(identifier)
+            if task is None:
+                try:
+                    task = hot[identifier] = self._archive.get(identifier)
+                except KeyError:
+                    if missing_ok:
+                        continue
+                    raise
+            # Repeated identifiers get independent copies, like the backends.
+            found.append(task.copy())
+        return found
+
+    def delete(self, identifier: str) -> None:
+        self.delete_many([identifier])
+
+    def delete_many(self, identifiers: Iterable[str]) -> None:
+        identifiers = list(identifiers)
+        self._backing.delete_many(identifiers)
+        self._archive.delete(identifiers)
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        self._backing.replace_all(tasks)
+        self._archive.clear()
+
+    def replace_batches(self, batches: Iterable[List[Task]]) -> int:
+        count = self._backing.replace_batches(batches)
+        self._archive.clear()
+        return count
+
+    def purge(self) -> int:
+        return self._backing.purge() + self._archive.clear()
+
+
+class ArchiveScheduler:
+    """Call ``run`` every ``interval`` seconds on a daemon thread until stopped."""
+
+    def __init__(self, run: Callable[[], int], interval: float):
+        self._run = run
+        self._interval = interval
+        self._stop = Event()
+        self._thread = Thread(target=self._loop, name="archon-archiver", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self._interval):
+            try:
+                moved = self._run()
+            except Exception:
+                logger.exception("Background archival failed")
+            else:
+                if moved:
+                    logger.info("Archived %d completed tasks", moved)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
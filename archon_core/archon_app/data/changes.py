@@ -0,0 +1,269 @@
+"""Sequenced feed of task mutations for incremental consumers."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import islice
+import json
+import os
+from pathlib import Path
+from threading import Event
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from ..utils.fileio import FileLock, atomic_write_text
+from .models import Task
+from .repository import DelegatingRepository, TaskRepository
+
+_TAIL_BYTES = 64 * 1024
+_SCAN_WINDOW = 16 * 1024
+_REPLACE_CHUNK = 10000
+
+
+@dataclass(slots=True)
+class Change:
+    """One mutation: ``upsert`` carries the stored task, ``delete`` only its id.
+
+    ``reset`` marks a ``replace_all``; the upserts of the new contents follow it.
+    """
+
+    seq: int
+    op: str
+    identifier: str | None
+    at: str
+    task: Dict[str, Any] | None = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {"seq": self.seq, "op": self.op, "id": self.identifier, "at": self.at}
+        if self.task is not None:
+            payload["task"] = self.task
+        return payload
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "Change":
+        return cls(payload["seq"], payload["op"], payload.get("id"), payload["at"], payload.get("task"))
+
+
+def _end_of_last_line(fh, size: int) -> int:
+    """Offset just past the last newline within the first ``size`` bytes (0 if none)."""
+    window = _TAIL_BYTES
+    while True:
+        start = max(0, size - window)
+        fh.seek(start)
+        found = fh.read(size - start).rfind(b"\n")
+        if found != -1:
+            return start + found + 1
+        if start == 0:
+            return 0
+        window *= 4
+
+
+class ChangeFeed:
+    """Append-only JSON-lines log of changes with gap-free, increasing sequence numbers.
+
+    Sequence numbers are allocated under an exclusive ``flock``, so they stay
+    monotonic across processes. Readers locate ``since`` by binary search over
+    byte offsets (records are ordered by ``seq``) and ignore a torn last line.
+    """
+
+    def __init__(self, path: Path, fsync: bool = False):
+        self._path = path
+        self._fsync = fsync
+        self._lock = FileLock(path)
+        self._last: Tuple[int, int] = (0, 0)  # (file size, last seq) seen by this process
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._path.touch(exist_ok=True)
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def lock(self):
+        """Exclusive lock that keeps other writers from interleaving their changes."""
+        return self._lock.acquire()
+
+    def last_seq(self) -> int:
+        size = self._path.stat().st_size
+        if size != self._last[0]:
+            with self._path.open("rb") as fh:
+                end = _end_of_last_line(fh, size)
+                start = _end_of_last_line(fh, end - 1) if end else 0
+                fh.seek(start)
+                line = fh.read(end - start)
+            self._last = (size, json.loads(line)["seq"] if line else 0)
+        return self._last[1]
+
+    def append(self, records: Iterable[Tuple[str, Optional[str], Optional[Dict[str, Any]]]]) -> int:
+        """Append ``(op, identifier, task)`` records and return the last sequence number."""
+        with self._lock.acquire():
+            self._repair()
+            seq = self.last_seq()
+            at = datetime.now(timezone.utc).isoformat()
+            lines = []
+            for op, identifier, task in records:
+                seq += 1
+                lines.append(json.dumps(Change(seq, op, identifier, at, task).to_dict(), separators=(",", ":")))
+            if not lines:
+                return seq
+            payload = ("\n".join(lines) + "\n").encode("utf-8")
+            with self._path.open("ab") as fh:
+                fh.write(payload)
+                fh.flush()
+                if self._fsync:
+                    os.fsync(fh.fileno())
+                size = fh.tell()
+            self._last = (size, seq)
+            return seq
+
+    def _repair(self) -> None:
+        # Drop a line torn by a crashed writer so the next record starts cleanly.
+        size = self._path.stat().st_size
+        with self._path.open("rb+") as fh:
+            end = _end_of_last_line(fh, size)
+            if end != size:
+                fh.truncate(end)
+
+    def _offset_after(self, fh, since: int) -> int:
+        """Byte offset of the first record with ``seq > since``."""
+        lo, hi = 0, self._path.stat().st_size
+        while hi - lo > _SCAN_WINDOW:
+            mid = (lo + hi) // 2
+            fh.seek(mid)
+            fh.readline()
+            start = fh.tell()
+            line = fh.readline()
+            if not line.endswith(b"\n") or start >= hi:
+                hi = mid
+            elif json.loads(line)["seq"] <= since:
+                lo = start + len(line)
+            else:
+                hi = start
+        fh.seek(lo)
+        while True:
+            line = fh.readline()
+            if not line.endswith(b"\n") or json.loads(line)["seq"] > since:
+                return lo
+            lo += len(line)
+
+    def read(self, since: int = 0, limit: int | None = None) -> Iterator[Change]:
+        """Yield changes with ``seq > since`` in order, at most ``limit`` of them."""
+        with self._path.open("rb") as fh:
+            fh.seek(self._offset_after(fh, since))
+            count = 0
+            for line in fh:
+                if limit is not None and count >= limit:
+                    return
+                if not line.endswith(b"\n"):
+                    return
+                yield Change.from_dict(json.loads(line))
+                count += 1
+
+    def follow(self, since: int = 0, interval: float = 1.0, stop: Event | None = None) -> Iterator[Change]:
+        """Yield changes after ``since`` as they are appended, polling every ``interval`` seconds."""
+        stop = stop or Event()
+        while not stop.is_set():
+            for change in self.read(since):
+                since = change.seq
+                yield change
+            stop.wait(interval)
+
+
+@dataclass(slots=True)
+class Delta:
+    """Net effect of a run of changes.
+
+    After a ``reset`` every task not in ``tasks`` is gone, not only ``deleted``.
+    """
+
+    tasks: Dict[str, Task] = field(default_factory=dict)
+    deleted: Set[str] = field(default_factory=set)
+    reset: bool = False
+    last_seq: int = 0
+
+
+def collapse(changes: Iterable[Change], since: int = 0) -> Delta:
+    """Reduce ``changes`` to the latest state of every task they touch."""
+    delta = Delta(last_seq=since)
+    for change in changes:
+        delta.last_seq = change.seq
+        if change.op == "upsert" and change.task is not None and change.identifier is not None:
+            delta.tasks[change.identifier] = Task.from_dict(change.task)
+            delta.deleted.discard(change.identifier)
+        elif change.op == "delete" and change.identifier is not None:
+            delta.tasks.pop(change.identifier, None)
+            delta.deleted.add(change.identifier)
+        elif change.op == "reset":
+            delta.tasks.clear()
+            delta.deleted.clear()
+            delta.reset = True
+    return delta
+
+
+def load_checkpoint(path: Path) -> int:
+    try:
+        return int(json.loads(path.read_text(encoding="utf-8"))["seq"])
+    except FileNotFoundError:
+        return 0
+
+
+def save_checkpoint(path: Path, seq: int) -> None:
+    atomic_write_text(path, json.dumps({"seq": seq}))
+
+
+class ChangeTrackingRepository(DelegatingRepository):
+    """Wrap ``backing`` so every successful mutation is appended to ``feed``.
+
+    The feed lock is held across the write and its record, so the feed order
+    matches the order in which writes reached the store, even across processes.
+    """
+
+    def __init__(self, backing: TaskRepository, feed: ChangeFeed):
+        super().__init__(backing)
+        self._feed = feed
+
+    @property
+    def feed(self) -> ChangeFeed:
+        return self._feed
+
+    def save(self, task: Task) -> Task:
+        self.save_many([task])
+        return task
+
+    def save_many(self, tasks: Iterable[Task]) -> List[Task]:
+        tasks = list(tasks)
+        with self._feed.lock():
+            self._backing.save_many(tasks)
+            self._feed.append(("upsert", task.identifier, task.to_dict()) for task in tasks)
+        return tasks
+
+    def delete(self, identifier: str) -> None:
+        self.delete_many([identifier])
+
+    def delete_many(self, identifiers: Iterable[str]) -> None:
+        identifiers = list(dict.fromkeys(identifiers))
+        with self._feed.lock():
+            self._backing.delete_many(identifiers)
+            self._feed.append(("delete", identifier, None) for identifier in identifiers)
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        tasks = list(tasks)
+        with self._feed.lock():
+            self._backing.replace_all(tasks)
+            self._feed.append(
+                [("reset", None, None), *(("upsert", task.identifier, task.to_dict()) for task in tasks)]
+            )
+
+    def purge(self) -> int:
+        with self._feed.lock():
+            count = self._backing.purge()
+            self._feed.append([("reset", None, None)])
+        return count
+
+    def replace_batches(self, batches: Iterable[List[Task]]) -> int:
+        with self._feed.lock():
+            count = self._backing.replace_batches(batches)
+            self._feed.append([("reset", None, None)])
+            # Record the new contents a slice at a time rather than all in one list.
+            tasks = self._backing.iter_tasks()
+            while chunk := list(islice(tasks, _REPLACE_CHUNK)):
+                self._feed.append(("upsert", task.identifier, task.to_dict()) for task in chunk)
+        return count
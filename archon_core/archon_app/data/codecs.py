@@ -0,0 +1,166 @@
+"""On-disk encodings for task collections."""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+import gc
+import json
+import marshal
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from .models import PRIORITY_CODES, PRIORITY_NAMES, Task, deserialize_tasks, serialize_tasks
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_JSONL_HEADER = b'{"format":"archon-jsonl","version":1}\n'
+_BINARY_MAGIC = b"ARCHONT\x01"
+
+Row = Tuple[str, str, str, int, str, int, "int | None", "str | None", int]
+
+
+def to_epoch_us(value: datetime) -> int:
+    """Return ``value`` as integer microseconds since the Unix epoch (naive means UTC)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_epoch_us(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+def task_to_row(task: Task) -> Row:
+    return (
+        task.identifier,
+        task.title,
+        task.owner,
+        PRIORITY_CODES[task.priority],
+        task.description,
+        to_epoch_us(task.created_at),
+        to_epoch_us(task.completed_at) if task.completed_at else None,
+        task.completion_token,
+        task.version,
+    )
+
+
+@contextmanager
+def _gc_paused() -> Iterator[None]:
+    """Suspend the cyclic collector while building many acyclic objects.
+
+    Allocating hundreds of thousands of tasks otherwise triggers repeated full
+    collections that can cost as much as the decoding itself.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def tasks_from_rows(rows: Iterable[Row]) -> List[Task]:
+    # Rows must come from ``task_to_row`` (validated tasks); they are not re-checked.
+    trusted = Task.trusted
+    epoch = _EPOCH
+    micro = timedelta(microseconds=1)
+    with _gc_paused():
+        return [
+            trusted(
+                identifier,
+                title,
+                owner,
+                PRIORITY_NAMES[priority],
+                description,
+                epoch + created * micro,
+                epoch + completed * micro if completed is not None else None,
+                token,
+                version,
+            )
+            for identifier, title, owner, priority, description, created, completed, token, version in rows
+        ]
+
+
+class TaskCodec:
+    """Encode and decode a whole task collection."""
+
+    name = ""
+
+    def encode(self, tasks: Iterable[Task]) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, payload: bytes) -> List[Task]:
+        raise NotImplementedError
+
+
+class JsonCodec(TaskCodec):
+    """Pretty-printed JSON array of task objects (the original format)."""
+
+    name = "json"
+
+    def encode(self, tasks: Iterable[Task]) -> bytes:
+        return json.dumps(serialize_tasks(tasks), indent=2).encode("utf-8")
+
+    def decode(self, payload: bytes) -> List[Task]:
+        return deserialize_tasks(json.loads(payload or b"[]"))
+
+
+class JsonLinesCodec(TaskCodec):
+    """A header line followed by one compact positional JSON row per task.
+
+    Rows store timestamps as epoch microseconds and the priority as its code.
+    """
+
+    name = "jsonl"
+
+    def encode(self, tasks: Iterable[Task]) -> bytes:
+        dumps = json.JSONEncoder(separators=(",", ":")).encode
+        lines = [_JSONL_HEADER]
+        lines.extend((dumps(task_to_row(task)) + "\n").encode("utf-8") for task in tasks)
+        return b"".join(lines)
+
+    def decode(self, payload: bytes) -> List[Task]:
+        body = payload[len(_JSONL_HEADER):].strip()
+        if not body:
+            return []
+        # Parse every row with a single C-level call instead of one per line.
+        with _gc_paused():
+            rows = json.loads(b"[" + body.replace(b"\n", b",") + b"]")
+        return tasks_from_rows(rows)
+
+
+class BinaryCodec(TaskCodec):
+    """``marshal``-encoded list of positional rows behind a magic header.
+
+    ``marshal`` only handles plain Python values and never runs code on load, but
+    its format is tied to the interpreter; this is a local cache-friendly store,
+    not an interchange format (use ``export`` for that).
+    """
+
+    name = "binary"
+
+    def encode(self, tasks: Iterable[Task]) -> bytes:
+        return _BINARY_MAGIC + marshal.dumps([task_to_row(task) for task in tasks])
+
+    def decode(self, payload: bytes) -> List[Task]:
+        with _gc_paused():
+            rows = marshal.loads(payload[len(_BINARY_MAGIC):])
+        return tasks_from_rows(rows)
+
+
+CODECS: Dict[str, TaskCodec] = {codec.name: codec for codec in (JsonCodec(), JsonLinesCodec(), BinaryCodec())}
+
+
+def get_codec(name: str) -> TaskCodec:
+    try:
+        return CODECS[name.lower()]
+    except KeyError:
+        raise ValueError(f"Unsupported storage format: {name!r}") from None
+
+
+def detect_codec(payload: bytes) -> TaskCodec:
+    """Identify the codec that wrote ``payload``."""
+    if payload.startswith(_BINARY_MAGIC):
+        return CODECS["binary"]
+    if payload.startswith(_JSONL_HEADER):
+        return CODECS["jsonl"]
+    return CODECS["json"]
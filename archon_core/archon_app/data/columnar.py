@@ -0,0 +1,333 @@
+"""Compact column-oriented in-memory task store."""
+from __future__ import annotations
+
+from array import array
+from datetime import datetime
+import heapq
+import re
+from typing import Dict, Iterable, Iterator, List
+
+from ..utils import metrics
+from .codecs import from_epoch_us, to_epoch_us
+from .models import PRIORITY_CODES, PRIORITY_NAMES, Task
+from .repository import DelegatingRepository, TaskRepository, VersionConflictError
+
+_NO_COMPLETION = -(1 << 63)
+_BITS = tuple(tuple(bit for bit in range(8) if byte >> bit & 1) for byte in range(256))
+_NONZERO = re.compile(rb"[^\x00]")
+
+
+class _Bitmap:
+    """Growable bit set; converted to an ``int`` so filters combine with C-speed ``&``."""
+
+    __slots__ = ("_bytes",)
+
+    def __init__(self) -> None:
+        self._bytes = bytearray()
+
+    def set(self, row: int) -> None:
+        index = row >> 3
+        if index >= len(self._bytes):
+            self._bytes.extend(bytes(index + 1 - len(self._bytes)))
+        self._bytes[index] |= 1 << (row & 7)
+
+    def clear(self, row: int) -> None:
+        index = row >> 3
+        if index < len(self._bytes):
+            self._bytes[index] &= ~(1 << (row & 7)) & 0xFF
+
+    def as_int(self) -> int:
+        return int.from_bytes(self._bytes, "little")
+
+
+def _bits_to_rows(mask: int) -> List[int]:
+    """Ascending indexes of the set bits in ``mask``; zero bytes are skipped by the regex engine."""
+    data = mask.to_bytes((mask.bit_length() + 7) // 8, "little")
+    rows: List[int] = []
+    for match in _NONZERO.finditer(data):
+        base = match.start() << 3
+        rows.extend(base + bit for bit in _BITS[data[match.start()]])
+    return rows
+
+
+class TaskColumns:
+    """Tasks stored as parallel columns instead of one object per task.
+
+    Owners are interned into a dictionary and stored as ``uint32`` codes,
+    priority as a ``uint8`` code, timestamps as ``int64`` epoch microseconds,
+    and completion, liveness, each priority and each owner as bitmaps. Filters
+    and counts combine bitmaps with integer ``&``, and
+    :class:`Task` objects are only built for the rows actually returned.
+
+    Rows are append-only: an update or delete tombstones the old row, and the
+    store compacts itself once tombstones outnumber live rows.
+    """
+
+    def __init__(self, tasks: Iterable[Task] = ()):
+        self._reset()
+        self.upsert_many(tasks)
+
+    def _reset(self) -> None:
+        self._row_of: Dict[str, int] = {}
+        self._identifiers: List[str | None] = []
+        self._titles: List[str] = []
+        self._descriptions: List[str] = []
+        self._tokens: List[str | None] = []
+        self._owners: List[str] = []
+        self._owner_codes: Dict[str, int] = {}
+        self._by_owner: List[_Bitmap] = []
+        self._owner = array("I")
+        self._priority = array("B")
+        self._created = array("q")
+        self._completed = array("q")
+        self._version = array("q")
+        self._live = _Bitmap()
+        self._done = _Bitmap()
+        self._by_priority = [_Bitmap() for _ in PRIORITY_NAMES]
+
+    def __len__(self) -> int:
+        return len(self._row_of)
+
+    def __contains__(self, identifier: object) -> bool:
+        return identifier in self._row_of
+
+    def _owner_code(self, owner: str) -> int:
+        code = self._owner_codes.get(owner)
+        if code is None:
+            code = self._owner_codes[owner] = len(self._owners)
+            self._owners.append(owner)
+            self._by_owner.append(_Bitmap())
+        return code
+
+    def upsert(self, task: Task) -> None:
+        self._tombstone(task.identifier)
+        row = len(self._identifiers)
+        owner = self._owner_code(task.owner)
+        priority = PRIORITY_CODES[task.priority]
+        self._row_of[task.identifier] = row
+        self._identifiers.append(task.identifier)
+        self._titles.append(task.title)
+        self._descriptions.append(task.description)
+        self._tokens.append(task.completion_token)
+        self._owner.append(owner)
+        self._by_owner[owner].set(row)
+        self._priority.append(priority)
+        self._created.append(to_epoch_us(task.created_at))
+        self._completed.append(to_epoch_us(task.completed_at) if task.completed_at else _NO_COMPLETION)
+        self._version.append(task.version)
+        self._live.set(row)
+        self._by_priority[priority].set(row)
+        if task.completed_at is not None:
+            self._done.set(row)
+
+    def upsert_many(self, tasks: Iterable[Task]) -> None:
+        for task in tasks:
+            self.upsert(task)
+        self._maybe_compact()
+
+    def remove(self, identifier: str) -> bool:
+        removed = self._tombstone(identifier)
+        self._maybe_compact()
+        return removed
+
+    def _tombstone(self, identifier: str) -> bool:
+        row = self._row_of.pop(identifier, None)
+        if row is None:
+            return False
+        self._live.clear(row)
+        self._by_owner[self._owner[row]].clear(row)
+        # Drop the references so the strings can be freed before compaction.
+        self._identifiers[row] = None
+        self._titles[row] = self._descriptions[row] = ""
+        self._tokens[row] = None
+        return True
+
+    def _maybe_compact(self) -> None:
+        if len(self._identifiers) > 1024 and len(self._identifiers) > 2 * len(self._row_of):
+            live = [self._materialize(row) for row in sorted(self._row_of.values())]
+            self._reset()
+            for task in live:
+                self.upsert(task)
+
+    def _materialize(self, row: int) -> Task:
+        completed = self._completed[row]
+        return Task.trusted(
+            self._identifiers[row],
+            self._titles[row],
+            self._owners[self._owner[row]],
+            PRIORITY_NAMES[self._priority[row]],
+            self._descriptions[row],
+            from_epoch_us(self._created[row]),
+            from_epoch_us(completed) if completed != _NO_COMPLETION else None,
+            self._tokens[row],
+            self._version[row],
+        )
+
+    def get(self, identifier: str) -> Task:
+        row = self._row_of.get(identifier)
+        if row is None:
+            raise KeyError(f"Task {identifier!r} not found")
+        return self._materialize(row)
+
+    def _mask(self, owner: str | None, priority: str | None, completed: bool | None) -> int:
+        mask = self._live.as_int()
+        if priority is not None:
+            code = PRIORITY_CODES.get(priority.lower())
+            mask = 0 if code is None else mask & self._by_priority[code].as_int()
+        if completed is not None:
+            done = self._done.as_int()
+            mask = mask & done if completed else mask & ~done
+        if owner is not None and mask:
+            code = self._owner_codes.get(owner)
+            mask = 0 if code is None else mask & self._by_owner[code].as_int()
+        return mask
+
+    def count(self, *, owner: str | None = None, priority: str | None = None, completed: bool | None = None) -> int:
+        return self._mask(owner, priority, completed).bit_count()
+
+    def select(
+        self,
+        *,
+        owner: str | None = None,
+        priority: str | None = None,
+        completed: bool | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> List[Task]:
+        """Matching tasks in creation order; only the requested page is materialized."""
+        rows = _bits_to_rows(self._mask(owner, priority, completed))
+        rows.sort(key=self._created.__getitem__)
+        stop = None if limit is None else offset + limit
+        return [self._materialize(row) for row in rows[offset:stop]]
+
+    def created(
+        self,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        newest_first: bool = False,
+        limit: int | None = None,
+    ) -> List[Task]:
+        """Tasks created in ``[since, until)``, found by scanning the ``created_at`` column."""
+        created = self._created
+        low = -(1 << 63) if since is None else to_epoch_us(since)
+        high = (1 << 63) - 1 if until is None else to_epoch_us(until)
+        rows = [row for row in _bits_to_rows(self._live.as_int()) if low <= created[row] < high]
+        if limit is None:
+            rows.sort(key=created.__getitem__, reverse=newest_first)
+        else:
+            select = heapq.nlargest if newest_first else heapq.nsmallest
+            rows = select(limit, rows, key=created.__getitem__)
+        return [self._materialize(row) for row in rows]
+
+
+class ColumnarTaskRepository(DelegatingRepository):
+    """Keep ``backing``'s tasks in a :class:`TaskColumns` store and answer reads from it.
+
+    Meant for a long-lived process holding millions of tasks. Writes go to
+    ``backing`` first and are then applied to the columns. Changes made by other
+    processes are not seen until :meth:`refresh`, which also runs automatically
+    when a write hits a version conflict.
+    """
+
+    def __init__(self, backing: TaskRepository):
+        super().__init__(backing)
+        self._lock = metrics.tracked_lock("columnar.lock_wait")
+        self._columns = TaskColumns(backing.iter_tasks())
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._columns = TaskColumns(self._backing.iter_tasks())
+
+    def list(self) -> List[Task]:
+        with self._lock:
+            return self._columns.select()
+
+    def save(self, task: Task) -> Task:
+        self.save_many([task])
+        return task
+
+    def save_many(self, tasks: Iterable[Task]) -> List[Task]:
+        tasks = list(tasks)
+        with self._lock:
+            try:
+                self._backing.save_many(tasks)
+            except VersionConflictError:
+                self.refresh()
+                raise
+            self._columns.upsert_many(tasks)
+        return tasks
+
+    def get(self, identifier: str) -> Task:
+        with self._lock:
+            return self._columns.get(identifier)
+
+    def get_many(self, identifiers: Iterable[str], *, missing_ok: bool = False) -> List[Task]:
+        with self._lock:
+            if missing_ok:
+                return [self._columns.get(identifier) for identifier in identifiers if identifier in self._columns]
+            return [self._columns.get(identifier) for identifier in identifiers]
+
+    def delete(self, identifier: str) -> None:
+        self.delete_many([identifier])
+
+    def delete_many(self, identifiers: Iterable[str]) -> None:
+        identifiers = list(identifiers)
+        with self._lock:
+            self._backing.delete_many(identifiers)
+            for identifier in identifiers:
+                self._columns.remove(identifier)
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        tasks = list(tasks)
+        with self._lock:
+            self._backing.replace_all(tasks)
+            self._columns = TaskColumns(tasks)
+
+    def purge(self) -> int:
+        with self._lock:
+            count = self._backing.purge()
+            self._columns = TaskColumns()
+        return count
+
+    def replace_batches(self, batches: Iterable[List[Task]]) -> int:
+        with self._lock:
+            count = self._backing.replace_batches(batches)
+            self._columns = TaskColumns(self._backing.iter_tasks())
+        return count
+
+    def iter_tasks(
+        self,
+        *,
+        owner: str | None = None,
+        priority: str | None = None,
+        completed: bool | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
+        with self._lock:
+            page = self._columns.select(
+                owner=owner, priority=priority, completed=completed, offset=offset, limit=limit
+            )
+        return iter(page)
+
+    def iter_created(
+        self,
+        *,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        newest_first: bool = False,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
+        with self._lock:
+            page = self._columns.created(since, until, newest_first, limit)
+        return iter(page)
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._columns)
+
+    def count_matching(
+        self, *, owner: str | None = None, priority: str | None = None, completed: bool | None = None
+    ) -> int:
+        with self._lock:
+            return self._columns.count(owner=owner, priority=priority, completed=completed)
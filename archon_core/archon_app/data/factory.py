@@ -0,0 +1,71 @@
+"""Construction of task repositories from configuration."""
+from __future__ import annotations
+
+from pathlib import Path
+
+from ..config import AppConfig
+from .codecs import get_codec
+from .journal import JournalTaskRepository
+from .repository import FileTaskRepository, TaskRepository
+from .sharded import ShardedTaskRepository, is_sharded_store
+from .sqlite import SqliteTaskRepository
+
+_JOURNAL_SUFFIXES = {".jsonl", ".journal", ".log"}
+_SQLITE_SUFFIXES = {".db", ".sqlite", ".sqlite3"}
+
+
+def resolve_backend(path: Path, backend: str = "auto") -> str:
+    """Return the concrete backend name for ``path``."""
+    backend = backend.lower()
+    if backend != "auto":
+        return backend
+    if path.suffix.lower() in _JOURNAL_SUFFIXES:
+        return "journal"
+    if path.suffix.lower() in _SQLITE_SUFFIXES:
+        return "sqlite"
+    if path.is_dir() and is_sharded_store(path):
+        return "sharded"
+    return "json"
+
+
+def create_repository(config: AppConfig) -> TaskRepository:
+    """Instantiate the task repository selected by ``config``."""
+    repository = create_backend(config)
+    if config.database_columnar:
+        from .columnar import ColumnarTaskRepository
+
+        repository = ColumnarTaskRepository(repository)
+    if config.search["enabled"]:
+        from .search import SearchIndex, SearchIndexingRepository
+
+        repository = SearchIndexingRepository(repository, SearchIndex(Path(config.search["path"])))
+    if config.archive["enabled"]:
+        from .archive import ArchiveTaskRepository, TaskArchive
+
+        # Below the aggregates and the change feed: archiving moves tasks, so neither records it.
+        repository = ArchiveTaskRepository(repository, TaskArchive(Path(config.archive["path"])))
+    if config.aggregates["enabled"]:
+        from .aggregates import AggregateStore, AggregatingRepository
+
+        repository = AggregatingRepository(repository, AggregateStore(Path(config.aggregates["path"])))
+    if config.changes["enabled"]:
+        from .changes import ChangeFeed, ChangeTrackingRepository
+
+        repository = ChangeTrackingRepository(repository, ChangeFeed(Path(config.changes["path"])))
+    return repository
+
+
+def create_backend(config: AppConfig) -> TaskRepository:
+    """The bare storage backend selected by ``config``, without the optional wrappers."""
+    backend = resolve_backend(config.database_path, config.database_backend)
+    if backend == "json":
+        return FileTaskRepository(config.database_path, codec=get_codec(config.database_format))
+    if backend == "sharded":
+        return ShardedTaskRepository(
+            config.database_path, shards=config.database_shards, codec=get_codec(config.database_format)
+        )
+    if backend == "journal":
+        return JournalTaskRepository(config.database_path, compaction_threshold=config.compaction_threshold)
+    if backend == "sqlite":
+        return SqliteTaskRepository(config.database_path)
+    raise ValueError(f"Unsupported database backend: {backend!r}")
@@ -0,0 +1,81 @@
+"""Task identifier schemes."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+import secrets
+
+SCHEMES = ("random", "ulid")
+
+# Crockford's base32: no I, L, O or U, and digits sort before letters.
+_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+_DECODE = {char: value for value, char in enumerate(_ALPHABET)}
+_ULID_LENGTH = 26
+_TIME_CHARS = 10
+_RANDOM_BITS = 80
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+_scheme = "random"
+
+
+def set_scheme(scheme: str) -> None:
+    """Select the scheme used for new identifiers in this process."""
+    global _scheme
+    scheme = scheme.lower()
+    if scheme not in SCHEMES:
+        raise ValueError(f"Unsupported identifier scheme: {scheme!r}")
+    _scheme = scheme
+
+
+def get_scheme() -> str:
+    return _scheme
+
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, 32)
+        chars.append(_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def _epoch_ms(at: datetime) -> int:
+    if at.tzinfo is None:
+        at = at.replace(tzinfo=timezone.utc)
+    return (at - _EPOCH) // timedelta(milliseconds=1)
+
+
+def ulid(at: datetime) -> str:
+    """Return a ULID for creation time ``at``: 48 bits of epoch milliseconds, then 80 random bits.
+
+    ULIDs sort by ``at`` at millisecond resolution. The random part is drawn
+    fresh every time rather than incremented within a millisecond, so one
+    identifier reveals nothing about the next; tasks created in the same
+    millisecond therefore sort in no particular order.
+    """
+    return _encode(_epoch_ms(at), _TIME_CHARS) + _encode(secrets.randbits(_RANDOM_BITS), _ULID_LENGTH - _TIME_CHARS)
+
+
+def new_identifier(created_at: datetime) -> str:
+    """Identifier for a task created at ``created_at`` under the configured scheme."""
+    if _scheme == "ulid":
+        return ulid(created_at)
+    return secrets.token_urlsafe(12)
+
+
+def is_ulid(identifier: str) -> bool:
+    # Random identifiers are 16 characters long, so the two schemes never overlap.
+    return (
+        len(identifier) == _ULID_LENGTH
+        and identifier[0] <= "7"
+        and all(char in _DECODE for char in identifier)
+    )
+
+
+def identifier_time(identifier: str) -> datetime | None:
+    """Creation time (to the millisecond) embedded in a ULID, or ``None`` for other identifiers."""
+    if not is_ulid(identifier):
+        return None
+    milliseconds = 0
+    for char in identifier[:_TIME_CHARS]:
+        milliseconds = milliseconds * 32 + _DECODE[char]
+    return _EPOCH + timedelta(milliseconds=milliseconds)
@@ -0,0 +1,365 @@
+"""Append-only journal task repository."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from threading import Thread
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional
+
+from ..utils import metrics
+from ..utils.fileio import FileLock, atomic_write_bytes
+from .models import Task
+from .repository import TaskRepository, select_tasks, versioned_write
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPACTION_THRESHOLD = 8 * 1024 * 1024
+
+
+def _encode(record: dict) -> bytes:
+    return json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+class JournalTaskRepository(TaskRepository):
+    """Task repository that appends every mutation to a log file.
+
+    The live state is held in memory and rebuilt by replaying the log on start-up.
+    Each ``save``/``delete``/``purge`` appends a single record, and the log is
+    rewritten to the live set of tasks in a background thread once it grows past
+    ``compaction_threshold`` bytes (and at least twice its size after the previous
+    compaction), keeping the per-operation cost O(1) amortized.
+
+    Several processes may share one journal: appends hold an exclusive ``flock``
+    and every operation first replays records other processes have added.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        compaction_threshold: int = DEFAULT_COMPACTION_THRESHOLD,
+        background_compaction: bool = True,
+        fsync: bool = False,
+    ):
+        self._path = path
+        self._lock = metrics.tracked_lock("repository.lock_wait")
+        self._file_lock = FileLock(path)
+        self._tasks: Dict[str, Task] = {}
+        self._compaction_threshold = compaction_threshold
+        self._background = background_compaction
+        self._fsync = fsync
+        self._pending: Optional[List[bytes]] = None
+        self._compactor: Optional[Thread] = None
+        self._compacted_bytes = 0
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._fh: Optional[BinaryIO] = None
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, self._file_lock.acquire():
+            self._adopt_legacy_store()
+            self._sync(repair=True)
+
+    def _adopt_legacy_store(self) -> None:
+        if not self._path.exists():
+            self._path.touch()
+            return
+        with self._path.open("rb") as fh:
+            head = fh.read(64).lstrip()
+        if not head.startswith(b"["):
+            return
+        # A JSON array store written by FileTaskRepository: rewrite it as a journal.
+        records = json.loads(self._path.read_text(encoding="utf-8"))
+        payload = b"".join(_encode({"op": "upsert", "task": record}) for record in records)
+        atomic_write_bytes(self._path, payload)
+
+    def _sync(self, repair: bool = False) -> None:
+        """Apply records appended by other processes since the last call.
+
+        Must be called with the file lock held. A trailing partial record can only
+        be debris from a crashed writer; with ``repair`` (exclusive lock) it is cut off.
+        """
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            stat = None
+        inode = stat.st_ino if stat else None
+        size = stat.st_size if stat else 0
+        if inode != self._inode:
+            # The journal was compacted (or recreated) by another process.
+            self._tasks = {}
+            self._offset = 0
+            self._inode = inode
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+        if size > self._offset:
+            with self._path.open("rb") as fh:
+                fh.seek(self._offset)
+                chunk = fh.read(size - self._offset)
+            with metrics.timer("repository.read"):
+                consumed = self._replay(chunk)
+            metrics.inc("repository.bytes_read", len(chunk))
+            self._offset += consumed
+            if consumed < len(chunk) and repair:
+                logger.warning("Discarding incomplete trailing record in %s", self._path)
+                with self._path.open("r+b") as fh:
+                    fh.truncate(self._offset)
+
+    def _replay(self, chunk: bytes) -> int:
+        consumed = 0
+        lines = chunk.splitlines(keepends=True)
+        for index, line in enumerate(lines):
+            if not line.endswith(b"\n"):
+                break
+            if line.strip():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    if index != len(lines) - 1:
+                        raise ValueError(f"Corrupt journal record in {self._path} at byte {self._offset + consumed}")
+                    break
+                self._apply(record)
+                if self._pending is not None:
+                    self._pending.append(line)
+            consumed += len(line)
+        return consumed
+
+    def _apply(self, record: dict) -> None:
+        op = record.get("op")
+        if op == "upsert":
+            task = Task.from_dict(record["task"])
+            self._tasks[task.identifier] = task
+        elif op == "delete":
+            self._tasks.pop(record["identifier"], None)
+        elif op == "purge":
+            self._tasks.clear()
+        else:
+            raise ValueError(f"Unknown journal operation: {op!r}")
+
+    def _refresh(self) -> None:
+        """Catch up with other writers before a read, skipping the lock when nothing changed."""
+        try:
+            stat = os.stat(self._path)
+        except FileNotFoundError:
+            stat = None
+        if stat is not None and stat.st_ino == self._inode and stat.st_size == self._offset:
+            return
+        with self._file_lock.acquire(shared=True):
+            self._sync()
+
+    def _append(self, lines: List[bytes]) -> None:
+        """Append ``lines``; the exclusive file lock must be held and state synced."""
+        if self._fh is None:
+            self._fh = self._path.open("ab")
+        payload = b"".join(lines)
+        with metrics.timer("repository.write"):
+            self._fh.write(payload)
+            self._fh.flush()
+            if self._fsync:
+                os.fsync(self._fh.fileno())
+        metrics.inc("repository.bytes_written", len(payload))
+        self._offset += len(payload)
+        if self._pending is not None:
+            self._pending.extend(lines)
+
+    def _maybe_compact(self) -> None:
+        if self._pending is not None:
+            return
+        if self._offset < max(self._compaction_threshold, 2 * self._compacted_bytes):
+            return
+        snapshot = [task.to_dict() for task in self._tasks.values()]
+        self._pending = []
+        if self._background:
+            self._compactor = Thread(
+                target=self._compact, args=(snapshot, self._inode), name="archon-journal-compactor", daemon=True
+            )
+            self._compactor.start()
+        else:
+            self._compact(snapshot, self._inode)
+
+    def _compact(self, snapshot: List[dict], inode: Optional[int]) -> None:
+        # Unique name: other processes sharing the journal may compact concurrently.
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{self._path.name}.", suffix=".compact", dir=self._path.parent)
+        tmp_path = Path(tmp_name)
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for record in snapshot:
+                    fh.write(_encode({"op": "upsert", "task": record}))
+                with self._lock, self._file_lock.acquire():
+                    self._sync(repair=True)
+                    if self._inode != inode:
+                        # Someone else compacted meanwhile; our snapshot is obsolete.
+                        self._pending = None
+                        tmp_path.unlink(missing_ok=True)
+                        return
+                    # Records appended while the snapshot was being written.
+                    fh.writelines(self._pending or [])
+                    fh.flush()
+                    os.fsync(fh.fileno())
+                    os.replace(tmp_path, self._path)
+                    if self._fh is not None:
+                        self._fh.close()
+                        self._fh = None
+                    stat = os.stat(self._path)
+                    self._inode = stat.st_ino
+                    self._offset = stat.st_size
+                    self._compacted_bytes = stat.st_size
+                    self._pending = None
+        except Exception:  # pragma: no cover - the journal itself stays intact
+            logger.exception("Journal compaction of %s failed", self._path)
+            with self._lock:
+                self._pending = None
+            tmp_path.unlink(missing_ok=True)
+
+    def compact(self) -> None:
+        """Synchronously rewrite the journal to the live set of tasks."""
+        self._wait_for_compaction()
+        with self._lock:
+            with self._file_lock.acquire(shared=True):
+                self._sync()
+            snapshot = [task.to_dict() for task in self._tasks.values()]
+            self._pending = []
+            self._compact(snapshot, self._inode)
+
+    def _wait_for_compaction(self) -> None:
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+            self._compactor = None
+
+    def list(self) -> List[Task]:
+        with self._lock:
+            self._refresh()
+            return [task.copy() for task in self._tasks.values()]
+
+    def save(self, task: Task) -> Task:
+        self.save_many([task])
+        return task
+
+    def save_many(self, tasks: Iterable[Task]) -> List[Task]:
+        tasks = list(tasks)
+        with self._lock:
+            with self._file_lock.acquire():
+                self._sync(repair=True)
+                with versioned_write(self._tasks, tasks):
+                    self._append([_encode({"op": "upsert", "task": task.to_dict()}) for task in tasks])
+                for task in tasks:
+                    self._tasks[task.identifier] = task.copy()
+            self._maybe_compact()
+        return tasks
+
+    def get(self, identifier: str) -> Task:
+        with self._lock:
+            self._refresh()
+            try:
+                return self._tasks[identifier].copy()
+            except KeyError:
+                raise KeyError(f"Task {identifier!r} not found") from None
+
+    def get_many(self, identifiers: Iterable[str], *, missing_ok: bool = False) -> List[Task]:
+        with self._lock:
+            self._refresh()
+            found = []
+            for identifier in identifiers:
+                task = self._tasks.get(identifier)
+                if task is None:
+                    if missing_ok:
+                        continue
+                    raise KeyError(f"Task {identifier!r} not found")
+                found.append(task.copy())
+            return found
+
+    def delete(self, identifier: str) -> None:
+        self.delete_many([identifier])
+
+    def delete_many(self, identifiers: Iterable[str]) -> None:
+        identifiers = list(dict.fromkeys(identifiers))
+        with self._lock:
+            with self._file_lock.acquire():
+                self._sync(repair=True)
+                doomed = [identifier for identifier in identifiers if identifier in self._tasks]
+                if not doomed:
+                    return
+                self._append([_encode({"op": "delete", "identifier": identifier}) for identifier in doomed])
+                for identifier in doomed:
+                    del self._tasks[identifier]
+            self._maybe_compact()
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        tasks = [task.copy() for task in tasks]
+        with self._lock:
+            with self._file_lock.acquire():
+                self._sync(repair=True)
+                lines = [_encode({"op": "purge"})]
+                lines.extend(_encode({"op": "upsert", "task": task.to_dict()}) for task in tasks)
+                self._append(lines)
+                self._tasks = {task.identifier: task for task in tasks}
+            self._maybe_compact()
+
+    def replace_batches(self, batches: Iterable[List[Task]]) -> int:
+        """Write ``batches`` to a new journal next to this one and swap it in once all were read."""
+        fd, tmp_name = tempfile.mkstemp(prefix=f".{self._path.name}.", suffix=".replace", dir=self._path.parent)
+        tmp_path = Path(tmp_name)
+        count = 0
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for batch in batches:
+                    fh.writelines(_encode({"op": "upsert", "task": task.to_dict()}) for task in batch)
+                    count += len(batch)
+                fh.flush()
+                os.fsync(fh.fileno())
+            self._wait_for_compaction()
+            with self._lock, self._file_lock.acquire():
+                # A compaction still running elsewhere sees the new inode and discards its snapshot.
+                os.replace(tmp_path, self._path)
+                self._sync(repair=True)
+                self._compacted_bytes = self._offset
+        except BaseException:
+            tmp_path.unlink(missing_ok=True)
+            raise
+        return count
+
+    def iter_tasks(
+        self,
+        *,
+        owner: str | None = None,
+        priority: str | None = None,
+        completed: bool | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
+        with self._lock:
+            self._refresh()
+            page = select_tasks(
+                self._tasks.values(),
+                owner=owner,
+                priority=priority,
+                completed=completed,
+                offset=offset,
+                limit=limit,
+            )
+        return (task.copy() for task in page)
+
+    def count(self) -> int:
+        with self._lock:
+            self._refresh()
+            return len(self._tasks)
+
+    def purge(self) -> int:
+        with self._lock:
+            with self._file_lock.acquire():
+                self._sync(repair=True)
+                count = len(self._tasks)
+                self._append([_encode({"op": "purge"})])
+                self._tasks.clear()
+            self._maybe_compact()
+        return count
+
+    def close(self) -> None:
+        self._wait_for_compaction()
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
@@ -3,10 +3,14 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-import secrets
 from typing import Iterable, List
 
+from .identifiers import new_identifier
+
 _PRIORITY_LEVELS = {"low", "medium", "high"}
+# Stable integer codes for compact encodings; the index is the code.
+PRIORITY_NAMES = ("low", "medium", "high")
+PRIORITY_CODES = {name: code for code, name in enumerate(PRIORITY_NAMES)}
 
 
 def _validate_priority(priority: str) -> str:
@@ -16,10 +20,6 @@ def _validate_priority(priority: str) -> str:
     return normalized
 
 
-def _default_identifier() -> str:
-    return secrets.token_urlsafe(12)
-
-
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -32,19 +32,66 @@ class Task:
     owner: str
     priority: str
     description: str = ""
-    identifier: str = field(default_factory=_default_identifier)
+    # Left empty, an identifier is generated from ``created_at`` (see ``identifiers``).
+    identifier: str = ""
     created_at: datetime = field(default_factory=_utcnow)
     completed_at: datetime | None = None
     completion_token: str | None = None
+    version: int = 0
 
     def __post_init__(self) -> None:
         self.priority = _validate_priority(self.priority)
+        if not self.identifier:
+            self.identifier = new_identifier(self.created_at)
 
     @property
     def is_completed(self) -> bool:
         return self.completed_at is not None
 
-    def to_dict(self) -> dict[str, str | None]:
+    @classmethod
+    def trusted(
+        cls,
+        identifier: str,
+        title: str,
+        owner: str,
+        priority: str,
+        description: str,
+        created_at: datetime,
+        completed_at: datetime | None,
+        completion_token: str | None,
+        version: int,
+    ) -> "Task":
+        """Build a task from already-validated fields, skipping ``__post_init__``.
+
+        Only use this for records the application itself wrote.
+        """
+        task = object.__new__(cls)
+        task.identifier = identifier
+        task.title = title
+        task.owner = owner
+        task.priority = priority
+        task.description = description
+        task.created_at = created_at
+        task.completed_at = completed_at
+        task.completion_token = completion_token
+        task.version = version
+        return task
+
+    def copy(self) -> "Task":
+        """Return a shallow copy without re-running validation."""
+        return Task.trusted(
+            self.identifier,
+            self.title,
+            self.owner,
+            self.priority,
+            self.description,
+            self.created_at,
+            self.completed_at,
+            self.completion_token,
+            self.version,
+        )
+
+    def to_dict(self) -> dict[str, str | int | None]:
         return {
             "identifier": self.identifier,
             "title": self.title,
@@ -54,10 +101,11 @@ class Task:
             "created_at": self.created_at.isoformat(),
             "completed_at": self.completed_at.isoformat() if self.completed_at else None,
             "completion_token": self.completion_token,
+            "version": self.version,
         }
 
     @classmethod
-    def from_dict(cls, payload: dict[str, str | None]) -> "Task":
+    def from_dict(cls, payload: dict[str, str | int | None]) -> "Task":
         created_at = datetime.fromisoformat(str(payload["created_at"])) if payload.get("created_at") else _utcnow()
         completed_at = (
             datetime.fromisoformat(str(payload["completed_at"]))
@@ -65,7 +113,7 @@ class Task:
             else None
         )
         return cls(
-            identifier=str(payload.get("identifier", _default_identifier())),
+            identifier=str(payload.get("identifier") or ""),
             title=str(payload.get("title", "Untitled")),
             owner=str(payload.get("owner", "Unknown")),
             priority=str(payload.get("priority", "medium")),
@@ -73,12 +121,13 @@ class Task:
             created_at=created_at,
             completed_at=completed_at,
             completion_token=str(payload.get("completion_token")) if payload.get("completion_token") else None,
+            version=int(payload.get("version") or 0),
         )
 
 
-def serialize_tasks(tasks: Iterable[Task]) -> List[dict[str, str | None]]:
+def serialize_tasks(tasks: Iterable[Task]) -> List[dict[str, str | int | None]]:
     return [task.to_dict() for task in tasks]
 
 
-def deserialize_tasks(records: Iterable[dict[str, str | None]]) -> List[Task]:
+def deserialize_tasks(records: Iterable[dict[str, str | int | None]]) -> List[Task]:
     return [Task.from_dict(record) for record in records]
@@ -1,12 +1,113 @@
 """Task repository implementations."""
 from __future__ import annotations
 
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from threading import RLock
-from typing import Iterable, List
-import json
+from typing import Dict, Iterable, Iterator, List, Mapping, Tuple
 
-from .models import Task, deserialize_tasks, serialize_tasks
+from ..utils import metrics
+from ..utils.fileio import FileLock, atomic_write_bytes
+from .codecs import CODECS, TaskCodec, detect_codec, to_epoch_us
+from .models import Task
+
+
+class VersionConflictError(RuntimeError):
+    """Raised when a task was modified by someone else since it was read."""
+
+
+@contextmanager
+def versioned_write(current: Mapping[str, Task], tasks: Iterable[Task]) -> Iterator[None]:
+    """Check optimistic version counters and advance them around a write.
+
+    Every task must carry the version currently stored for its identifier (tasks
+    that are not stored yet are accepted as-is). If all tasks pass, each task's
+    ``version`` is incremented for the duration of the block and rolled back if
+    the write raises.
+    """
+    tasks = list(tasks)
+    for task in tasks:
+        stored = current.get(task.identifier)
+        if stored is not None and stored.version != task.version:
+            raise VersionConflictError(
+                f"Task {task.identifier!r} is at version {stored.version}, not {task.version}"
+            )
+    for task in tasks:
+        task.version += 1
+    try:
+        yield
+    except BaseException:
+        for task in tasks:
+            task.version -= 1
+        raise
+
+
+def _matches(task: Task, owner: str | None, priority: str | None, completed: bool | None) -> bool:
+    if owner is not None and task.owner != owner:
+        return False
+    if priority is not None and task.priority != priority.lower():
+        return False
+    if completed is not None and task.is_completed != completed:
+        return False
+    return True
+
+
+def select_tasks(
+    tasks: Iterable[Task],
+    *,
+    owner: str | None = None,
+    priority: str | None = None,
+    completed: bool | None = None,
+    offset: int = 0,
+    limit: int | None = None,
+) -> List[Task]:
+    """Filter ``tasks``, order them by creation time and apply ``offset``/``limit``."""
+    matching = sorted(
+        (task for task in tasks if _matches(task, owner, priority, completed)),
+        key=lambda t: t.created_at,
+    )
+    stop = None if limit is None else offset + limit
+    return matching[offset:stop]
+
+
+def _created_us(task: Task) -> int:
+    return to_epoch_us(task.created_at)
+
+
+class CreationIndex:
+    """Tasks sorted once by creation time, for listing without re-sorting and for range seeks."""
+
+    __slots__ = ("tasks", "_keys")
+
+    def __init__(self, tasks: Iterable[Task]):
+        self.tasks = sorted(tasks, key=_created_us)
+        self._keys = array("q", map(_created_us, self.tasks))
+
+    def select(
+        self,
+        *,
+        owner: str | None = None,
+        priority: str | None = None,
+        completed: bool | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> List[Task]:
+        """Same result as :func:`select_tasks`, stopping as soon as the page is full."""
+        matching = (task for task in self.tasks if _matches(task, owner, priority, completed))
+        return list(islice(matching, offset, None if limit is None else offset + limit))
+
+    def created(
+        self, since: datetime | None = None, until: datetime | None = None, newest_first: bool = False
+    ) -> Iterator[Task]:
+        """Tasks created in ``[since, until)``, located by binary search."""
+        start = 0 if since is None else bisect_left(self._keys, to_epoch_us(since))
+        stop = len(self.tasks) if until is None else bisect_left(self._keys, to_epoch_us(until))
+        if newest_first:
+            return (self.tasks[position] for position in range(stop - 1, start - 1, -1))
+        return islice(self.tasks, start, stop)
 
 
 class TaskRepository:
@@ -27,52 +128,346 @@ class TaskRepository:
     def replace_all(self, tasks: Iterable[Task]) -> None:
         raise NotImplementedError
 
+    def replace_batches(self, batches: Iterable[List[Task]]) -> int:
+        """Replace every task with those in ``batches`` and return how many were read.
+
+        All or nothing: if reading a batch raises, the stored tasks are left
+        untouched. Backends that do not keep the whole store in memory override
+        this to stage the batches on disk and swap them in at the end; the
+        default collects them and calls :meth:`replace_all`.
+        """
+        tasks = [task for batch in batches for task in batch]
+        self.replace_all(tasks)
+        return len(tasks)
+
+    def save_many(self, tasks: Iterable[Task]) -> List[Task]:
+        """Persist several tasks; backends override this to commit them in one write."""
+        return [self.save(task) for task in tasks]
+
+    def get_many(self, identifiers: Iterable[str], *, missing_ok: bool = False) -> List[Task]:
+        """Return the tasks for ``identifiers`` in order.
+
+        Unknown ids raise ``KeyError``, or are skipped with ``missing_ok``.
+        """
+        found = []
+        for identifier in identifiers:
+            try:
+                found.append(self.get(identifier))
+            except KeyError:
+                if not missing_ok:
+                    raise
+        return found
+
+    def delete_many(self, identifiers: Iterable[str]) -> None:
+        for identifier in identifiers:
+            self.delete(identifier)
+
+    def iter_tasks(
+        self,
+        *,
+        owner: str | None = None,
+        priority: str | None = None,
+        completed: bool | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
+        """Yield tasks matching every given filter in creation order.
+
+        ``offset`` and ``limit`` page through the filtered result. Backends that
+        can stream from storage override this; the default sorts ``list()``.
+        """
+        return iter(
+            select_tasks(
+                self.list(), owner=owner, priority=priority, completed=completed, offset=offset, limit=limit
+            )
+        )
+
+    def iter_created(
+        self,
+        *,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        newest_first: bool = False,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
+        """Yield tasks created in ``[since, until)``, oldest first unless ``newest_first``.
+
+        The default orders a full scan; backends that keep tasks in creation
+        order override it to seek to the range instead.
+        """
+        return islice(CreationIndex(self.iter_tasks()).created(since, until, newest_first), limit)
+
+    def find(
+        self,
+        *,
+        owner: str | None = None,
+        priority: str | None = None,
+        completed: bool | None = None,
+    ) -> List[Task]:
+        """Return tasks matching every given filter, ordered by creation time."""
+        return list(self.iter_tasks(owner=owner, priority=priority, completed=completed))
+
+    def count(self) -> int:
+        return len(self.list())
+
+    def count_matching(
+        self, *, owner: str | None = None, priority: str | None = None, completed: bool | None = None
+    ) -> int:
+        """Count tasks matching every given filter."""
+        return sum(1 for _ in self.iter_tasks(owner=owner, priority=priority, completed=completed))
+
+    def purge(self) -> int:
+        """Delete every task and return how many were deleted."""
+        count = self.count()
+        self.replace_all([])
+        return count
+
+    def archive_completed(self, cutoff: datetime) -> int:
+        """Move tasks completed before ``cutoff`` into cold storage and return how many moved.
+
+        Only repositories wrapped with an archive support this; the rest raise ``ValueError``.
+        """
+        raise ValueError("Archiving is disabled; set archive.enabled in the configuration")
+
+    def close(self) -> None:
+        """Release any resources held by the repository."""
+
+
+class DelegatingRepository(TaskRepository):
+    """Forward every operation to ``backing``; wrappers override only what they change."""
+
+    def __init__(self, backing: TaskRepository):
+        self._backing = backing
+
+    def list(self) -> List[Task]:
+        return self._backing.list()
+
+    def save(self, task: Task) -> Task:
+        return self._backing.save(task)
+
+    def save_many(self, tasks: Iterable[Task]) -> List[Task]:
+        return self._backing.save_many(tasks)
+
+    def get(self, identifier: str) -> Task:
+        return self._backing.get(identifier)
+
+    def get_many(self, identifiers: Iterable[str], *, missing_ok: bool = False) -> List[Task]:
+        return self._backing.get_many(identifiers, missing_ok=missing_ok)
+
+    def delete(self, identifier: str) -> None:
+        self._backing.delete(identifier)
+
+    def delete_many(self, identifiers: Iterable[str]) -> None:
+        self._backing.delete_many(identifiers)
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        self._backing.replace_all(tasks)
+
+    def replace_batches(self, batches: Iterable[List[Task]]) -> int:
+        return self._backing.replace_batches(batches)
+
+    def purge(self) -> int:
+        return self._backing.purge()
+
+    def iter_tasks(
+        self,
+        *,
+        owner: str | None = None,
+        priority: str | None = None,
+        completed: bool | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
+        return self._backing.iter_tasks(
+            owner=owner, priority=priority, completed=completed, offset=offset, limit=limit
+        )
+
+    def iter_created(
+        self,
+        *,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        newest_first: bool = False,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
+        return self._backing.iter_created(since=since, until=until, newest_first=newest_first, limit=limit)
+
+    def count(self) -> int:
+        return self._backing.count()
+
+    def count_matching(
+        self, *, owner: str | None = None, priority: str | None = None, completed: bool | None = None
+    ) -> int:
+        return self._backing.count_matching(owner=owner, priority=priority, completed=completed)
+
+    def archive_completed(self, cutoff: datetime) -> int:
+        return self._backing.archive_completed(cutoff)
+
+    def close(self) -> None:
+        self._backing.close()
+
 
 class FileTaskRepository(TaskRepository):
-    """File-backed task repository with thread-safe access."""
+    """File-backed task repository safe for concurrent threads and processes.
+
+    Deserialized tasks are kept in an identity map indexed by ``identifier``
+    and only reloaded when the file's mtime, size or inode changes, so repeated
+    reads in a long-lived process skip JSON parsing entirely. Callers always
+    receive copies, never the cached instances.
 
-    def __init__(self, path: Path):
+    Writes hold an exclusive ``flock`` only while the file is re-checked and
+    atomically replaced, and ``save`` rejects stale tasks through their version
+    counter instead of serializing whole read-modify-write cycles.
+
+    ``codec`` selects the encoding used for writes; reads detect the encoding of
+    the file on disk, so changing it migrates the store on the next write.
+    """
+
+    def __init__(self, path: Path, codec: TaskCodec | None = None):
         self._path = path
-        self._lock = RLock()
+        self._codec = codec or CODECS["json"]
+        self._lock = metrics.tracked_lock("repository.lock_wait")
+        self._file_lock = FileLock(path)
+        self._cache: Dict[str, Task] | None = None
+        self._cache_signature: Tuple[int, int, int] | None = None
+        self._index: CreationIndex | None = None
         self._path.parent.mkdir(parents=True, exist_ok=True)
         if not self._path.exists():
-            self._path.write_text("[]", encoding="utf-8")
+            with self._file_lock.acquire():
+                if not self._path.exists():
+                    atomic_write_bytes(self._path, self._codec.encode([]))
+
+    def _signature(self) -> Tuple[int, int, int] | None:
+        try:
+            stat = self._path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _load(self) -> Dict[str, Task]:
+        with self._lock:
+            signature = self._signature()
+            if self._cache is None or signature != self._cache_signature:
+                with metrics.timer("repository.read"):
+                    payload = self._path.read_bytes() if signature else b""
+                with metrics.timer("tasks.decode"):
+                    tasks = detect_codec(payload).decode(payload)
+                metrics.inc("repository.bytes_read", len(payload))
+                metrics.inc("tasks.decoded", len(tasks))
+                self._cache = {task.identifier: task for task in tasks}
+                self._cache_signature = signature
+                self._index = None
+            return self._cache
+
+    def _creation_index(self) -> CreationIndex:
+        # Sorted once per version of the file rather than on every listing.
+        with self._lock:
+            tasks = self._load()
+            if self._index is None:
+                self._index = CreationIndex(tasks.values())
+            return self._index
 
     def _read(self) -> List[Task]:
         with self._lock:
-            raw = self._path.read_text(encoding="utf-8")
-            data = json.loads(raw or "[]")
-            return deserialize_tasks(data)
+            return [task.copy() for task in self._load().values()]
 
     def _write(self, tasks: Iterable[Task]) -> None:
-        with self._lock:
-            payload = json.dumps(serialize_tasks(tasks), indent=2)
-            self._path.write_text(payload, encoding="utf-8")
+        with self._lock, self._file_lock.acquire():
+            cache = {task.identifier: task.copy() for task in tasks}
+            with metrics.timer("tasks.encode"):
+                payload = self._codec.encode(cache.values())
+            with metrics.timer("repository.write"):
+                atomic_write_bytes(self._path, payload)
+            metrics.inc("repository.bytes_written", len(payload))
+            self._cache = cache
+            self._cache_signature = self._signature()
+            self._index = None
 
     def list(self) -> List[Task]:
         return self._read()
 
     def save(self, task: Task) -> Task:
-        tasks = self._read()
-        tasks = [t for t in tasks if t.identifier != task.identifier]
-        tasks.append(task)
-        self._write(tasks)
+        self.save_many([task])
         return task
 
+    def save_many(self, tasks: Iterable[Task]) -> List[Task]:
+        tasks = list(tasks)
+        with self._lock, self._file_lock.acquire():
+            merged = dict(self._load())
+            with versioned_write(merged, tasks):
+                for task in tasks:
+                    merged.pop(task.identifier, None)
+                    merged[task.identifier] = task
+                self._write(merged.values())
+        return tasks
+
     def get(self, identifier: str) -> Task:
-        for task in self._read():
-            if task.identifier == identifier:
-                return task
-        raise KeyError(f"Task {identifier!r} not found")
+        with self._lock:
+            task = self._load().get(identifier)
+            if task is None:
+                raise KeyError(f"Task {identifier!r} not found")
+            return task.copy()
+
+    def get_many(self, identifiers: Iterable[str], *, missing_ok: bool = False) -> List[Task]:
+        with self._lock:
+            tasks = self._load()
+            found = []
+            for identifier in identifiers:
+                task = tasks.get(identifier)
+                if task is None:
+                    if missing_ok:
+                        continue
+                    raise KeyError(f"Task {identifier!r} not found")
+                found.append(task.copy())
+            return found
 
     def delete(self, identifier: str) -> None:
-        tasks = [t for t in self._read() if t.identifier != identifier]
-        self._write(tasks)
+        self.delete_many([identifier])
+
+    def delete_many(self, identifiers: Iterable[str]) -> None:
+        doomed = set(identifiers)
+        with self._lock, self._file_lock.acquire():
+            tasks = self._load()
+            if doomed.isdisjoint(tasks):
+                return
+            self._write(t for t in tasks.values() if t.identifier not in doomed)
 
     def replace_all(self, tasks: Iterable[Task]) -> None:
         self._write(list(tasks))
 
-    def purge(self) -> int:
+    def count(self) -> int:
+        with self._lock:
+            return len(self._load())
+
+    def iter_tasks(
+        self,
+        *,
+        owner: str | None = None,
+        priority: str | None = None,
+        completed: bool | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
+        with self._lock:
+            page = self._creation_index().select(
+                owner=owner, priority=priority, completed=completed, offset=offset, limit=limit
+            )
+        return (task.copy() for task in page)
+
+    def iter_created(
+        self,
+        *,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        newest_first: bool = False,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
         with self._lock:
-            self._path.write_text("[]", encoding="utf-8")
-        return 0
+            page = list(islice(self._creation_index().created(since, until, newest_first), limit))
+        return (task.copy() for task in page)
+
+    def purge(self) -> int:
+        with self._lock, self._file_lock.acquire():
+            count = len(self._load())
+            self._write([])
+        return count
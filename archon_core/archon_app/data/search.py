@@ -0,0 +1,442 @@
+"""Persistent, incrementally maintained full-text index over task titles and descriptions."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, insort
+import heapq
+import json
+import marshal
+import math
+from pathlib import Path
+import re
+from threading import RLock
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from ..utils import metrics
+from ..utils.fileio import FileLock, atomic_write_bytes
+from .models import PRIORITY_CODES, Task
+from .repository import DelegatingRepository, TaskRepository
+
+_TOKEN = re.compile(r"\w+")
+_TITLE_WEIGHT = 2
+_K1 = 1.2
+_B = 0.75
+_MAX_PREFIX_TERMS = 256
+_SNAPSHOT = "index.bin"
+_DELTA = "delta.jsonl"
+_SNAPSHOT_VERSION = 1
+_MIN_COMPACT_BYTES = 4 * 1024 * 1024
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _term_counts(title: str, description: str) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for term in tokenize(title):
+        counts[term] = counts.get(term, 0) + _TITLE_WEIGHT
+    for term in tokenize(description):
+        counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+class SearchIndex:
+    """Inverted index stored in ``directory`` as a snapshot plus an append-only delta log.
+
+    Documents are numbered in insertion order, so every posting list (a pair
+    of ``array`` objects holding document numbers and term frequencies) stays
+    sorted by appending. Updates tombstone the old document number. Each
+    process replays only the part of the delta log it has not seen yet, and
+    once the log outgrows a quarter of the snapshot the live documents are
+    renumbered into a fresh snapshot and the log is emptied.
+
+    Results are ranked with BM25 (title terms count double) and every query
+    term must match; the last one may match as a prefix.
+    """
+
+    def __init__(self, directory: Path):
+        self._directory = directory
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._snapshot_path = directory / _SNAPSHOT
+        self._delta_path = directory / _DELTA
+        self._file_lock = FileLock(directory / _SNAPSHOT)
+        self._lock = RLock()
+        self._signature: Tuple[int, int, int] | None = None
+        self._offset = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        self._row: Dict[str, int] | None = {}
+        self._live = 0
+        self._ids: List[Optional[str]] = []
+        self._owners: List[str] = []
+        self._owner_codes: Dict[str, int] = {}
+        self._owner = array("I")
+        self._priority = array("B")
+        self._length = array("I")
+        self._total_length = 0
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._terms: List[str] = []
+        self._dead: Set[int] = set()
+
+    @property
+    def exists(self) -> bool:
+        return self._snapshot_path.exists()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sync()
+            return self._live
+
+    def lock(self):
+        """Exclusive lock serializing index writers (and the store writes they mirror)."""
+        return self._file_lock.acquire()
+
+    # -- in-memory maintenance -------------------------------------------------
+
+    def _rows(self) -> Dict[str, int]:
+        # Built on first write: query-only processes never need it, and at
+        # millions of documents it is the slowest part of loading a snapshot.
+        if self._row is None:
+            self._row = {identifier: doc for doc, identifier in enumerate(self._ids) if identifier is not None}
+        return self._row
+
+    def _put(self, identifier: str, owner: str, priority: str, title: str, description: str) -> None:
+        self._drop(identifier)
+        doc = len(self._ids)
+        code = self._owner_codes.get(owner)
+        if code is None:
+            code = self._owner_codes[owner] = len(self._owners)
+            self._owners.append(owner)
+        counts = _term_counts(title, description)
+        length = sum(counts.values())
+        self._rows()[identifier] = doc
+        self._live += 1
+        self._ids.append(identifier)
+        self._owner.append(code)
+        self._priority.append(PRIORITY_CODES[priority])
+        self._length.append(length)
+        self._total_length += length
+        for term, tf in counts.items():
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = (array("I"), array("I"))
+                insort(self._terms, term)
+            posting[0].append(doc)
+            posting[1].append(tf)
+
+    def _drop(self, identifier: str) -> None:
+        doc = self._rows().pop(identifier, None)
+        if doc is not None:
+            self._live -= 1
+            self._dead.add(doc)
+            self._ids[doc] = None
+            self._total_length -= self._length[doc]
+
+    def _apply(self, record: dict) -> None:
+        op = record["op"]
+        if op == "put":
+            self._put(record["id"], record["owner"], record["priority"], record["title"], record["description"])
+        elif op == "del":
+            self._drop(record["id"])
+
+    # -- persistence -------------------------------------------------------------
+
+    def _snapshot_signature(self) -> Tuple[int, int, int] | None:
+        try:
+            stat = self._snapshot_path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+    def _sync(self) -> None:
+        """Catch up with snapshots and delta records written by any process."""
+        signature = self._snapshot_signature()
+        try:
+            delta_size = self._delta_path.stat().st_size
+        except FileNotFoundError:
+            delta_size = 0
+        if signature != self._signature or delta_size < self._offset:
+            self._load_snapshot()
+            self._signature = signature
+            self._offset = 0
+        if delta_size > self._offset:
+            with self._delta_path.open("rb") as fh:
+                fh.seek(self._offset)
+                for line in fh:
+                    if not line.endswith(b"\n"):
+                        break
+                    self._apply(json.loads(line))
+                    self._offset += len(line)
+
+    def _load_snapshot(self) -> None:
+        self._reset()
+        try:
+            payload = self._snapshot_path.read_bytes()
+        except FileNotFoundError:
+            return
+        with metrics.timer("search.load"):
+            data = marshal.loads(payload)
+            if data.get("version") != _SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported search index version in {self._snapshot_path}")
+            self._ids = data["ids"]
+            self._row = None
+            self._live = len(self._ids)
+            self._owners = data["owners"]
+            self._owner_codes = {owner: code for code, owner in enumerate(self._owners)}
+            self._owner.frombytes(data["owner"])
+            self._priority.frombytes(data["priority"])
+            self._length.frombytes(data["length"])
+            self._total_length = sum(self._length)
+            self._terms = data["terms"]
+            postings = self._postings
+            for term, docs, tfs in zip(self._terms, data["docs"], data["tfs"]):
+                doc_array, tf_array = array("I"), array("I")
+                doc_array.frombytes(docs)
+                tf_array.frombytes(tfs)
+                postings[term] = (doc_array, tf_array)
+
+    def _write_snapshot(self) -> None:
+        # Renumber live documents densely, dropping tombstones.
+        remap = array("i", [-1]) * len(self._ids)
+        ids: List[str] = []
+        owner, priority, length = array("I"), array("B"), array("I")
+        for doc, identifier in enumerate(self._ids):
+            if identifier is not None:
+                remap[doc] = len(ids)
+                ids.append(identifier)
+                owner.append(self._owner[doc])
+                priority.append(self._priority[doc])
+                length.append(self._length[doc])
+        terms, docs, tfs = [], [], []
+        for term in self._terms:
+            old_docs, old_tfs = self._postings[term]
+            new_docs, new_tfs = array("I"), array("I")
+            for doc, tf in zip(old_docs, old_tfs):
+                new = remap[doc]
+                if new >= 0:
+                    new_docs.append(new)
+                    new_tfs.append(tf)
+            if new_docs:
+                terms.append(term)
+                docs.append(new_docs.tobytes())
+                tfs.append(new_tfs.tobytes())
+        data = {
+            "version": _SNAPSHOT_VERSION,
+            "ids": ids,
+            "owners": self._owners,
+            "owner": owner.tobytes(),
+            "priority": priority.tobytes(),
+            "length": length.tobytes(),
+            "terms": terms,
+            "docs": docs,
+            "tfs": tfs,
+        }
+        atomic_write_bytes(self._snapshot_path, marshal.dumps(data))
+        self._delta_path.write_bytes(b"")
+        # Readers replaying an old delta over the new snapshot converge anyway:
+        # puts and deletes are idempotent when applied in order.
+        self._signature = self._snapshot_signature()
+        self._offset = 0
+        self._load_snapshot()
+
+    def _record(self, records: List[dict]) -> None:
+        """Apply and persist ``records``; the file lock must be held."""
+        if not records:
+            return
+        self._sync()
+        payload = "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records).encode("utf-8")
+        with self._delta_path.open("ab") as fh:
+            fh.write(payload)
+        for record in records:
+            self._apply(record)
+        self._offset += len(payload)
+        snapshot_size = self._signature[2] if self._signature else 0
+        if self._offset > max(_MIN_COMPACT_BYTES, snapshot_size // 4):
+            self._write_snapshot()
+
+    def update(self, tasks: Iterable[Task]) -> None:
+        records = [
+            {
+                "op": "put",
+                "id": task.identifier,
+                "owner": task.owner,
+                "priority": task.priority,
+                "title": task.title,
+                "description": task.description,
+            }
+            for task in tasks
+        ]
+        with self._lock, self.lock():
+            self._record(records)
+
+    def remove(self, identifiers: Iterable[str]) -> None:
+        with self._lock, self.lock():
+            self._record([{"op": "del", "id": identifier} for identifier in identifiers])
+
+    def rebuild(self, tasks: Iterable[Task]) -> int:
+        """Replace the whole index with ``tasks`` and write a fresh snapshot."""
+        with self._lock, self.lock():
+            self._reset()
+            for task in tasks:
+                self._put(task.identifier, task.owner, task.priority, task.title, task.description)
+            self._write_snapshot()
+            return self._live
+
+    # -- queries -------------------------------------------------------------------
+
+    def _expand(self, term: str) -> List[str]:
+        start = bisect_left(self._terms, term)
+        matches = []
+        for candidate in self._terms[start : start + _MAX_PREFIX_TERMS]:
+            if not candidate.startswith(term):
+                break
+            matches.append(candidate)
+        return matches
+
+    def search(
+        self,
+        query: str,
+        *,
+        owner: str | None = None,
+        priority: str | None = None,
+        prefix: bool = False,
+        offset: int = 0,
+        limit: int | None = 20,
+    ) -> Tuple[int, List[Tuple[str, float]]]:
+        """Return ``(total matches, [(identifier, score), ...])`` for the requested page."""
+        with self._lock, metrics.timer("search.query"):
+            self._sync()
+            words = tokenize(query)
+            live = self._live
+            if not words or not live:
+                return 0, []
+            groups: List[List[str]] = []
+            for position, word in enumerate(words):
+                if prefix and position == len(words) - 1:
+                    group = self._expand(word)
+                else:
+                    group = [word] if word in self._postings else []
+                if not group:
+                    return 0, []
+                groups.append(group)
+            # Rarest group first keeps the candidate set small.
+            groups.sort(key=lambda group: sum(len(self._postings[term][0]) for term in group))
+            owner_code = -1 if owner is None else self._owner_codes.get(owner)
+            priority_code = -1 if priority is None else PRIORITY_CODES.get(priority.lower())
+            if owner_code is None or priority_code is None:
+                return 0, []
+            scores: Dict[int, float] | None = None
+            for group in groups:
+                scores = self._score_group(group, live, scores, owner_code, priority_code)
+                if not scores:
+                    return 0, []
+            assert scores is not None
+            stop = None if limit is None else offset + limit
+            if stop is None:
+                ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+            else:
+                ranked = heapq.nsmallest(stop, scores.items(), key=lambda item: (-item[1], item[0]))
+            ids = self._ids
+            return len(scores), [(ids[doc], score) for doc, score in ranked[offset:stop]]  # type: ignore[misc]
+
+    def _score_group(
+        self,
+        group: List[str],
+        live: int,
+        candidates: Dict[int, float] | None,
+        owner_code: int,
+        priority_code: int,
+    ) -> Dict[int, float]:
+        average = self._total_length / live or 1.0
+        lengths, dead = self._length, self._dead
+        owners, priorities = self._owner, self._priority
+        base = _K1 * (1 - _B)
+        scale = _K1 * _B / average
+        scores: Dict[int, float] = {}
+        for term in group:
+            docs, tfs = self._postings[term]
+            df = len(docs)
+            weight = math.log(1 + (live - df + 0.5) / (df + 0.5)) * (_K1 + 1)
+            if candidates is not None and len(candidates) * 8 < df:
+                # Few candidates left: probe the posting list instead of scanning it.
+                for doc, previous in candidates.items():
+                    index = bisect_left(docs, doc)
+                    if index < df and docs[index] == doc:
+                        tf = tfs[index]
+                        scores[doc] = scores.get(doc, previous) + weight * tf / (tf + base + scale * lengths[doc])
+                continue
+            for doc, tf in zip(docs, tfs):
+                if candidates is not None:
+                    previous = candidates.get(doc)
+                    if previous is None:
+                        continue
+                elif doc in dead:
+                    continue
+                elif owner_code >= 0 and owners[doc] != owner_code:
+                    continue
+                elif priority_code >= 0 and priorities[doc] != priority_code:
+                    continue
+                else:
+                    previous = 0.0
+                scores[doc] = scores.get(doc, previous) + weight * tf / (tf + base + scale * lengths[doc])
+        return scores
+
+
+class SearchIndexingRepository(DelegatingRepository):
+    """Wrap ``backing`` so the search index follows every save, delete and replace.
+
+    The index lock is held across each store write and its index update. An
+    index that does not exist yet is built from ``backing`` on construction.
+    """
+
+    def __init__(self, backing: TaskRepository, index: SearchIndex):
+        super().__init__(backing)
+        self._index = index
+        if not index.exists:
+            with index.lock():
+                if not index.exists:
+                    index.rebuild(backing.iter_tasks())
+
+    @property
+    def index(self) -> SearchIndex:
+        return self._index
+
+    def save(self, task: Task) -> Task:
+        self.save_many([task])
+        return task
+
+    def save_many(self, tasks: Iterable[Task]) -> List[Task]:
+        tasks = list(tasks)
+        with self._index.lock():
+            self._backing.save_many(tasks)
+            self._index.update(tasks)
+        return tasks
+
+    def delete(self, identifier: str) -> None:
+        self.delete_many([identifier])
+
+    def delete_many(self, identifiers: Iterable[str]) -> None:
+        identifiers = list(identifiers)
+        with self._index.lock():
+            self._backing.delete_many(identifiers)
+            self._index.remove(identifiers)
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        tasks = list(tasks)
+        with self._index.lock():
+            self._backing.replace_all(tasks)
+            self._index.rebuild(tasks)
+
+    def purge(self) -> int:
+        with self._index.lock():
+            count = self._backing.purge()
+            self._index.rebuild([])
+        return count
+
+    def replace_batches(self, batches: Iterable[List[Task]]) -> int:
+        with self._index.lock():
+            count = self._backing.replace_batches(batches)
+            self._index.rebuild(self._backing.iter_tasks())
+        return count
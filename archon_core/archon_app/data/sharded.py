@@ -0,0 +1,268 @@
+"""Task repository partitioned across several files by identifier hash."""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import heapq
+from itertools import islice
+import json
+import os
+from pathlib import Path
+import shutil
+import tempfile
+from typing import Dict, Iterable, Iterator, List, Optional
+import zlib
+
+from ..utils.fileio import FileLock, atomic_write_text
+from .codecs import TaskCodec, task_to_row, tasks_from_rows
+from .models import Task
+from .repository import FileTaskRepository, TaskRepository
+
+DEFAULT_SHARDS = 16
+MANIFEST = "manifest.json"
+_MANIFEST_VERSION = 1
+
+
+def shard_index(identifier: str, shards: int) -> int:
+    """Stable shard number for ``identifier`` (``hash()`` is salted per process)."""
+    return zlib.crc32(identifier.encode("utf-8")) % shards
+
+
+def is_sharded_store(path: Path) -> bool:
+    return (path / MANIFEST).is_file()
+
+
+def _read_manifest(directory: Path) -> Optional[dict]:
+    try:
+        return json.loads((directory / MANIFEST).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+class ShardedTaskRepository(TaskRepository):
+    """Spread tasks over ``shards`` :class:`FileTaskRepository` files in ``directory``.
+
+    A write rewrites and locks only the shard(s) owning the affected tasks, so
+    write amplification and lock contention shrink with the shard count. Batch
+    writes spanning several shards are atomic per shard, not across shards.
+    Full scans load shards concurrently and merge them by ``created_at``.
+
+    The shard count is recorded in ``manifest.json``; change it with
+    :func:`reshard` while no other process is using the store.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        shards: int = DEFAULT_SHARDS,
+        codec: TaskCodec | None = None,
+        max_workers: int | None = None,
+    ):
+        self._directory = directory
+        self._directory.mkdir(parents=True, exist_ok=True)
+        with FileLock(directory / MANIFEST).acquire():
+            manifest = _read_manifest(directory)
+            if manifest is None:
+                manifest = {"version": _MANIFEST_VERSION, "shards": shards}
+                atomic_write_text(directory / MANIFEST, json.dumps(manifest))
+        # An existing store keeps its own shard count until it is resharded.
+        self._count = int(manifest["shards"])
+        self._shards = [
+            FileTaskRepository(directory / f"shard-{index:04d}.json", codec=codec) for index in range(self._count)
+        ]
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or min(self._count, (os.cpu_count() or 1) + 4),
+            thread_name_prefix="archon-shard",
+        )
+
+    @property
+    def shard_count(self) -> int:
+        return self._count
+
+    def _shard(self, identifier: str) -> FileTaskRepository:
+        return self._shards[shard_index(identifier, self._count)]
+
+    def _group(self, tasks: Iterable[Task]) -> Dict[int, List[Task]]:
+        groups: Dict[int, List[Task]] = {}
+        for task in tasks:
+            groups.setdefault(shard_index(task.identifier, self._count), []).append(task)
+        return groups
+
+    def _map(self, func, indexes: Iterable[int]) -> List:
+        indexes = list(indexes)
+        if len(indexes) == 1:
+            return [func(indexes[0])]
+        return list(self._executor.map(func, indexes))
+
+    def list(self) -> List[Task]:
+        return list(self.iter_tasks())
+
+    def save(self, task: Task) -> Task:
+        return self._shard(task.identifier).save(task)
+
+    def save_many(self, tasks: Iterable[Task]) -> List[Task]:
+        tasks = list(tasks)
+        groups = self._group(tasks)
+        self._map(lambda index: self._shards[index].save_many(groups[index]), groups)
+        return tasks
+
+    def get(self, identifier: str) -> Task:
+        return self._shard(identifier).get(identifier)
+
+    def get_many(self, identifiers: Iterable[str], *, missing_ok: bool = False) -> List[Task]:
+        identifiers = list(identifiers)
+        groups: Dict[int, List[str]] = {}
+        for identifier in dict.fromkeys(identifiers):
+            groups.setdefault(shard_index(identifier, self._count), []).append(identifier)
+        found: Dict[str, Task] = {}
+        for tasks in self._map(
+            lambda index: self._shards[index].get_many(groups[index], missing_ok=missing_ok), groups
+        ):
+            found.update((task.identifier, task) for task in tasks)
+        # Repeated identifiers get independent copies, like the other backends.
+        result = []
+        for identifier in identifiers:
+            task = found.get(identifier)
+            if task is None:
+                continue
+            result.append(task)
+            found[identifier] = task.copy()
+        return result
+
+    def delete(self, identifier: str) -> None:
+        self._shard(identifier).delete(identifier)
+
+    def delete_many(self, identifiers: Iterable[str]) -> None:
+        groups: Dict[int, List[str]] = {}
+        for identifier in identifiers:
+            groups.setdefault(shard_index(identifier, self._count), []).append(identifier)
+        self._map(lambda index: self._shards[index].delete_many(groups[index]), groups)
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        groups = self._group(tasks)
+        self._map(lambda index: self._shards[index].replace_all(groups.get(index, [])), range(self._count))
+
+    def replace_batches(self, batches: Iterable[List[Task]]) -> int:
+        """Spill ``batches`` into one staging file per shard, then replace the shards one at a time.
+
+        Nothing is replaced until every batch has been read. Only one shard's
+        tasks per worker are held in memory during the swap, which (like other
+        multi-shard writes) is atomic per shard.
+        """
+        staging = Path(tempfile.mkdtemp(prefix=".replace.", dir=self._directory))
+        try:
+            spills = [(staging / f"shard-{index:04d}.rows").open("w", encoding="utf-8") for index in range(self._count)]
+            total = 0
+            try:
+                for batch in batches:
+                    for index, tasks in self._group(batch).items():
+                        spills[index].writelines(json.dumps(task_to_row(task)) + "\n" for task in tasks)
+                    total += len(batch)
+            finally:
+                for spill in spills:
+                    spill.close()
+
+            def swap(index: int) -> None:
+                with (staging / f"shard-{index:04d}.rows").open("r", encoding="utf-8") as fh:
+                    self._shards[index].replace_all(tasks_from_rows(json.loads(line) for line in fh))
+
+            self._map(swap, range(self._count))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+        return total
+
+    def iter_tasks(
+        self,
+        *,
+        owner: str | None = None,
+        priority: str | None = None,
+        completed: bool | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
+        # Each shard returns its sorted matches (at most ``offset + limit``), then
+        # the sorted runs are merged lazily.
+        stop = None if limit is None else offset + limit
+
+        def scan(index: int) -> List[Task]:
+            return list(
+                self._shards[index].iter_tasks(owner=owner, priority=priority, completed=completed, limit=stop)
+            )
+
+        runs = self._map(scan, range(self._count))
+        merged = heapq.merge(*runs, key=lambda task: task.created_at)
+        return islice(merged, offset, stop)
+
+    def iter_created(
+        self,
+        *,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        newest_first: bool = False,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
+        def scan(index: int) -> List[Task]:
+            return list(
+                self._shards[index].iter_created(since=since, until=until, newest_first=newest_first, limit=limit)
+            )
+
+        runs = self._map(scan, range(self._count))
+        return islice(heapq.merge(*runs, key=lambda task: task.created_at, reverse=newest_first), limit)
+
+    def count(self) -> int:
+        return sum(self._map(lambda index: self._shards[index].count(), range(self._count)))
+
+    def purge(self) -> int:
+        return sum(self._map(lambda index: self._shards[index].purge(), range(self._count)))
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        for shard in self._shards:
+            shard.close()
+
+
+def reshard(source: Path, shards: int, target: Path | None = None, codec: TaskCodec | None = None) -> int:
+    """Copy the store at ``source`` (sharded or a single file) into ``shards`` shards.
+
+    The result replaces ``target`` (by default ``source`` itself). Tasks are
+    written to a staging directory first, so an interrupted run leaves both
+    stores untouched, and only one source shard is held in memory at a time.
+    No other process may use the stores meanwhile. Returns the task count.
+    """
+    if shards < 1:
+        raise ValueError("shards must be at least 1")
+    target = target or source
+    staging = target.with_name(f".{target.name}.reshard")
+    backup = target.with_name(f".{target.name}.old")
+    for leftover in (staging, backup):
+        _remove(leftover)
+
+    if is_sharded_store(source):
+        repository: TaskRepository = ShardedTaskRepository(source)
+    elif source.is_file():
+        repository = FileTaskRepository(source)
+    else:
+        raise ValueError(f"No task store found at {source}")
+    staged = ShardedTaskRepository(staging, shards=shards, codec=codec)
+    total = 0
+    try:
+        parts = repository._shards if isinstance(repository, ShardedTaskRepository) else [repository]
+        for part in parts:
+            tasks = part.list()
+            staged.save_many(tasks)
+            total += len(tasks)
+    finally:
+        repository.close()
+        staged.close()
+    if target.exists():
+        target.rename(backup)
+    staging.rename(target)
+    _remove(backup)
+    return total
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir():
+        shutil.rmtree(path)
+    elif path.exists():
+        path.unlink()
@@ -0,0 +1,363 @@
+"""Point-in-time snapshots of a task store, full or incremental, and their restore."""
+from __future__ import annotations
+
+from contextlib import ExitStack
+from datetime import datetime, timezone
+from itertools import takewhile
+import json
+import os
+from pathlib import Path
+import shutil
+import sqlite3
+import tempfile
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from ..config import AppConfig
+from ..utils import metrics
+from ..utils.fileio import FileLock, atomic_write_text
+from .changes import ChangeFeed, collapse
+from .factory import create_backend, resolve_backend
+from .models import Task
+from .sharded import MANIFEST, is_sharded_store
+
+_MANIFEST = "snapshot.json"
+_MANIFEST_VERSION = 1
+_DELTA = "delta.jsonl"
+_COPY_CHUNK = 1024 * 1024
+
+
+def _encode(record: dict) -> bytes:
+    return json.dumps(record, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    """Hardlink ``source`` to ``target``, copying instead across filesystems.
+
+    Only for files that are replaced atomically and never modified in place,
+    so the link is as good as a copy of the version that was current.
+    """
+    try:
+        os.link(source, target)
+    except OSError:
+        with source.open("rb") as src, target.open("wb") as dst:
+            shutil.copyfileobj(src, dst, _COPY_CHUNK)
+
+
+def _copy_prefix(source, target: Path, size: int) -> None:
+    """Copy the first ``size`` bytes of the open file ``source`` into ``target``."""
+    with target.open("wb") as dst:
+        offset = 0
+        while offset < size:
+            chunk = os.pread(source.fileno(), min(_COPY_CHUNK, size - offset), offset)
+            if not chunk:
+                break
+            dst.write(chunk)
+            offset += len(chunk)
+
+
+class SnapshotStore:
+    """Snapshots of the store described by ``config``, kept in ``directory``.
+
+    A full snapshot is taken without pausing writers:
+
+    * JSON stores and shards are only ever replaced atomically, so the
+      current files are hardlinked (immutable from then on) in microseconds;
+    * a journal is append-only, so its length is read under a brief shared
+      lock and that prefix is copied afterwards;
+    * SQLite is copied with the online backup API from a read transaction
+      opened at the snapshot point.
+
+    With the change feed enabled, each snapshot records the feed's sequence
+    number at that point, and an incremental snapshot stores only the tasks
+    changed (and ids deleted) since the previous snapshot, read from the feed
+    without touching the store at all.
+
+    Each snapshot is a directory holding the copied files and ``snapshot.json``;
+    it is staged under a temporary name and renamed into place when complete.
+    """
+
+    def __init__(self, config: AppConfig, directory: Path):
+        self._config = config
+        self._directory = directory
+        self._path = config.database_path
+        self._backend = resolve_backend(self._path, config.database_backend)
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def _feed(self) -> Optional[ChangeFeed]:
+        return ChangeFeed(self._config.changes["path"]) if self._config.changes["enabled"] else None
+
+    # -- listing ---------------------------------------------------------------------
+
+    def list(self) -> List[Dict[str, Any]]:
+        """Manifests of every complete snapshot, oldest first."""
+        manifests = []
+        if self._directory.is_dir():
+            for entry in self._directory.iterdir():
+                if entry.name.startswith("."):
+                    continue
+                try:
+                    manifests.append(json.loads((entry / _MANIFEST).read_text(encoding="utf-8")))
+                except FileNotFoundError:
+                    continue
+        return sorted(manifests, key=lambda manifest: (manifest["created_at"], manifest["name"]))
+
+    def get(self, name: str) -> Dict[str, Any]:
+        try:
+            return json.loads((self._directory / name / _MANIFEST).read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise KeyError(f"Snapshot {name!r} not found") from None
+
+    def _chain(self, name: str) -> List[Dict[str, Any]]:
+        """The full snapshot ``name`` is based on, followed by each incremental up to ``name``."""
+        chain = [self.get(name)]
+        while chain[-1]["base"] is not None:
+            chain.append(self.get(chain[-1]["base"]))
+        return chain[::-1]
+
+    # -- creation --------------------------------------------------------------------
+
+    def create(self, name: str | None = None, incremental: bool = False) -> Dict[str, Any]:
+        """Take a snapshot and return its manifest."""
+        now = datetime.now(timezone.utc)
+        name = name or now.strftime("%Y%m%dT%H%M%S%fZ")
+        if name.startswith(".") or "/" in name or os.sep in name:
+            raise ValueError(f"Invalid snapshot name: {name!r}")
+        if (self._directory / name).exists():
+            raise ValueError(f"Snapshot {name!r} already exists")
+        self._directory.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{name}.", dir=self._directory))
+        manifest: Dict[str, Any] = {
+            "version": _MANIFEST_VERSION,
+            "name": name,
+            "created_at": now.isoformat(),
+            "backend": self._backend,
+            "source": str(self._path),
+            "base": None,
+        }
+        try:
+            with metrics.timer("snapshot.create"):
+                if incremental:
+                    manifest.update(self._capture_delta(staging))
+                else:
+                    manifest.update(self._capture(staging))
+            manifest["bytes"] = sum(entry.stat().st_size for entry in staging.rglob("*") if entry.is_file())
+            atomic_write_text(staging / _MANIFEST, json.dumps(manifest, indent=2))
+            os.rename(staging, self._directory / name)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return manifest
+
+    def _capture(self, staging: Path) -> Dict[str, Any]:
+        feed = self._feed()
+        with ExitStack() as stack:
+            # The feed lock is held across every store write and its record, so
+            # while we hold it the store matches the feed's last sequence number.
+            if feed is not None:
+                stack.enter_context(feed.lock())
+            seq = feed.last_seq() if feed is not None else None
+            finish = self._pin(staging)
+        # Copying what was pinned happens after every lock is released.
+        finish()
+        return {"kind": "full", "seq": seq}
+
+    def _pin(self, staging: Path):
+        """Fix the store's contents as of now; returns a callable that completes the copy."""
+        target = staging / self._path.name
+        if self._backend == "json":
+            _link_or_copy(self._path, target)
+            return lambda: None
+        if self._backend == "sharded":
+            # Like the store itself, this is consistent per shard; batches spanning
+            # shards are only atomic across them when the feed lock is held above.
+            target.mkdir()
+            _link_or_copy(self._path / MANIFEST, target / MANIFEST)
+            for shard in sorted(self._path.glob("shard-*.json")):
+                _link_or_copy(shard, target / shard.name)
+            return lambda: None
+        if self._backend == "journal":
+            with FileLock(self._path).acquire(shared=True):
+                # Appends happen under the exclusive lock, so the current length ends
+                # on a record boundary; compaction replaces the file, which leaves
+                # the one we opened untouched.
+                source = self._path.open("rb")
+                size = os.fstat(source.fileno()).st_size
+
+            def finish() -> None:
+                with source:
+                    _copy_prefix(source, target, size)
+
+            return finish
+        if self._backend == "sqlite":
+            source = sqlite3.connect(str(self._path), isolation_level=None)
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM tasks").fetchone()
+
+            def finish() -> None:
+                try:
+                    copy = sqlite3.connect(str(target))
+                    try:
+                        source.backup(copy)
+                    finally:
+                        copy.close()
+                finally:
+                    source.execute("COMMIT")
+                    source.close()
+
+            return finish
+        raise ValueError(f"Unsupported database backend: {self._backend!r}")
+
+    def _capture_delta(self, staging: Path) -> Dict[str, Any]:
+        feed = self._feed()
+        if feed is None:
+            raise ValueError("Incremental snapshots need the change feed; set changes.enabled")
+        previous = [manifest for manifest in self.list() if manifest["source"] == str(self._path)]
+        if not previous:
+            raise ValueError("No earlier snapshot of this store to base an incremental snapshot on")
+        base = previous[-1]
+        if base["seq"] is None:
+            raise ValueError(f"Snapshot {base['name']!r} was taken without the change feed")
+        seq = feed.last_seq()
+        if seq < base["seq"]:
+            raise ValueError(f"The change feed is behind snapshot {base['name']!r}; take a full snapshot")
+        # Changes appended after ``seq`` belong to the next snapshot.
+        delta = collapse(takewhile(lambda change: change.seq <= seq, feed.read(base["seq"])), base["seq"])
+        with (staging / _DELTA).open("wb") as fh:
+            if delta.reset:
+                fh.write(_encode({"op": "purge"}))
+            for identifier in sorted(delta.deleted):
+                fh.write(_encode({"op": "delete", "identifier": identifier}))
+            for task in delta.tasks.values():
+                fh.write(_encode({"op": "upsert", "task": task.to_dict()}))
+        return {
+            "kind": "incremental",
+            "seq": seq,
+            "base": base["name"],
+            "changed": len(delta.tasks),
+            "deleted": len(delta.deleted),
+        }
+
+    # -- restore ---------------------------------------------------------------------
+
+    def restore(self, name: str) -> int:
+        """Replace the store with snapshot ``name`` and return its task count.
+
+        Full snapshots are put back by swapping files, which running processes
+        pick up like any other write. Incremental snapshots are then replayed on
+        top. Derived data (search index, aggregates, change feed) is brought in
+        line with the restored tasks.
+        """
+        chain = self._chain(name)
+        full = chain[0]
+        if full["backend"] != self._backend:
+            raise ValueError(f"Snapshot {name!r} is of a {full['backend']} store, not {self._backend}")
+        with metrics.timer("snapshot.restore"):
+            self._put_back(self._directory / full["name"] / Path(full["source"]).name)
+            repository = create_backend(self._config)
+            try:
+                if len(chain) > 1:
+                    tasks = {task.identifier: task for task in repository.list()}
+                    for manifest in chain[1:]:
+                        for record in self._read_delta(manifest["name"]):
+                            _apply(tasks, record)
+                    repository.replace_all(tasks.values())
+                count = repository.count()
+                if self._has_derived():
+                    self._refresh_derived(repository.list())
+            finally:
+                repository.close()
+        return count
+
+    def _read_delta(self, name: str) -> Iterator[dict]:
+        with (self._directory / name / _DELTA).open("rb") as fh:
+            for line in fh:
+                yield json.loads(line)
+
+    def _put_back(self, source: Path) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        if self._backend == "json":
+            with FileLock(self._path).acquire():
+                _replace_with(source, self._path, link=True)
+        elif self._backend == "sharded":
+            shards = sorted(source.glob("shard-*.json"))
+            if is_sharded_store(self._path):
+                current = json.loads((self._path / MANIFEST).read_text(encoding="utf-8"))["shards"]
+                if current != len(shards):
+                    raise ValueError(f"The store has {current} shards, the snapshot {len(shards)}; reshard first")
+            self._path.mkdir(exist_ok=True)
+            with ExitStack() as stack:
+                for shard in shards:
+                    stack.enter_context(FileLock(self._path / shard.name).acquire())
+                for shard in shards:
+                    _replace_with(shard, self._path / shard.name, link=True)
+                _replace_with(source / MANIFEST, self._path / MANIFEST, link=True)
+        elif self._backend == "journal":
+            # The journal is appended to in place, so it gets its own copy.
+            with FileLock(self._path).acquire():
+                _replace_with(source, self._path, link=False)
+        elif self._backend == "sqlite":
+            snapshot = sqlite3.connect(str(source))
+            live = sqlite3.connect(str(self._path))
+            try:
+                snapshot.backup(live)
+            finally:
+                live.close()
+                snapshot.close()
+        else:
+            raise ValueError(f"Unsupported database backend: {self._backend!r}")
+
+    def _has_derived(self) -> bool:
+        config = self._config
+        return config.search["enabled"] or config.aggregates["enabled"] or config.changes["enabled"]
+
+    def _refresh_derived(self, tasks: List[Task]) -> None:
+        config = self._config
+        if config.search["enabled"]:
+            from .search import SearchIndex
+
+            SearchIndex(Path(config.search["path"])).rebuild(tasks)
+        if config.aggregates["enabled"]:
+            from .aggregates import AggregateStore
+
+            counted: Iterable[Task] = tasks
+            if config.archive["enabled"]:
+                from .archive import TaskArchive, with_archived
+
+                counted = with_archived(tasks, TaskArchive(Path(config.archive["path"])))
+            AggregateStore(Path(config.aggregates["path"])).rebuild(counted)
+        feed = self._feed()
+        if feed is not None:
+            # Consumers see the restore as a replace of the whole store.
+            feed.append([("reset", None, None), *(("upsert", task.identifier, task.to_dict()) for task in tasks)])
+
+
+def _replace_with(source: Path, target: Path, link: bool) -> None:
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".restore", dir=target.parent)
+    os.close(fd)
+    tmp_path = Path(tmp_name)
+    try:
+        tmp_path.unlink()
+        if link:
+            _link_or_copy(source, tmp_path)
+        else:
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _apply(tasks: Dict[str, Task], record: dict) -> None:
+    op = record["op"]
+    if op == "upsert":
+        task = Task.from_dict(record["task"])
+        tasks[task.identifier] = task
+    elif op == "delete":
+        tasks.pop(record["identifier"], None)
+    elif op == "purge":
+        tasks.clear()
+    else:
+        raise ValueError(f"Unknown snapshot record: {op!r}")
@@ -0,0 +1,316 @@
+"""SQLite-backed task repository."""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import json
+from pathlib import Path
+import sqlite3
+from itertools import count
+from threading import RLock
+from typing import Any, Iterable, Iterator, List, Sequence, Tuple
+
+from .models import Task, deserialize_tasks
+from .repository import TaskRepository, VersionConflictError, versioned_write
+
+_TABLE = """
+CREATE TABLE IF NOT EXISTS {name} (
+    identifier TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    owner TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    description TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL,
+    completed_at TEXT,
+    completion_token TEXT,
+    version INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_SCHEMA = _TABLE.format(name="tasks") + """
+CREATE INDEX IF NOT EXISTS idx_tasks_owner ON tasks (owner, priority, completed_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_priority ON tasks (priority, completed_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at);
+CREATE INDEX IF NOT EXISTS idx_tasks_completed_at ON tasks (completed_at);
+"""
+
+_COLUMNS = "identifier, title, owner, priority, description, created_at, completed_at, completion_token, version"
+
+_UPSERT = f"""
+INSERT INTO tasks ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (identifier) DO UPDATE SET
+    title = excluded.title,
+    owner = excluded.owner,
+    priority = excluded.priority,
+    description = excluded.description,
+    created_at = excluded.created_at,
+    completed_at = excluded.completed_at,
+    completion_token = excluded.completion_token,
+    version = excluded.version
+"""
+
+# Only overwrite a row whose stored version is the one the caller read.
+_VERSIONED_UPSERT = _UPSERT + "WHERE tasks.version = excluded.version - 1\n"
+
+_BATCH_SIZE = 5000
+_MAX_PARAMS = 500
+_FETCH_SIZE = 500
+# Numbers the temporary tables that ``replace_batches`` stages into, so concurrent calls never share one.
+_STAGING_IDS = count()
+
+
+def _encode_timestamp(value: datetime | None) -> str | None:
+    """Encode timestamps as fixed-width UTC ISO strings so they sort lexically."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat(timespec="microseconds")
+
+
+def _to_row(task: Task) -> Tuple[Any, ...]:
+    return (
+        task.identifier,
+        task.title,
+        task.owner,
+        task.priority,
+        task.description,
+        _encode_timestamp(task.created_at),
+        _encode_timestamp(task.completed_at),
+        task.completion_token,
+        task.version,
+    )
+
+
+def _from_row(row: Sequence[Any]) -> Task:
+    identifier, title, owner, priority, description, created_at, completed_at, completion_token, version = row
+    # Rows were written by ``_to_row`` from validated tasks, so skip re-validation.
+    return Task.trusted(
+        identifier,
+        title,
+        owner,
+        priority,
+        description,
+        datetime.fromisoformat(created_at),
+        datetime.fromisoformat(completed_at) if completed_at else None,
+        completion_token,
+        version,
+    )
+
+
+def _chunked(rows: Iterable[Tuple[Any, ...]], size: int = _BATCH_SIZE) -> Iterator[List[Tuple[Any, ...]]]:
+    chunk: List[Tuple[Any, ...]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _filter(owner: str | None, priority: str | None, completed: bool | None) -> Tuple[str, List[Any]]:
+    """WHERE clause and parameters shared by filtered listings and counts."""
+    clauses: List[str] = []
+    params: List[Any] = []
+    if owner is not None:
+        clauses.append("owner = ?")
+        params.append(owner)
+    if priority is not None:
+        clauses.append("priority = ?")
+        params.append(priority.lower())
+    if completed is not None:
+        clauses.append("completed_at IS NOT NULL" if completed else "completed_at IS NULL")
+    return (f" WHERE {' AND '.join(clauses)}" if clauses else ""), params
+
+
+class SqliteTaskRepository(TaskRepository):
+    """Task repository stored in an SQLite database running in WAL mode.
+
+    Tasks are indexed by identifier, owner, priority and both timestamps so that
+    point lookups and filtered listings do not scale with the total task count.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._lock = RLock()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tasks)")}
+        if "version" not in columns:
+            self._conn.execute("ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def list(self) -> List[Task]:
+        with self._lock:
+            rows = self._conn.execute(f"SELECT {_COLUMNS} FROM tasks").fetchall()
+        return [_from_row(row) for row in rows]
+
+    def save(self, task: Task) -> Task:
+        self.save_many([task])
+        return task
+
+    def save_many(self, tasks: Iterable[Task]) -> List[Task]:
+        tasks = list(tasks)
+        with self._transaction():
+            with versioned_write({}, tasks):
+                for chunk in _chunked(_to_row(task) for task in tasks):
+                    before = self._conn.total_changes
+                    self._conn.executemany(_VERSIONED_UPSERT, chunk)
+                    if self._conn.total_changes - before != len(chunk):
+                        raise VersionConflictError("A task was modified concurrently; reload it and retry")
+        return tasks
+
+    def get(self, identifier: str) -> Task:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM tasks WHERE identifier = ?", (identifier,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(f"Task {identifier!r} not found")
+        return _from_row(row)
+
+    def delete(self, identifier: str) -> None:
+        with self._transaction():
+            self._conn.execute("DELETE FROM tasks WHERE identifier = ?", (identifier,))
+
+    def get_many(self, identifiers: Iterable[str], *, missing_ok: bool = False) -> List[Task]:
+        identifiers = list(identifiers)
+        found = {}
+        with self._lock:
+            for start in range(0, len(identifiers), _MAX_PARAMS):
+                chunk = identifiers[start:start + _MAX_PARAMS]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT {_COLUMNS} FROM tasks WHERE identifier IN ({placeholders})", chunk
+                ).fetchall()
+                found.update((row[0], row) for row in rows)
+        if not missing_ok:
+            for identifier in identifiers:
+                if identifier not in found:
+                    raise KeyError(f"Task {identifier!r} not found")
+        return [_from_row(found[identifier]) for identifier in identifiers if identifier in found]
+
+    def delete_many(self, identifiers: Iterable[str]) -> None:
+        with self._transaction():
+            for chunk in _chunked((identifier,) for identifier in identifiers):
+                self._conn.executemany("DELETE FROM tasks WHERE identifier = ?", chunk)
+
+    def replace_all(self, tasks: Iterable[Task]) -> None:
+        with self._transaction():
+            self._conn.execute("DELETE FROM tasks")
+            for chunk in _chunked(_to_row(task) for task in tasks):
+                self._conn.executemany(_UPSERT, chunk)
+
+    def replace_batches(self, batches: Iterable[List[Task]]) -> int:
+        """Stage ``batches`` in a temporary table, then swap it in with a single transaction."""
+        staging = f"staged_tasks_{next(_STAGING_IDS)}"
+        with self._lock:
+            self._conn.execute(_TABLE.format(name=f"temp.{staging}"))
+        try:
+            total = 0
+            for batch in batches:
+                with self._lock:
+                    self._conn.executemany(
+                        f"INSERT OR REPLACE INTO temp.{staging} ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [_to_row(task) for task in batch],
+                    )
+                total += len(batch)
+            with self._transaction():
+                self._conn.execute("DELETE FROM tasks")
+                self._conn.execute(f"INSERT INTO tasks ({_COLUMNS}) SELECT {_COLUMNS} FROM temp.{staging}")
+        finally:
+            with self._lock:
+                self._conn.execute(f"DROP TABLE IF EXISTS temp.{staging}")
+        return total
+
+    def iter_tasks(
+        self,
+        *,
+        owner: str | None = None,
+        priority: str | None = None,
+        completed: bool | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
+        where, params = _filter(owner, priority, completed)
+        params.extend([-1 if limit is None else limit, offset])
+        query = f"SELECT {_COLUMNS} FROM tasks{where} ORDER BY created_at LIMIT ? OFFSET ?"
+        return self._stream(query, params)
+
+    def iter_created(
+        self,
+        *,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        newest_first: bool = False,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
+        # A range scan over idx_tasks_created_at.
+        clauses: List[str] = []
+        params: List[Any] = []
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(_encode_timestamp(since))
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(_encode_timestamp(until))
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        params.append(-1 if limit is None else limit)
+        order = "created_at DESC" if newest_first else "created_at"
+        return self._stream(f"SELECT {_COLUMNS} FROM tasks{where} ORDER BY {order} LIMIT ?", params)
+
+    def _stream(self, query: str, params: Sequence[Any]) -> Iterator[Task]:
+        with self._lock:
+            cursor = self._conn.execute(query, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(_FETCH_SIZE)
+            if not rows:
+                break
+            for row in rows:
+                yield _from_row(row)
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM tasks").fetchone()[0])
+
+    def count_matching(
+        self, *, owner: str | None = None, priority: str | None = None, completed: bool | None = None
+    ) -> int:
+        where, params = _filter(owner, priority, completed)
+        with self._lock:
+            return int(self._conn.execute(f"SELECT COUNT(*) FROM tasks{where}", params).fetchone()[0])
+
+    def purge(self) -> int:
+        with self._transaction():
+            count = self._conn.execute("DELETE FROM tasks").rowcount
+        return count
+
+    def import_json(self, source: Path) -> int:
+        """Import every task from a JSON array store such as ``archon-data.json``."""
+        with source.open("r", encoding="utf-8") as fh:
+            records = json.load(fh)
+        tasks = deserialize_tasks(records)
+        with self._transaction():
+            for chunk in _chunked(_to_row(task) for task in tasks):
+                self._conn.executemany(_UPSERT, chunk)
+        return len(tasks)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
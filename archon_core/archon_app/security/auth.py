@@ -2,42 +2,191 @@
 from __future__ import annotations
 
 import base64
+import binascii
+from collections import OrderedDict
 import hashlib
 import hmac
 import json
 import os
-from datetime import datetime, timedelta, timezone
-from typing import Any, Dict
+import struct
+from threading import Lock
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..utils import metrics
+from .revocation import RevocationStore
+
+_SIGNATURE_SIZE = hashlib.sha256().digest_size
+_ENVELOPE_VERSION = 1
+# Binary envelope: version byte, issued-at and expires-at as integer epoch seconds.
+_HEADER = struct.Struct(">Bqq")
+_encode_payload = json.JSONEncoder(separators=(",", ":"), sort_keys=True).encode
 
 
 class TokenManager:
-    """Issue and validate signed tokens."""
+    """Issue and validate signed tokens.
+
+    Tokens are ``base64url(header + payload_json + hmac_sha256)`` where the header
+    packs integer epoch timestamps, so validation needs no ISO parsing. The keyed
+    HMAC state is computed once and copied per token. With ``cache_size`` > 0,
+    recently validated tokens are remembered by signature until they expire.
 
-    def __init__(self, ttl_seconds: int, secret: bytes | None = None):
+    Tokens can be revoked before they expire, one by one or for a whole task.
+    Revocations live in ``revocations`` (in memory unless a persisted
+    :class:`RevocationStore` is given) and are checked on every validation,
+    cached or not.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int,
+        secret: bytes | None = None,
+        cache_size: int = 0,
+        revocations: RevocationStore | None = None,
+    ):
         self._ttl = ttl_seconds
         self._secret = secret or os.urandom(32)
+        self._mac = hmac.new(self._secret, digestmod=hashlib.sha256)
+        self._cache_size = cache_size
+        # Entries are (body, issued_at, expires_at, payload, revocation generation checked against).
+        self._cache: "OrderedDict[bytes, Tuple[bytes, int, int, Dict[str, Any], int]]" = OrderedDict()
+        self._cache_lock = Lock()
+        self._revocations = revocations if revocations is not None else RevocationStore()
+
+    def _sign(self, message: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(message)
+        return mac.digest()
 
     def issue_token(self, payload: Dict[str, Any]) -> str:
-        issued_at = datetime.now(timezone.utc)
-        expiry = issued_at + timedelta(seconds=self._ttl)
-        envelope = {
-            "payload": payload,
-            "issued_at": issued_at.isoformat(),
-            "expires_at": expiry.isoformat(),
-        }
-        serialized = json.dumps(envelope, separators=(",", ":"), sort_keys=True).encode("utf-8")
-        signature = hmac.new(self._secret, serialized, hashlib.sha256).digest()
-        token_bytes = base64.urlsafe_b64encode(serialized + b"." + signature)
-        return token_bytes.decode("ascii")
+        return self.issue_tokens([payload])[0]
+
+    @metrics.timed("tokens.issue")
+    def issue_tokens(self, payloads: Iterable[Dict[str, Any]]) -> List[str]:
+        """Issue one token per payload, sharing the timestamp header across the batch."""
+        issued_at = int(time.time())
+        header = _HEADER.pack(_ENVELOPE_VERSION, issued_at, issued_at + self._ttl)
+        tokens = []
+        for payload in payloads:
+            body = header + _encode_payload(payload).encode("utf-8")
+            tokens.append(base64.urlsafe_b64encode(body + self._sign(body)).decode("ascii"))
+        metrics.inc("tokens.issued", len(tokens))
+        return tokens
 
+    @metrics.timed("tokens.validate")
     def validate_token(self, token: str) -> Dict[str, Any]:
-        decoded = base64.urlsafe_b64decode(token.encode("ascii"))
-        serialized, signature = decoded.rsplit(b".", 1)
-        expected = hmac.new(self._secret, serialized, hashlib.sha256).digest()
-        if not hmac.compare_digest(signature, expected):
+        metrics.inc("tokens.validated")
+        return self._validate(token, int(time.time()))
+
+    @metrics.timed("tokens.validate_many")
+    def validate_tokens(self, tokens: Iterable[str]) -> List[Optional[Dict[str, Any]]]:
+        """Validate many tokens; invalid or expired ones yield ``None`` instead of raising."""
+        now = int(time.time())
+        results: List[Optional[Dict[str, Any]]] = []
+        for token in tokens:
+            try:
+                results.append(self._validate(token, now))
+            except ValueError:
+                results.append(None)
+        metrics.inc("tokens.validated", len(results))
+        return results
+
+    def _split(self, token: str) -> Tuple[bytes, bytes]:
+        try:
+            decoded = base64.urlsafe_b64decode(token.encode("ascii"))
+        except (UnicodeEncodeError, binascii.Error):
+            raise ValueError("Malformed token") from None
+        if len(decoded) <= _SIGNATURE_SIZE:
+            raise ValueError("Malformed token")
+        # The signature is raw bytes and may itself contain b".", so split by length.
+        return decoded[:-_SIGNATURE_SIZE], decoded[-_SIGNATURE_SIZE:]
+
+    def _validate(self, token: str, now: int) -> Dict[str, Any]:
+        body, signature = self._split(token)
+
+        if self._cache_size:
+            with self._cache_lock:
+                cached = self._cache.get(signature)
+                if cached is not None and cached[0] == body:
+                    if now >= cached[2]:
+                        del self._cache[signature]
+                        raise ValueError("Token expired")
+                    self._cache.move_to_end(signature)
+                    generation = self._revocations.generation()
+                    if cached[4] != generation:
+                        if self._revocations.is_revoked(signature, cached[3].get("task_id"), cached[1]):
+                            del self._cache[signature]
+                            raise ValueError("Token revoked")
+                        self._cache[signature] = cached[:4] + (generation,)
+                    return dict(cached[3])
+
+        if body[:1] == b"{" and body[-1:] == b".":
+            issued_at, expires_at, payload = self._verify_legacy(body[:-1], signature)
+        else:
+            issued_at, expires_at, payload = self._verify(body, signature)
+        if now >= expires_at:
+            raise ValueError("Token expired")
+        generation = self._revocations.generation()
+        if self._revocations.is_revoked(signature, payload.get("task_id"), issued_at):
+            raise ValueError("Token revoked")
+
+        if self._cache_size:
+            with self._cache_lock:
+                self._cache[signature] = (body, issued_at, expires_at, payload, generation)
+                if len(self._cache) > self._cache_size:
+                    self._cache.popitem(last=False)
+            return dict(payload)
+        return payload
+
+    def _verify(self, body: bytes, signature: bytes) -> Tuple[int, int, Dict[str, Any]]:
+        if not hmac.compare_digest(signature, self._sign(body)):
+            raise ValueError("Invalid token signature")
+        if len(body) < _HEADER.size or body[0] != _ENVELOPE_VERSION:
+            raise ValueError("Unsupported token format")
+        _, issued_at, expires_at = _HEADER.unpack_from(body)
+        return issued_at, expires_at, json.loads(body[_HEADER.size:])
+
+    def _verify_legacy(self, serialized: bytes, signature: bytes) -> Tuple[int, int, Dict[str, Any]]:
+        """Accept tokens issued with the original ``json + "." + signature`` envelope."""
+        if not hmac.compare_digest(signature, self._sign(serialized)):
             raise ValueError("Invalid token signature")
         envelope = json.loads(serialized.decode("utf-8"))
         expires_at = datetime.fromisoformat(envelope["expires_at"]).astimezone(timezone.utc)
-        if datetime.now(timezone.utc) >= expires_at:
-            raise ValueError("Token expired")
-        return envelope["payload"]
+        # Legacy issue times are free-form; treat them as older than any revocation.
+        return 0, int(expires_at.timestamp()), envelope["payload"]
+
+    def revoke(self, tokens: str | Iterable[str]) -> int:
+        """Revoke tokens before they expire and return how many were recorded.
+
+        The signature is not checked, so tokens issued by another process (with
+        another secret) can be revoked too; expired tokens are ignored. Their
+        lifetime is capped at this manager's TTL, which bounds how long a
+        forged header can keep an entry alive.
+        """
+        if isinstance(tokens, str):
+            tokens = [tokens]
+        now = int(time.time())
+        entries = []
+        for token in tokens:
+            body, signature = self._split(token)
+            if body[:1] == b"{" and body[-1:] == b".":
+                envelope = json.loads(body[:-1].decode("utf-8"))
+                expires_at = int(datetime.fromisoformat(envelope["expires_at"]).timestamp())
+            elif len(body) >= _HEADER.size and body[0] == _ENVELOPE_VERSION:
+                expires_at = _HEADER.unpack_from(body)[2]
+            else:
+                raise ValueError("Unsupported token format")
+            entries.append((signature, min(expires_at, now + self._ttl)))
+        if self._cache_size:
+            with self._cache_lock:
+                for signature, _ in entries:
+                    self._cache.pop(signature, None)
+        return self._revocations.revoke_signatures(entries)
+
+    def revoke_task(self, task_id: str) -> None:
+        """Revoke every token issued for ``task_id`` so far; tokens issued later are unaffected."""
+        self._revocations.revoke_task(task_id, int(time.time()) + self._ttl)
+
+    def close(self) -> None:
+        self._revocations.close()
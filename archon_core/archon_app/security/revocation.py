@@ -0,0 +1,208 @@
+"""Revocation of completion tokens before they expire."""
+from __future__ import annotations
+
+import math
+from pathlib import Path
+import sqlite3
+from threading import Lock
+import time
+from typing import Iterable, Tuple
+
+from ..utils import metrics
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS revocations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    key BLOB NOT NULL,
+    revoked_at INTEGER NOT NULL,
+    expires_at INTEGER NOT NULL,
+    UNIQUE (kind, key)
+);
+CREATE INDEX IF NOT EXISTS idx_revocations_expires_at ON revocations (expires_at);
+"""
+
+_MIN_CAPACITY = 1024
+
+
+class BloomFilter:
+    """In-memory Bloom filter with two probes derived from the built-in ``hash``.
+
+    The filter never leaves the process, so the (per-process salted) string
+    and bytes hash is good enough and costs far less than a cryptographic
+    one. Two probes keep lookups cheap; the bit array is sized so that
+    ``capacity`` keys still stay within ``error_rate``.
+    """
+
+    __slots__ = ("bits", "size", "capacity")
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        # For k probes the false-positive rate is (1 - e^(-k*n/m))^k; solve for m with k = 2.
+        self.size = max(64, math.ceil(-2 * self.capacity / math.log(1 - math.sqrt(error_rate))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def add(self, key: str | bytes) -> None:
+        digest, size = hash(key), self.size
+        for position in (digest % size, (digest // size) % size):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str | bytes) -> bool:
+        return _maybe_member(self.bits, self.size, key)
+
+
+def _maybe_member(bits: bytearray, size: int, key: str | bytes) -> bool:
+    digest = hash(key)
+    position = digest % size
+    if not bits[position >> 3] >> (position & 7) & 1:
+        return False
+    position = (digest // size) % size
+    return bool(bits[position >> 3] >> (position & 7) & 1)
+
+
+class RevocationStore:
+    """Revoked token signatures and task ids in SQLite, fronted by an in-memory Bloom filter.
+
+    A lookup for a key that was never revoked stops at the Bloom filter, so
+    only revoked keys and the rare false positive reach the database. Entries
+    revoked by other processes are picked up every ``refresh_interval``
+    seconds. Entries are pruned once ``expires_at`` has passed, since the
+    tokens they cover can no longer validate anyway.
+
+    ``path=None`` keeps everything in memory for the life of the process.
+    """
+
+    def __init__(self, path: Path | None = None, refresh_interval: float = 1.0, error_rate: float = 0.01):
+        self._path = path
+        self._refresh_interval = refresh_interval
+        self._error_rate = error_rate
+        self._lock = Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._bloom = BloomFilter(_MIN_CAPACITY, error_rate)
+        self._count = 0
+        # Keys added to the Bloom filter since it was last built, pruned ones included.
+        self._added = 0
+        self._generation = 0
+        self._last_id = 0
+        # Nobody else can write to an in-memory store, so it never needs polling.
+        self._next_refresh = 0.0 if path is not None else math.inf
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self._path is None:
+                target = ":memory:"
+            else:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                target = str(self._path)
+            conn = sqlite3.connect(target, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=5000")
+            if self._path is not None:
+                conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._prune(int(time.time()))
+        return self._conn
+
+    def _prune(self, now: int) -> None:
+        assert self._conn is not None
+        self._conn.execute("DELETE FROM revocations WHERE expires_at <= ?", (now,))
+
+    def _refresh(self) -> None:
+        """Add keys revoked since the last refresh (by any process) to the Bloom filter."""
+        conn = self._connection()
+        query = "SELECT id, kind, key FROM revocations WHERE id > ? ORDER BY id"
+        rows = conn.execute(query, (self._last_id,)).fetchall()
+        live = conn.execute("SELECT COUNT(*) FROM revocations").fetchone()[0]
+        added = self._added + len(rows)
+        # Pruned keys (here or by another process) keep their bits set until the filter is rebuilt.
+        # Rebuild once the filter holds more keys than it was sized for, or once pruned keys
+        # outnumber live ones; either way the rebuild costs no more than the keys added since.
+        if added > self._bloom.capacity or added - live > live:
+            self._bloom = BloomFilter(max(2 * live, _MIN_CAPACITY), self._error_rate)
+            rows = conn.execute(query, (0,)).fetchall()
+            added = len(rows)
+        if rows:
+            self._generation += 1
+        for row_id, kind, key in rows:
+            # Task ids go in as text, since that is what validation looks them up by.
+            self._bloom.add(key.decode("utf-8") if kind == "task" else key)
+            self._last_id = row_id
+        self._added = added
+        self._count = live
+        if self._path is not None:
+            self._next_refresh = time.monotonic() + self._refresh_interval
+
+    def _revoke(self, entries: Iterable[Tuple[str, bytes, int, int]]) -> int:
+        now = int(time.time())
+        entries = [entry for entry in entries if entry[3] > now]
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._prune(now)
+                conn.executemany(
+                    "INSERT OR REPLACE INTO revocations (kind, key, revoked_at, expires_at) VALUES (?, ?, ?, ?)",
+                    entries,
+                )
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            self._refresh()
+        metrics.inc("tokens.revoked", len(entries))
+        return len(entries)
+
+    def revoke_signatures(self, signatures: Iterable[Tuple[bytes, int]]) -> int:
+        """Revoke tokens by ``(signature, expires_at)``; already expired tokens are skipped."""
+        now = int(time.time())
+        return self._revoke(("token", signature, now, expires_at) for signature, expires_at in signatures)
+
+    def revoke_task(self, task_id: str, expires_at: int) -> None:
+        """Revoke every token for ``task_id`` issued up to now; ``expires_at`` bounds their lifetime."""
+        self._revoke([("task", task_id.encode("utf-8"), int(time.time()), expires_at)])
+
+    def _revoked_at(self, kind: str, key: bytes) -> int | None:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT revoked_at FROM revocations WHERE kind = ? AND key = ? AND expires_at > ?",
+                (kind, key, int(time.time())),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def generation(self) -> int:
+        """A number that changes whenever revocations are added, here or by another process.
+
+        A token found not revoked stays that way while the generation is unchanged.
+        """
+        if time.monotonic() >= self._next_refresh:
+            with self._lock:
+                self._refresh()
+        return self._generation
+
+    def is_revoked(self, signature: bytes, task_id: object, issued_at: int) -> bool:
+        """Whether the token with ``signature``, issued at ``issued_at`` for ``task_id``, is revoked."""
+        if time.monotonic() >= self._next_refresh:
+            with self._lock:
+                self._refresh()
+        if not self._count:
+            return False
+        # Probe inline rather than through ``in``: this runs on every validation.
+        bits, size = self._bloom.bits, self._bloom.size
+        if _maybe_member(bits, size, signature) and self._revoked_at("token", signature) is not None:
+            return True
+        if isinstance(task_id, str) and _maybe_member(bits, size, task_id):
+            revoked_at = self._revoked_at("task", task_id.encode("utf-8"))
+            # Tokens issued after the revocation (say, on re-completion) stay valid.
+            return revoked_at is not None and issued_at <= revoked_at
+        return False
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh()
+            return self._count
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
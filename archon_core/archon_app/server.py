@@ -0,0 +1,301 @@
+"""Asynchronous HTTP/JSON server exposing the task service."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from http import HTTPStatus
+import json
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .data.repository import VersionConflictError
+from .services.async_service import AsyncTaskService
+from .services.task_service import TaskService
+from .utils import metrics
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+_PRIORITIES = {"low", "medium", "high"}
+
+
+class HTTPError(Exception):
+    """An error that maps directly onto an HTTP response."""
+
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+@dataclass(slots=True)
+class Request:
+    """A parsed HTTP request."""
+
+    method: str
+    path: str
+    query: Dict[str, List[str]] = field(default_factory=dict)
+    body: bytes = b""
+    params: Dict[str, str] = field(default_factory=dict)
+
+    def arg(self, name: str) -> Optional[str]:
+        values = self.query.get(name)
+        return values[-1] if values else None
+
+
+Handler = Callable[[Request], Awaitable[Tuple[HTTPStatus, Any]]]
+
+
+def _parse_bool(value: Optional[str], name: str) -> Optional[bool]:
+    if value is None:
+        return None
+    lowered = value.lower()
+    if lowered in {"1", "true", "yes"}:
+        return True
+    if lowered in {"0", "false", "no"}:
+        return False
+    raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be a boolean")
+
+
+def _parse_int(value: Optional[str], name: str, default: Optional[int], minimum: int) -> Optional[int]:
+    if value is None:
+        return default
+    try:
+        parsed = int(value)
+    except ValueError:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer") from None
+    if parsed < minimum:
+        raise HTTPError(HTTPStatus.BAD_REQUEST, f"{name} must be at least {minimum}")
+    return parsed
+
+
+class TaskServer:
+    """Long-lived HTTP/1.1 server with keep-alive over an :class:`AsyncTaskService`."""
+
+    def __init__(self, service: AsyncTaskService, host: str = "127.0.0.1", port: int = 8080):
+        self._service = service
+        self._host = host
+        self._port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._routes: List[Tuple[str, re.Pattern[str], Handler]] = [
+            ("GET", re.compile(r"^/health$"), self._health),
+            ("GET", re.compile(r"^/metrics$"), self._metrics),
+            ("GET", re.compile(r"^/tasks$"), self._list_tasks),
+            ("POST", re.compile(r"^/tasks$"), self._create_task),
+            ("GET", re.compile(r"^/tasks/(?P<identifier>[^/]+)$"), self._get_task),
+            ("POST", re.compile(r"^/tasks/(?P<identifier>[^/]+)/complete$"), self._complete_task),
+            ("POST", re.compile(r"^/purge$"), self._purge_tasks),
+            ("POST", re.compile(r"^/import$"), self._import_tasks),
+        ]
+
+    @property
+    def port(self) -> int:
+        if self._server is None or not self._server.sockets:
+            return self._port
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, self._host, self._port)
+        logger.info("Serving on http://%s:%s", self._host, self.port)
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        assert self._server is not None
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    request, keep_alive = await self._read_request(reader)
+                except asyncio.IncompleteReadError:
+                    break
+                except HTTPError as exc:
+                    await self._respond(writer, exc.status, {"error": exc.message}, keep_alive=False)
+                    break
+                status, payload = await self._dispatch(request)
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[Request, bool]:
+        head = await reader.readuntil(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Malformed request line") from None
+        headers: Dict[str, str] = {}
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = _parse_int(headers.get("content-length"), "Content-Length", 0, 0) or 0
+        if length > MAX_BODY_BYTES:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+        url = urlsplit(target)
+        request = Request(method=method.upper(), path=unquote(url.path), query=parse_qs(url.query), body=body)
+        return request, keep_alive
+
+    async def _dispatch(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        path_matched = False
+        for method, pattern, handler in self._routes:
+            match = pattern.match(request.path)
+            if not match:
+                continue
+            if method != request.method:
+                path_matched = True
+                continue
+            request.params = match.groupdict()
+            try:
+                return await handler(request)
+            except HTTPError as exc:
+                return exc.status, {"error": exc.message}
+            except KeyError as exc:
+                return HTTPStatus.NOT_FOUND, {"error": str(exc.args[0]) if exc.args else "Not found"}
+            except VersionConflictError as exc:
+                return HTTPStatus.CONFLICT, {"error": str(exc)}
+            except ValueError as exc:
+                return HTTPStatus.BAD_REQUEST, {"error": str(exc)}
+            except Exception:  # pragma: no cover - defensive guard for unexpected failures
+                logger.exception("Unhandled error serving %s %s", request.method, request.path)
+                return HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}
+        if path_matched:
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Method not allowed"}
+        return HTTPStatus.NOT_FOUND, {"error": "Not found"}
+
+    async def _respond(
+        self, writer: asyncio.StreamWriter, status: HTTPStatus, payload: Any, keep_alive: bool
+    ) -> None:
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            content_type = "application/json"
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _json(self, request: Request) -> Any:
+        # Bodies run up to MAX_BODY_BYTES, so decode them on the executor, not the event loop.
+        if not request.body:
+            return {}
+        try:
+            return await self._service.decode_json(request.body)
+        except ValueError as exc:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Invalid JSON body: {exc}") from exc
+
+    async def _health(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        return HTTPStatus.OK, {"status": "ok"}
+
+    async def _metrics(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        snapshot = metrics.REGISTRY.snapshot()
+        if request.arg("format") == "json":
+            return HTTPStatus.OK, snapshot
+        return HTTPStatus.OK, metrics.to_prometheus(snapshot)
+
+    async def _list_tasks(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        priority = request.arg("priority")
+        if priority is not None and priority.lower() not in _PRIORITIES:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unsupported priority level: {priority!r}")
+        tasks = await self._service.list_tasks(
+            owner=request.arg("owner"),
+            priority=priority,
+            completed=_parse_bool(request.arg("completed"), "completed"),
+            offset=_parse_int(request.arg("offset"), "offset", 0, 0) or 0,
+            limit=_parse_int(request.arg("limit"), "limit", None, 1),
+        )
+        return HTTPStatus.OK, {"tasks": [task.to_dict() for task in tasks]}
+
+    async def _create_task(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        payload = await self._json(request)
+        if isinstance(payload, list):
+            for index, item in enumerate(payload, start=1):
+                if not isinstance(item, dict):
+                    raise HTTPError(HTTPStatus.BAD_REQUEST, f"Task #{index}: expected a task object")
+            tasks = await self._service.create_many(payload)
+            return HTTPStatus.CREATED, {"tasks": [task.to_dict() for task in tasks]}
+        if not isinstance(payload, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected a task object or a list of task objects")
+        task = await self._service.create_task(
+            title=str(payload.get("title") or ""),
+            owner=str(payload.get("owner") or ""),
+            priority=str(payload.get("priority") or "medium"),
+            description=str(payload.get("description") or ""),
+        )
+        return HTTPStatus.CREATED, task.to_dict()
+
+    async def _get_task(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        task = await self._service.get_task(request.params["identifier"])
+        return HTTPStatus.OK, task.to_dict()
+
+    async def _complete_task(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        identifier = request.params["identifier"]
+        token = await self._service.complete_task(identifier)
+        return HTTPStatus.OK, {"task_id": identifier, "completion_token": token}
+
+    async def _purge_tasks(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        payload = await self._json(request)
+        force = _parse_bool(request.arg("force"), "force") or (isinstance(payload, dict) and payload.get("force") is True)
+        if not force:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Refusing to purge without force")
+        count = await self._service.purge_tasks()
+        return HTTPStatus.OK, {"purged": count}
+
+    async def _import_tasks(self, request: Request) -> Tuple[HTTPStatus, Any]:
+        payload = await self._json(request)
+        records = payload.get("tasks") if isinstance(payload, dict) else payload
+        if not isinstance(records, list):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected a list of task objects")
+        tasks = await self._service.decode_tasks(records)
+        await self._service.import_tasks(tasks)
+        return HTTPStatus.OK, {"imported": len(tasks)}
+
+
+def run_server(service: TaskService, host: str, port: int, workers: int = 4) -> None:
+    """Serve ``service`` over HTTP until interrupted."""
+
+    async def _main() -> None:
+        async_service = AsyncTaskService(service, max_workers=workers)
+        server = TaskServer(async_service, host=host, port=port)
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+            await async_service.close()
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        logger.info("Server stopped")
@@ -0,0 +1,84 @@
+"""Asyncio facade over the task service."""
+from __future__ import annotations
+
+import asyncio
+import json
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Mapping, TypeVar
+
+from ..data.models import Task
+from .task_service import TaskService
+
+T = TypeVar("T")
+
+
+class AsyncTaskService:
+    """Run blocking :class:`TaskService` calls on a thread pool for asyncio callers."""
+
+    def __init__(self, service: TaskService, executor: Executor | None = None, max_workers: int = 4):
+        self._service = service
+        self._owns_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="archon-io")
+
+    async def _call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def decode_json(self, body: bytes) -> Any:
+        """Parse a request body off the event loop; raises ``ValueError`` on bad JSON."""
+        return await self._call(json.loads, body)
+
+    async def decode_tasks(self, records: List[Any]) -> List[Task]:
+        """Build tasks from decoded records off the event loop."""
+
+        def _decode() -> List[Task]:
+            if not all(isinstance(record, dict) for record in records):
+                raise ValueError("Expected a list of task objects")
+            return [Task.from_dict(record) for record in records]
+
+        return await self._call(_decode)
+
+    async def list_tasks(
+        self,
+        *,
+        owner: str | None = None,
+        priority: str | None = None,
+        completed: bool | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> List[Task]:
+        def _page() -> List[Task]:
+            return list(
+                self._service.iter_tasks(
+                    owner=owner, priority=priority, completed=completed, offset=offset, limit=limit
+                )
+            )
+
+        return await self._call(_page)
+
+    async def create_task(self, title: str, owner: str, priority: str, description: str = "") -> Task:
+        return await self._call(self._service.create_task, title, owner, priority, description)
+
+    async def create_many(self, specs: Iterable[Mapping[str, str]]) -> List[Task]:
+        return await self._call(self._service.create_many, list(specs))
+
+    async def get_task(self, identifier: str) -> Task:
+        return await self._call(self._service.get_task, identifier)
+
+    async def complete_task(self, identifier: str) -> str:
+        return await self._call(self._service.complete_task, identifier)
+
+    async def complete_many(self, identifiers: Iterable[str]) -> Dict[str, str]:
+        return await self._call(self._service.complete_many, list(identifiers))
+
+    async def purge_tasks(self) -> int:
+        return await self._call(self._service.purge_tasks)
+
+    async def import_tasks(self, tasks: List[Task]) -> None:
+        await self._call(self._service.import_tasks, tasks)
+
+    async def close(self) -> None:
+        """Shut down the thread pool if this facade created it."""
+        if self._owns_executor:
+            await asyncio.get_running_loop().run_in_executor(None, partial(self._executor.shutdown, wait=True))
@@ -0,0 +1,322 @@
+"""Priority-ordered execution of open tasks on a worker pool."""
+from __future__ import annotations
+
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+import heapq
+import importlib
+from itertools import count
+import logging
+import math
+from threading import Condition, Thread
+import time
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+from ..data.codecs import to_epoch_us
+from ..data.models import PRIORITY_CODES, Task
+from ..utils import metrics
+from .task_service import TaskService
+
+logger = logging.getLogger(__name__)
+
+POOLS = ("thread", "process")
+
+Handler = Callable[[Task], object]
+
+
+def log_handler(task: Task) -> None:
+    """Default handler: record that the task ran."""
+    logger.info("Running task %s (%s, %s): %s", task.identifier, task.owner, task.priority, task.title)
+
+
+def noop_handler(task: Task) -> None:
+    """Do nothing; useful for measuring the dispatcher itself."""
+
+
+def load_handler(spec: str) -> Handler:
+    """Resolve ``module:function`` to a callable (module-level so process pools can pickle it)."""
+    module_name, _, attribute = spec.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Handler must look like 'module:function', got {spec!r}")
+    handler = getattr(importlib.import_module(module_name), attribute, None)
+    if not callable(handler):
+        raise ValueError(f"{spec!r} is not callable")
+    return handler
+
+
+def _sort_key(task: Task) -> Tuple[int, int]:
+    # Higher priority first, then oldest first.
+    return (-PRIORITY_CODES[task.priority], to_epoch_us(task.created_at))
+
+
+class ReadyQueue:
+    """Heap of runnable tasks ordered by priority, then ``created_at``.
+
+    With ``fair`` each owner gets their own heap, and owners take turns among
+    those whose next task has the highest priority, so one owner's backlog
+    cannot starve another owner's tasks of the same priority.
+    """
+
+    def __init__(self, fair: bool = False):
+        self._fair = fair
+        self._seq = count()
+        self._heap: List[tuple] = []
+        self._owners: Dict[str, List[tuple]] = {}
+        self._turns: List[tuple] = []  # (priority key, last turn, owner); stale entries are skipped
+        self._current: Dict[str, tuple] = {}
+        self._turn = count()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, task: Task, attempt: int = 0) -> None:
+        entry = (*_sort_key(task), next(self._seq), task, attempt)
+        self._size += 1
+        if not self._fair:
+            heapq.heappush(self._heap, entry)
+            return
+        heap = self._owners.setdefault(task.owner, [])
+        heapq.heappush(heap, entry)
+        if heap[0] is entry:
+            last_turn = self._current[task.owner][1] if task.owner in self._current else -1
+            self._schedule(task.owner, last_turn)
+
+    def _schedule(self, owner: str, last_turn: int) -> None:
+        turn = (self._owners[owner][0][0], last_turn, owner)
+        self._current[owner] = turn
+        heapq.heappush(self._turns, turn)
+
+    def pop(self) -> Tuple[Task, int]:
+        if not self._size:
+            raise IndexError("pop from an empty ReadyQueue")
+        self._size -= 1
+        if not self._fair:
+            entry = heapq.heappop(self._heap)
+            return entry[3], entry[4]
+        while True:
+            turn = heapq.heappop(self._turns)
+            owner = turn[2]
+            if self._current.get(owner) == turn:
+                break
+        heap = self._owners[owner]
+        entry = heapq.heappop(heap)
+        if heap:
+            self._schedule(owner, next(self._turn))
+        else:
+            del self._owners[owner]
+            del self._current[owner]
+        return entry[3], entry[4]
+
+
+@dataclass(slots=True)
+class Lease:
+    task: Task
+    attempt: int
+    started: float | None = None  # monotonic time the handler began; None while queued in the pool
+
+    def deadline(self, timeout: float) -> float:
+        return math.inf if self.started is None else self.started + timeout
+
+
+def _run_leased(handler: Handler, lease: Lease) -> object:
+    lease.started = time.monotonic()
+    return handler(lease.task)
+
+
+@dataclass(slots=True)
+class DispatchStats:
+    dispatched: int = 0
+    completed: int = 0
+    failed: int = 0
+    retried: int = 0
+    expired: int = 0
+    seconds: float = 0.0
+
+    @property
+    def per_second(self) -> float:
+        return self.dispatched / self.seconds if self.seconds else 0.0
+
+
+class Dispatcher:
+    """Lease ready tasks to a worker pool and record their completion in batches.
+
+    Each dispatched task is leased for ``lease_timeout`` seconds. A handler
+    that raises, or a lease that expires, sends the task back to the queue
+    until it has been tried ``max_attempts`` times. Results of expired leases
+    are ignored; a running thread cannot be interrupted, so its slot stays busy
+    until the handler returns.
+
+    A lease starts when its handler does, not while the task waits in the
+    pool's queue. Thread pools record that moment themselves and keep a few
+    tasks queued per worker; process pools cannot report it back, so they
+    are only handed a task while a worker is free.
+
+    Successful tasks are completed through :meth:`TaskService.complete_many`
+    on a separate thread, once ``batch_size`` are waiting or ``flush_interval``
+    seconds after the first one, so token issuance and persistence happen once
+    per batch and never hold up dispatching.
+    """
+
+    def __init__(
+        self,
+        service: TaskService,
+        handler: Handler = log_handler,
+        *,
+        workers: int = 4,
+        pool: str = "thread",
+        lease_timeout: float = 30.0,
+        max_attempts: int = 3,
+        batch_size: int = 256,
+        flush_interval: float = 0.05,
+        fair: bool = False,
+    ):
+        if pool not in POOLS:
+            raise ValueError(f"Unsupported worker pool: {pool!r}")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self._service = service
+        self._handler = handler
+        self._workers = workers
+        self._pool = pool
+        self._lease_timeout = lease_timeout
+        self._max_attempts = max_attempts
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue = ReadyQueue(fair=fair)
+        self._pending: List[str] = []
+        self._ready = Condition()
+        self._stopping = False
+        self.stats = DispatchStats()
+
+    def submit(self, tasks: Iterable[Task]) -> int:
+        """Queue the open tasks among ``tasks`` and return how many were queued."""
+        queued = 0
+        for task in tasks:
+            if not task.is_completed:
+                self._queue.push(task)
+                queued += 1
+        return queued
+
+    def _executor(self) -> Executor:
+        if self._pool == "process":
+            return ProcessPoolExecutor(max_workers=self._workers)
+        return ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="archon-dispatch")
+
+    def run(self) -> DispatchStats:
+        """Dispatch until the queue is empty and no lease is outstanding."""
+        started = time.perf_counter()
+        leases: Dict[Future, Lease] = {}
+        # Handlers whose lease expired but that still occupy a worker.
+        overdue: Set[Future] = set()
+        if self._pool == "process":
+            window = self._workers
+        else:
+            # Keep a few tasks queued per worker so workers never wait on this loop.
+            window = self._workers * 4
+        executor = self._executor()
+        completer = Thread(target=self._complete_loop, name="archon-dispatch-completer", daemon=True)
+        completer.start()
+        try:
+            while self._queue or leases:
+                while self._queue and len(leases) + len(overdue) < window:
+                    lease = Lease(*self._queue.pop())
+                    if self._pool == "process":
+                        lease.started = time.monotonic()
+                        future = executor.submit(self._handler, lease.task)
+                    else:
+                        future = executor.submit(_run_leased, self._handler, lease)
+                    leases[future] = lease
+                    self.stats.dispatched += 1
+                timeout = None
+                if leases:
+                    # A lease that has not started yet cannot expire sooner than a full timeout from now.
+                    first = min(lease.deadline(self._lease_timeout) for lease in leases.values())
+                    timeout = max(0.0, min(first - time.monotonic(), self._lease_timeout))
+                done, _ = wait([*leases, *overdue], timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future in leases:
+                        self._finish(leases.pop(future), future)
+                    else:
+                        overdue.discard(future)
+                overdue.update(self._expire(leases))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            with self._ready:
+                self._stopping = True
+                self._ready.notify()
+            completer.join()
+            self.stats.seconds = time.perf_counter() - started
+        metrics.inc("dispatch.dispatched", self.stats.dispatched)
+        return self.stats
+
+    def _finish(self, lease: Lease, future: Future) -> None:
+        error = future.exception()
+        if error is None:
+            with self._ready:
+                self._pending.append(lease.task.identifier)
+                if len(self._pending) == 1 or len(self._pending) >= self._batch_size:
+                    self._ready.notify()
+            return
+        logger.warning("Task %s failed on attempt %d: %s", lease.task.identifier, lease.attempt + 1, error)
+        self._retry(lease)
+
+    def _expire(self, leases: Dict[Future, Lease]) -> List[Future]:
+        """Drop expired leases and requeue their tasks; returns the futures still running."""
+        now = time.monotonic()
+        running = []
+        for future, lease in list(leases.items()):
+            if lease.deadline(self._lease_timeout) <= now:
+                del leases[future]
+                if not future.done():
+                    running.append(future)
+                self.stats.expired += 1
+                logger.warning("Lease on task %s expired", lease.task.identifier)
+                self._retry(lease)
+        return running
+
+    def _retry(self, lease: Lease) -> None:
+        if lease.attempt + 1 < self._max_attempts:
+            self.stats.retried += 1
+            self._queue.push(lease.task, lease.attempt + 1)
+        else:
+            with self._ready:
+                self.stats.failed += 1
+
+    def _complete_loop(self) -> None:
+        # Group commit: completions pile up while a batch is being written, so
+        # batches grow to match the store's write latency.
+        while True:
+            with self._ready:
+                while not self._pending and not self._stopping:
+                    self._ready.wait()
+                deadline = time.monotonic() + self._flush_interval
+                while len(self._pending) < self._batch_size and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._ready.wait(remaining)
+                batch, self._pending = self._pending, []
+                if not batch and self._stopping:
+                    return
+            self._complete(batch)
+
+    def _complete(self, batch: List[str]) -> None:
+        try:
+            self._service.complete_many(batch)
+            completed, failed = len(batch), 0
+        except KeyError:
+            # A task was deleted while it ran; complete the rest one by one.
+            completed = failed = 0
+            for identifier in batch:
+                try:
+                    self._service.complete_task(identifier)
+                    completed += 1
+                except KeyError:
+                    failed += 1
+        except Exception:
+            logger.exception("Could not record %d completed tasks", len(batch))
+            completed, failed = 0, len(batch)
+        with self._ready:
+            self.stats.completed += completed
+            self.stats.failed += failed
@@ -0,0 +1,293 @@
+"""Asynchronous, batched delivery of task lifecycle notifications."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+import json
+import logging
+from pathlib import Path
+import queue
+import random
+from threading import Event, Lock, Thread
+import time
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+OVERFLOW_POLICIES = ("drop_new", "drop_oldest", "block")
+_STOP = object()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass(slots=True)
+class Notification:
+    """A single task lifecycle event addressed to ``recipient``."""
+
+    event: str
+    recipient: str
+    task_id: str | None = None
+    title: str = ""
+    created_at: datetime = field(default_factory=_utcnow)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "event": self.event,
+            "task_id": self.task_id,
+            "title": self.title,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+class NotificationSink:
+    """Delivers a batch of notifications for one recipient over one channel."""
+
+    def send(self, channel: str, recipient: str, notifications: Sequence[Notification]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release any resources held by the sink."""
+
+
+class FileSink(NotificationSink):
+    """Append each delivered message as a JSON line; a local stand-in for email/SMS."""
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._lock = Lock()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+    def send(self, channel: str, recipient: str, notifications: Sequence[Notification]) -> None:
+        message = {
+            "channel": channel,
+            "recipient": recipient,
+            "sent_at": _utcnow().isoformat(),
+            "notifications": [notification.to_dict() for notification in notifications],
+        }
+        line = json.dumps(message, separators=(",", ":")) + "\n"
+        with self._lock, self._path.open("a", encoding="utf-8") as fh:
+            fh.write(line)
+
+
+class LoggingSink(NotificationSink):
+    """Log each delivered message, in the spirit of an SMTP debugging server."""
+
+    def __init__(self, log: logging.Logger | None = None):
+        self._log = log or logger
+
+    def send(self, channel: str, recipient: str, notifications: Sequence[Notification]) -> None:
+        events = ", ".join(f"{n.event}:{n.task_id or '-'}" for n in notifications)
+        self._log.info("[%s] to %s: %s", channel, recipient, events)
+
+
+def coalesce(notifications: Iterable[Notification]) -> Dict[str, List[Notification]]:
+    """Group notifications by recipient, dropping repeats of the same event for the same task."""
+    grouped: Dict[str, Dict[tuple, Notification]] = {}
+    for notification in notifications:
+        key = (notification.event, notification.task_id)
+        grouped.setdefault(notification.recipient, {}).setdefault(key, notification)
+    return {recipient: list(events.values()) for recipient, events in grouped.items()}
+
+
+class Notifier:
+    """Fan task events out to a sink without ever blocking the caller for long.
+
+    Events are routed by recipient to one of ``workers`` bounded queues, so a
+    recipient's events stay ordered and can be coalesced. Each worker drains up
+    to ``batch_size`` events (waiting at most ``flush_interval`` seconds for a
+    batch to fill), groups them per recipient and delivers one message per
+    recipient and channel, retrying failures with exponential backoff.
+
+    When a queue is full, ``overflow`` decides: ``drop_new`` discards the new
+    event, ``drop_oldest`` evicts the oldest queued one, and ``block`` waits up to
+    ``block_timeout`` seconds before discarding it.
+    """
+
+    def __init__(
+        self,
+        sink: NotificationSink,
+        channels: Sequence[str] = ("email",),
+        *,
+        queue_size: int = 10_000,
+        workers: int = 1,
+        batch_size: int = 100,
+        flush_interval: float = 0.2,
+        max_retries: int = 3,
+        backoff: float = 0.1,
+        overflow: str = "drop_oldest",
+        block_timeout: float = 0.05,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unsupported overflow policy: {overflow!r}")
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self._sink = sink
+        self._channels = tuple(channels)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_retries = max_retries
+        self._backoff = backoff
+        self._overflow = overflow
+        self._block_timeout = block_timeout
+        self._stop = Event()
+        self._closed = False
+        self._stats_lock = Lock()
+        self._stats = {"published": 0, "dropped": 0, "delivered": 0, "failed": 0, "retries": 0}
+        per_queue = max(1, queue_size // workers)
+        self._queues: List[queue.Queue] = [queue.Queue(maxsize=per_queue) for _ in range(workers)]
+        self._threads = [
+            Thread(target=self._run, args=(q,), name=f"archon-notifier-{index}", daemon=True)
+            for index, q in enumerate(self._queues)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def publish(self, notification: Notification) -> bool:
+        """Queue ``notification``; returns ``False`` if it was dropped."""
+        if self._closed:
+            self._count("dropped")
+            return False
+        target = self._queues[hash(notification.recipient) % len(self._queues)]
+        try:
+            target.put_nowait(notification)
+        except queue.Full:
+            if not self._enqueue_full(target, notification):
+                self._count("dropped")
+                return False
+        self._count("published")
+        return True
+
+    def publish_many(self, notifications: Iterable[Notification]) -> int:
+        return sum(1 for notification in notifications if self.publish(notification))
+
+    def _enqueue_full(self, target: queue.Queue, notification: Notification) -> bool:
+        if self._overflow == "block":
+            try:
+                target.put(notification, timeout=self._block_timeout)
+                return True
+            except queue.Full:
+                return False
+        if self._overflow == "drop_oldest":
+            try:
+                target.get_nowait()
+                target.task_done()
+                self._count("dropped")
+            except queue.Empty:
+                pass
+            try:
+                target.put_nowait(notification)
+                return True
+            except queue.Full:
+                return False
+        return False
+
+    def _run(self, source: queue.Queue) -> None:
+        while True:
+            item = source.get()
+            batch = [item]
+            deadline = time.monotonic() + self._flush_interval
+            while item is not _STOP and len(batch) < self._batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = source.get(timeout=remaining) if remaining > 0 else source.get_nowait()
+                except queue.Empty:
+                    break
+                batch.append(item)
+            stopping = batch[-1] is _STOP
+            events = [n for n in batch if n is not _STOP]
+            try:
+                self._deliver(events)
+            finally:
+                for _ in batch:
+                    source.task_done()
+            if stopping:
+                return
+
+    def _deliver(self, notifications: List[Notification]) -> None:
+        for recipient, events in coalesce(notifications).items():
+            for channel in self._channels:
+                if self._send(channel, recipient, events):
+                    self._count("delivered", len(events))
+                else:
+                    self._count("failed", len(events))
+
+    def _send(self, channel: str, recipient: str, events: List[Notification]) -> bool:
+        for attempt in range(self._max_retries + 1):
+            try:
+                self._sink.send(channel, recipient, events)
+                return True
+            except Exception:
+                if attempt == self._max_retries:
+                    logger.exception("Giving up on %s notification to %s", channel, recipient)
+                    return False
+                self._count("retries")
+                delay = self._backoff * (2 ** attempt) * (1 + random.random())
+                # Shutting down cuts the backoff short but still makes the attempt.
+                self._stop.wait(delay)
+        return False
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Wait until every queued event was handled; returns ``False`` on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for source in self._queues:
+            with source.all_tasks_done:
+                while source.unfinished_tasks:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return False
+                    source.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: float | None = 5.0) -> None:
+        """Deliver what is queued (within ``timeout``), then stop the workers."""
+        if self._closed:
+            return
+        self._closed = True
+        if not self.flush(timeout):
+            logger.warning("Notification queue not drained before shutdown")
+        self._stop.set()
+        for source in self._queues:
+            try:
+                source.put_nowait(_STOP)
+            except queue.Full:
+                pass
+        for thread in self._threads:
+            thread.join(timeout)
+        self._sink.close()
+
+
+def build_notifier(settings: Mapping[str, Any]) -> Optional[Notifier]:
+    """Create a notifier from the ``notifications`` configuration section, if any channel is on."""
+    channels = [name for name in ("email", "sms") if settings.get(f"{name}_enabled")]
+    if not channels:
+        return None
+    sink_name = str(settings.get("sink", "log"))
+    sink: NotificationSink
+    if sink_name == "file":
+        sink = FileSink(Path(str(settings.get("path", "./archon-notifications.jsonl"))).expanduser())
+    elif sink_name == "log":
+        sink = LoggingSink()
+    else:
+        raise ValueError(f"Unsupported notification sink: {sink_name!r}")
+    return Notifier(
+        sink,
+        channels,
+        queue_size=int(settings.get("queue_size", 10_000)),
+        workers=int(settings.get("workers", 1)),
+        batch_size=int(settings.get("batch_size", 100)),
+        flush_interval=float(settings.get("flush_interval", 0.2)),
+        max_retries=int(settings.get("max_retries", 3)),
+        backoff=float(settings.get("backoff", 0.1)),
+        overflow=str(settings.get("overflow", "drop_oldest")),
+    )
@@ -1,46 +1,253 @@
 """Domain services for managing tasks."""
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import List
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Mapping
 
 from ..data.models import Task
-from ..data.repository import TaskRepository
+from ..data.repository import TaskRepository, VersionConflictError
 from ..security.auth import TokenManager
+from ..utils import metrics
 from ..utils.validation import ensure_non_empty
+from .notifications import Notification, Notifier
+
+_CONFLICT_RETRIES = 5
 
 
 class TaskService:
     """Service for orchestrating task lifecycle events."""
 
-    def __init__(self, repository: TaskRepository, token_manager: TokenManager):
+    def __init__(
+        self, repository: TaskRepository, token_manager: TokenManager, notifier: Notifier | None = None
+    ):
         self._repository = repository
         self._token_manager = token_manager
+        self._notifier = notifier
+
+    def _notify(self, event: str, tasks: Iterable[Task]) -> None:
+        # Publishing only enqueues; delivery happens on the notifier's threads.
+        if self._notifier is not None:
+            self._notifier.publish_many(
+                Notification(event, task.owner, task.identifier, task.title) for task in tasks
+            )
 
+    @metrics.timed("service.list_tasks")
     def list_tasks(self) -> List[Task]:
-        return sorted(self._repository.list(), key=lambda t: t.created_at)
+        # ``iter_tasks`` already yields creation order.
+        return list(self._repository.iter_tasks())
+
+    def iter_tasks(
+        self,
+        *,
+        owner: str | None = None,
+        priority: str | None = None,
+        completed: bool | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
+        """Stream tasks in creation order with filters pushed down to the repository."""
+        return self._repository.iter_tasks(
+            owner=owner, priority=priority, completed=completed, offset=offset, limit=limit
+        )
+
+    def iter_created(
+        self,
+        *,
+        since: datetime | None = None,
+        until: datetime | None = None,
+        newest_first: bool = False,
+        owner: str | None = None,
+        priority: str | None = None,
+        completed: bool | None = None,
+        offset: int = 0,
+        limit: int | None = None,
+    ) -> Iterator[Task]:
+        """Stream tasks created in ``[since, until)``, oldest first unless ``newest_first``.
 
+        The repository seeks to the time range; the other filters are applied
+        to the resulting stream.
+        """
+        stop = None if limit is None else offset + limit
+        filtered = owner is not None or priority is not None or completed is not None
+        tasks = self._repository.iter_created(
+            since=since, until=until, newest_first=newest_first, limit=None if filtered else stop
+        )
+        if filtered:
+            priority = priority.lower() if priority is not None else None
+            tasks = (
+                task
+                for task in tasks
+                if (owner is None or task.owner == owner)
+                and (priority is None or task.priority == priority)
+                and (completed is None or task.is_completed == completed)
+            )
+        return islice(tasks, offset, stop)
+
+    @metrics.timed("service.count_tasks")
+    def count_tasks(
+        self, *, owner: str | None = None, priority: str | None = None, completed: bool | None = None
+    ) -> int:
+        return self._repository.count_matching(owner=owner, priority=priority, completed=completed)
+
+    @metrics.timed("service.create_task")
     def create_task(self, title: str, owner: str, priority: str, description: str = "") -> Task:
         ensure_non_empty(title=title, owner=owner)
         task = Task(title=title.strip(), owner=owner.strip(), priority=priority, description=description.strip())
-        return self._repository.save(task)
+        self._repository.save(task)
+        self._notify("created", [task])
+        return task
 
+    @metrics.timed("service.get_task")
+    def get_task(self, identifier: str) -> Task:
+        return self._repository.get(identifier)
+
+    @metrics.timed("service.get_tasks")
+    def get_tasks(self, identifiers: Iterable[str]) -> List[Task]:
+        return self._repository.get_many(identifiers)
+
+    @metrics.timed("service.complete_task")
     def complete_task(self, identifier: str) -> str:
+        return self.complete_many([identifier])[identifier]
+
+    @metrics.timed("service.create_many")
+    def create_many(self, specs: Iterable[Mapping[str, str]]) -> List[Task]:
+        """Validate every task specification, then persist them in a single write."""
+        tasks = []
+        for index, spec in enumerate(specs, start=1):
+            title = str(spec.get("title") or "")
+            owner = str(spec.get("owner") or "")
+            try:
+                ensure_non_empty(title=title, owner=owner)
+                task = Task(
+                    title=title.strip(),
+                    owner=owner.strip(),
+                    priority=str(spec.get("priority") or "medium"),
+                    description=str(spec.get("description") or "").strip(),
+                )
+            except ValueError as exc:
+                raise ValueError(f"Task #{index}: {exc}") from exc
+            tasks.append(task)
+        self._repository.save_many(tasks)
+        self._notify("created", tasks)
+        return tasks
+
+    @metrics.timed("service.complete_many")
+    def complete_many(self, identifiers: Iterable[str]) -> Dict[str, str]:
+        """Complete several tasks at once and return their completion tokens by id.
+
+        Tasks are read without holding any lock; if another writer changes one of
+        them before the batch is saved, the whole batch is re-read and retried.
+        """
+        identifiers = list(dict.fromkeys(identifiers))
+        attempts = 0
+        while True:
+            try:
+                return self._complete(identifiers)
+            except VersionConflictError:
+                attempts += 1
+                if attempts >= _CONFLICT_RETRIES:
+                    raise
+
+    def _complete(self, identifiers: List[str]) -> Dict[str, str]:
+        tasks = self._repository.get_many(identifiers)
+        tokens: Dict[str, str] = {}
+        changed = []
+        completed_at = datetime.now(timezone.utc)
+        for task in tasks:
+            if task.is_completed and task.completion_token:
+                tokens[task.identifier] = task.completion_token
+            else:
+                changed.append(task)
+        issued = self._token_manager.issue_tokens({"task_id": task.identifier} for task in changed)
+        for task, token in zip(changed, issued):
+            task.completed_at = completed_at
+            task.completion_token = token
+            tokens[task.identifier] = token
+        if changed:
+            self._repository.save_many(changed)
+            self._notify("completed", changed)
+        return {identifier: tokens[identifier] for identifier in identifiers}
+
+    @metrics.timed("service.revoke_tokens")
+    def revoke_tokens(self, tokens: Iterable[str]) -> int:
+        """Revoke completion tokens before they expire; returns how many were still live."""
+        return self._token_manager.revoke(list(tokens))
+
+    @metrics.timed("service.revoke_completion")
+    def revoke_completion(self, identifier: str) -> None:
+        """Revoke every completion token issued so far for an existing task."""
         task = self._repository.get(identifier)
-        if task.is_completed and task.completion_token:
-            return task.completion_token
-        token = self._token_manager.issue_token({"task_id": identifier})
-        task.completed_at = datetime.now(timezone.utc)
-        task.completion_token = token
-        self._repository.save(task)
-        return token
+        self._token_manager.revoke_task(task.identifier)
 
-    def purge_tasks(self) -> int:
-        tasks = self._repository.list()
-        self._repository.replace_all([])
+    @metrics.timed("service.delete_many")
+    def delete_many(self, identifiers: Iterable[str]) -> int:
+        """Delete several tasks in one write; unknown ids abort before anything is removed."""
+        tasks = self._repository.get_many(dict.fromkeys(identifiers))
+        self._repository.delete_many(task.identifier for task in tasks)
         return len(tasks)
 
+    @metrics.timed("service.purge_tasks")
+    def purge_tasks(self) -> int:
+        # One summary per owner rather than an event per purged task.
+        counts: Dict[str, int] = {}
+        if self._notifier is not None:
+            for task in self._repository.iter_tasks():
+                counts[task.owner] = counts.get(task.owner, 0) + 1
+        purged = self._repository.purge()
+        if self._notifier is not None:
+            self._notifier.publish_many(
+                Notification("purged", owner, title=f"{count} tasks purged") for owner, count in counts.items()
+            )
+        return purged
+
+    @metrics.timed("service.import_tasks")
     def import_tasks(self, tasks: List[Task]) -> None:
         for task in tasks:
             ensure_non_empty(title=task.title, owner=task.owner)
         self._repository.replace_all(tasks)
+
+    @metrics.timed("service.import_batches")
+    def import_batches(self, batches: Iterable[List[Task]], *, replace: bool = False) -> int:
+        """Commit already validated tasks batch by batch and return how many were imported.
+
+        Imported tasks overwrite stored tasks with the same identifier. In merge
+        mode batches are committed independently, so a failure part-way leaves
+        earlier batches in place. With ``replace`` the batches are staged by the
+        repository and swapped in only after the last one was read, so a bad
+        record leaves the existing tasks untouched.
+        """
+        if replace:
+            return self._repository.replace_batches(batches)
+        count = 0
+        for batch in batches:
+            self._merge(batch)
+            count += len(batch)
+        return count
+
+    @metrics.timed("service.archive_completed")
+    def archive_completed(self, older_than: timedelta) -> int:
+        """Move tasks completed more than ``older_than`` ago into the archive."""
+        return self._repository.archive_completed(datetime.now(timezone.utc) - older_than)
+
+    def _merge(self, tasks: List[Task]) -> None:
+        attempts = 0
+        while True:
+            # Adopt stored versions so imported records win over the stored copies.
+            stored = self._repository.get_many((task.identifier for task in tasks), missing_ok=True)
+            versions = {task.identifier: task.version for task in stored}
+            for task in tasks:
+                task.version = versions.get(task.identifier, 0)
+            try:
+                self._repository.save_many(tasks)
+                return
+            except VersionConflictError:
+                attempts += 1
+                if attempts >= _CONFLICT_RETRIES:
+                    raise
+
+    def close(self) -> None:
+        if self._notifier is not None:
+            self._notifier.close()
+        self._token_manager.close()
+        self._repository.close()
@@ -1,14 +1,55 @@
 """Utilities to export tasks to YAML."""
 from __future__ import annotations
 
+import json
 from pathlib import Path
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable, TextIO
 
-from ..data.models import Task, serialize_tasks
-from .yaml_support import safe_dump
+from .yaml_support import have_yaml, safe_dump
 
+if TYPE_CHECKING:  # pragma: no cover - keeps the CLI import light
+    from ..data.models import Task
 
-def export_tasks_to_yaml(tasks: Iterable[Task], output: Path) -> None:
-    payload = serialize_tasks(tasks)
+EXPORT_FORMATS = ("yaml", "jsonl")
+
+
+def write_tasks_yaml(tasks: Iterable[Task], fh: TextIO) -> int:
+    """Write ``tasks`` as a YAML sequence one record at a time and return the count."""
+    yaml_enabled = have_yaml()
+    count = 0
+    for task in tasks:
+        if yaml_enabled:
+            safe_dump([task.to_dict()], fh, sort_keys=False)
+        else:
+            # The JSON fallback cannot concatenate documents, so frame the array by hand.
+            fh.write("[\n" if count == 0 else ",\n")
+            fh.write(json.dumps(task.to_dict(), indent=2))
+        count += 1
+    if count == 0:
+        fh.write("[]\n")
+    elif not yaml_enabled:
+        fh.write("\n]\n")
+    return count
+
+
+def write_tasks_jsonl(tasks: Iterable[Task], fh: TextIO) -> int:
+    """Write one compact JSON object per task and return the count."""
+    count = 0
+    for task in tasks:
+        fh.write(json.dumps(task.to_dict(), separators=(",", ":")))
+        fh.write("\n")
+        count += 1
+    return count
+
+
+def export_tasks(tasks: Iterable[Task], output: Path, fmt: str = "yaml") -> int:
+    """Stream ``tasks`` to ``output`` in the given format and return the count."""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt!r}")
+    writer = write_tasks_yaml if fmt == "yaml" else write_tasks_jsonl
     with output.open("w", encoding="utf-8") as fh:
-        safe_dump(payload, fh, sort_keys=False)
+        return writer(tasks, fh)
+
+
+def export_tasks_to_yaml(tasks: Iterable[Task], output: Path) -> None:
+    export_tasks(tasks, output, "yaml")
@@ -0,0 +1,84 @@
+"""File helpers for atomic writes and inter-process locking."""
+from __future__ import annotations
+
+from contextlib import contextmanager
+import os
+from pathlib import Path
+import tempfile
+from threading import RLock
+from typing import Iterator
+
+try:  # pragma: no cover - fcntl is unavailable on Windows
+    import fcntl
+except ImportError:  # pragma: no cover - locking degrades to in-process only
+    fcntl = None  # type: ignore[assignment]
+
+
+def atomic_write_bytes(path: Path, payload: bytes) -> None:
+    """Replace ``path`` with ``payload`` so readers never observe a partial file."""
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(payload)
+            fh.flush()
+            os.fsync(fh.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+class FileLock:
+    """Advisory ``flock`` on a sidecar file shared by every process using ``path``.
+
+    The lock is re-entrant for the thread holding it: nested acquisitions are free,
+    although a shared hold cannot be upgraded to an exclusive one. Threads in the
+    same process are serialized by an internal ``RLock``.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path.with_name(path.name + ".lock")
+        self._guard = RLock()
+        self._fd: int | None = None
+        self._depth = 0
+        self._shared = False
+
+    @contextmanager
+    def acquire(self, shared: bool = False) -> Iterator[None]:
+        with self._guard:
+            if self._depth == 0:
+                self._lock(shared)
+            elif self._shared and not shared:
+                raise RuntimeError(f"Cannot upgrade a shared lock on {self._path} to exclusive")
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._unlock()
+
+    def _lock(self, shared: bool) -> None:
+        self._shared = shared
+        if fcntl is None:
+            return
+        self._fd = os.open(self._path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        except BaseException:
+            os.close(self._fd)
+            self._fd = None
+            raise
+
+    def _unlock(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
@@ -1,27 +1,71 @@
 """Helpers for formatting output tables."""
 from __future__ import annotations
 
-from typing import Iterable
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Sequence
 
-from ..data.models import Task
+if TYPE_CHECKING:  # pragma: no cover - annotations only; keeps the CLI import light
+    from ..data.models import Task
+
+_HEADERS = ["ID", "Title", "Owner", "Priority", "Completed"]
+# Column widths used when streaming, where rows cannot be measured up front.
+# Longer values are not truncated; they simply push the following columns.
+_STREAM_WIDTHS = [16, 32, 16, 8, 9]
+
+
+def _task_row(task: Task) -> List[str]:
+    return [
+        task.identifier,
+        task.title,
+        task.owner,
+        task.priority,
+        "yes" if task.is_completed else "no",
+    ]
+
+
+def _format_row(row: Sequence[str], widths: Sequence[int]) -> str:
+    return " | ".join(col.ljust(widths[idx]) for idx, col in enumerate(row))
+
+
+def _separator(widths: Sequence[int]) -> str:
+    return "-+-".join("-" * width for width in widths)
 
 
 def format_task_table(tasks: Iterable[Task]) -> str:
-    headers = ["ID", "Title", "Owner", "Priority", "Completed"]
+    widths = [len(header) for header in _HEADERS]
     rows = []
     for task in tasks:
-        rows.append([
-            task.identifier,
-            task.title,
-            task.owner,
-            task.priority,
-            "yes" if task.is_completed else "no",
-        ])
-    widths = [max(len(str(col)) for col in [header] + [row[idx] for row in rows] if rows) for idx, header in enumerate(headers)]
-    def format_row(row: list[str]) -> str:
-        return " | ".join(col.ljust(widths[idx]) for idx, col in enumerate(row))
-
-    lines = [format_row(headers)]
-    lines.append("-+-".join("-" * width for width in widths))
-    lines.extend(format_row(row) for row in rows)
+        row = _task_row(task)
+        widths = [max(width, len(col)) for width, col in zip(widths, row)]
+        rows.append(row)
+
+    lines = [_format_row(_HEADERS, widths), _separator(widths)]
+    lines.extend(_format_row(row, widths) for row in rows)
+    return "\n".join(lines)
+
+
+def iter_task_table(tasks: Iterable[Task], widths: Sequence[int] = _STREAM_WIDTHS) -> Iterator[str]:
+    """Yield the lines of a task table one at a time using fixed column widths."""
+    widths = [max(width, len(header)) for width, header in zip(widths, _HEADERS)]
+    yield _format_row(_HEADERS, widths)
+    yield _separator(widths)
+    for task in tasks:
+        yield _format_row(_task_row(task), widths)
+
+
+def format_duration(seconds: float | None) -> str:
+    """Compact human-readable duration such as ``850ms``, ``42.0s``, ``3.5h`` or ``2.1d``."""
+    if seconds is None:
+        return "-"
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60), ("s", 1)):
+        if seconds >= size:
+            return f"{seconds / size:.1f}{unit}"
+    return f"{seconds * 1000:.0f}ms"
+
+
+def format_table(headers: Sequence[str], rows: Iterable[Sequence[str]]) -> str:
+    """Render ``rows`` under ``headers`` with columns sized to fit."""
+    rows = [list(row) for row in rows]
+    widths = [max([len(header), *(len(row[idx]) for row in rows)]) for idx, header in enumerate(headers)]
+    lines = [_format_row(headers, widths), _separator(widths)]
+    lines.extend(_format_row(row, widths) for row in rows)
     return "\n".join(lines)
@@ -0,0 +1,240 @@
+"""Streaming import of task backups in YAML, JSON or JSON Lines."""
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+import json
+from pathlib import Path
+from typing import Any, Deque, Iterator, List, TextIO, Tuple
+
+from ..data.codecs import Row, task_to_row, tasks_from_rows
+from ..data.models import Task
+from .validation import ensure_non_empty
+from .yaml_support import safe_load
+
+IMPORT_FORMATS = ("yaml", "json", "jsonl")
+_SUFFIX_FORMATS = {".yml": "yaml", ".yaml": "yaml", ".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+_READ_SIZE = 1 << 20
+_MAX_RECORD_SIZE = 64 << 20
+
+# A chunk is (format, payload, index of its first record): ``payload`` is YAML text,
+# a list of JSON lines, or a list of already parsed JSON values.
+Chunk = Tuple[str, Any, int]
+
+
+def detect_format(path: Path) -> str:
+    try:
+        return _SUFFIX_FORMATS[path.suffix.lower()]
+    except KeyError:
+        raise ValueError(f"Cannot infer the import format of {path}; pass it explicitly") from None
+
+
+def _iter_yaml_chunks(fh: TextIO, chunk_size: int) -> Iterator[Chunk]:
+    """Split a block-style YAML sequence into groups of top-level items without parsing it."""
+    items: List[str] = []
+    current: List[str] = []
+    start = 0
+    for line_number, line in enumerate(fh, start=1):
+        if line.startswith("- ") or line.rstrip("\r\n") == "-":
+            if current:
+                items.append("".join(current))
+                if len(items) >= chunk_size:
+                    yield "yaml", "".join(items), start
+                    start += len(items)
+                    items = []
+            current = [line]
+        elif current:
+            current.append(line)
+        elif line.strip() and not line.startswith(("#", "---", "%")):
+            raise ValueError(f"Line {line_number}: expected a YAML sequence of task records")
+    if current:
+        items.append("".join(current))
+    if items:
+        yield "yaml", "".join(items), start
+
+
+def _iter_json_chunks(fh: TextIO, chunk_size: int) -> Iterator[Chunk]:
+    """Incrementally decode the elements of a top-level JSON array."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    opened = False
+    values: List[Any] = []
+    start = 0
+
+    def fill() -> bool:
+        nonlocal buffer, position, eof
+        if eof:
+            return False
+        block = fh.read(_READ_SIZE)
+        if not block:
+            eof = True
+            return False
+        buffer = buffer[position:] + block
+        position = 0
+        return True
+
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position >= len(buffer):
+            if fill():
+                continue
+            raise ValueError("Unexpected end of JSON input")
+        if not opened:
+            if buffer[position] != "[":
+                raise ValueError("Expected a JSON array of task records")
+            opened = True
+            position += 1
+            continue
+        if buffer[position] == "]":
+            break
+        try:
+            value, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError as exc:
+            # Possibly a record split across reads: fetch more before giving up.
+            if len(buffer) - position < _MAX_RECORD_SIZE and fill():
+                continue
+            raise ValueError(f"Record #{start + len(values) + 1}: invalid JSON: {exc}") from exc
+        if end == len(buffer) and not eof and fill():
+            # A number at the end of the buffer may continue in the next block.
+            continue
+        values.append(value)
+        position = end
+        if len(values) >= chunk_size:
+            yield "json", values, start
+            start += len(values)
+            values = []
+    if values:
+        yield "json", values, start
+
+
+def _iter_jsonl_chunks(fh: TextIO, chunk_size: int) -> Iterator[Chunk]:
+    lines: List[str] = []
+    start = 0
+    for line in fh:
+        if not line.strip():
+            continue
+        lines.append(line)
+        if len(lines) >= chunk_size:
+            yield "jsonl", lines, start
+            start += len(lines)
+            lines = []
+    if lines:
+        yield "jsonl", lines, start
+
+
+def iter_chunks(fh: TextIO, fmt: str, chunk_size: int = 1000) -> Iterator[Chunk]:
+    """Split ``fh`` into undecoded chunks of at most ``chunk_size`` records."""
+    if fmt == "yaml":
+        head = fh.read(_READ_SIZE)
+        stripped = head.lstrip()
+        rest = _Prefixed(head, fh)
+        # An empty export, or one written by the JSON fallback, is a JSON array.
+        if stripped.startswith("["):
+            return _iter_json_chunks(rest, chunk_size)
+        return _iter_yaml_chunks(rest, chunk_size)
+    if fmt == "json":
+        return _iter_json_chunks(fh, chunk_size)
+    if fmt == "jsonl":
+        return _iter_jsonl_chunks(fh, chunk_size)
+    raise ValueError(f"Unsupported import format: {fmt!r}")
+
+
+class _Prefixed:
+    """A text stream that replays ``head`` before the rest of ``fh``."""
+
+    def __init__(self, head: str, fh: TextIO):
+        self._head = head
+        self._fh = fh
+
+    def read(self, size: int = -1) -> str:
+        if self._head:
+            head, self._head = self._head, ""
+            return head
+        return self._fh.read(size)
+
+    def __iter__(self) -> Iterator[str]:
+        if self._head:
+            head, self._head = self._head, ""
+            lines = head.splitlines(keepends=True)
+            if lines and not lines[-1].endswith("\n"):
+                # Complete the partial last line with the start of the stream.
+                lines[-1] += self._fh.readline()
+            yield from lines
+        yield from self._fh
+
+
+def decode_chunk(chunk: Chunk) -> List[Row]:
+    """Parse and validate one chunk, returning compact rows.
+
+    Runs in worker processes; rows pickle far more cheaply than ``Task`` objects.
+    """
+    fmt, payload, start = chunk
+    if fmt == "yaml":
+        records = safe_load(payload) or []
+    elif fmt == "jsonl":
+        records = []
+        for offset, line in enumerate(payload):
+            try:
+                records.append(json.loads(line))
+            except ValueError as exc:
+                raise ValueError(f"Record #{start + offset + 1}: invalid JSON: {exc}") from exc
+    else:
+        records = payload
+    rows = []
+    for offset, record in enumerate(records):
+        try:
+            if not isinstance(record, dict):
+                raise ValueError(f"expected a mapping, got {type(record).__name__}")
+            task = Task.from_dict(record)
+            ensure_non_empty(title=task.title, owner=task.owner)
+        except (KeyError, TypeError, ValueError) as exc:
+            raise ValueError(f"Record #{start + offset + 1}: {exc}") from exc
+        rows.append(task_to_row(task))
+    return rows
+
+
+def iter_task_batches(
+    fh: TextIO,
+    fmt: str,
+    *,
+    batch_size: int = 10_000,
+    chunk_size: int = 1_000,
+    workers: int = 0,
+) -> Iterator[List[Task]]:
+    """Yield validated tasks from ``fh`` in batches of at most ``batch_size``.
+
+    Chunks are decoded on a pool of ``workers`` processes (inline when ``workers``
+    is 0 or 1). At most two chunks per worker are in flight, so memory stays
+    bounded by the batch and chunk sizes rather than by the size of the file.
+    """
+    chunks = iter_chunks(fh, fmt, chunk_size)
+    batch: List[Task] = []
+    executor: Executor | None = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for rows in _decoded(chunks, executor, 2 * workers):
+            batch.extend(tasks_from_rows(rows))
+            while len(batch) >= batch_size:
+                yield batch[:batch_size]
+                batch = batch[batch_size:]
+        if batch:
+            yield batch
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _decoded(chunks: Iterator[Chunk], executor: Executor | None, window: int) -> Iterator[List[Row]]:
+    if executor is None:
+        for chunk in chunks:
+            yield decode_chunk(chunk)
+        return
+    pending: Deque[Future] = deque()
+    for chunk in chunks:
+        pending.append(executor.submit(decode_chunk, chunk))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
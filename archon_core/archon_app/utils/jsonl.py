@@ -0,0 +1,22 @@
+"""Helpers for reading and writing JSON Lines streams."""
+from __future__ import annotations
+
+import json
+from typing import Any, Iterator, TextIO, Tuple
+
+
+def iter_numbered_jsonl(stream: TextIO) -> Iterator[Tuple[int, Any]]:
+    """Yield ``(line number, decoded value)`` for each non-blank line of ``stream``."""
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as exc:
+            raise ValueError(f"Invalid JSON on line {line_number}: {exc}") from exc
+
+
+def iter_jsonl(stream: TextIO) -> Iterator[Any]:
+    """Yield one decoded value per non-blank line of ``stream``."""
+    for _, value in iter_numbered_jsonl(stream):
+        yield value
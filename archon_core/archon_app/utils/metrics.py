@@ -0,0 +1,232 @@
+"""Process-wide counters and latency histograms for hot paths.
+
+Instrumentation is off by default. While disabled, ``inc``/``observe`` return
+immediately, ``timer`` hands out a shared no-op context manager and
+``tracked_lock`` returns a plain ``RLock``, so the cost is a flag check.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager
+import functools
+import json
+from pathlib import Path
+from threading import Lock, RLock
+import time
+from typing import Any, Callable, Dict, Iterator, List, TypeVar
+
+from .fileio import FileLock, atomic_write_text
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+PREFIX = "archon_"
+# Upper bounds in seconds; the last bucket is +Inf.
+BUCKETS = (1e-5, 5e-5, 1e-4, 5e-4, 1e-3, 5e-3, 1e-2, 5e-2, 0.1, 0.5, 1.0, 5.0)
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Thread-safe store of named counters and histograms."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._lock = Lock()
+        self._counters: Dict[str, float] = {}
+        self._histograms: Dict[str, _Histogram] = {}
+
+    def inc(self, name: str, amount: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def observe(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = _Histogram()
+            histogram.observe(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "histograms": {
+                    name: {"counts": list(h.counts), "sum": h.total, "count": h.count}
+                    for name, h in self._histograms.items()
+                },
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+REGISTRY = MetricsRegistry()
+
+
+def enable(enabled: bool = True) -> None:
+    REGISTRY.enabled = enabled
+
+
+def is_enabled() -> bool:
+    return REGISTRY.enabled
+
+
+def inc(name: str, amount: float = 1) -> None:
+    REGISTRY.inc(name, amount)
+
+
+def observe(name: str, seconds: float) -> None:
+    REGISTRY.observe(name, seconds)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+@contextmanager
+def _timing(name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.observe(name, time.perf_counter() - started)
+
+
+def timer(name: str):
+    """Context manager recording the duration of its block in histogram ``name``."""
+    return _timing(name) if REGISTRY.enabled else _NULL_TIMER
+
+
+def timed(name: str) -> Callable[[F], F]:
+    """Decorator recording each call's duration in histogram ``name``."""
+
+    def decorate(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not REGISTRY.enabled:
+                return func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                REGISTRY.observe(name, time.perf_counter() - started)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorate
+
+
+class _TrackedRLock:
+    """``RLock`` that records how long callers waited for it."""
+
+    def __init__(self, name: str):
+        self._lock = RLock()
+        self._name = name
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        if self._lock.acquire(blocking=False):
+            return True
+        if not blocking:
+            return False
+        started = time.perf_counter()
+        acquired = self._lock.acquire(True, timeout)
+        REGISTRY.observe(self._name, time.perf_counter() - started)
+        return acquired
+
+    def release(self) -> None:
+        self._lock.release()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
+
+
+def tracked_lock(name: str):
+    """Return an ``RLock``, timing contended acquisitions when metrics are enabled."""
+    return _TrackedRLock(name) if REGISTRY.enabled else RLock()
+
+
+def merge_snapshots(*snapshots: Dict[str, Any]) -> Dict[str, Any]:
+    merged: Dict[str, Any] = {"counters": {}, "histograms": {}}
+    for snapshot in snapshots:
+        for name, value in snapshot.get("counters", {}).items():
+            merged["counters"][name] = merged["counters"].get(name, 0) + value
+        for name, data in snapshot.get("histograms", {}).items():
+            target = merged["histograms"].setdefault(
+                name, {"counts": [0] * (len(BUCKETS) + 1), "sum": 0.0, "count": 0}
+            )
+            target["counts"] = [a + b for a, b in zip(target["counts"], data["counts"])]
+            target["sum"] += data["sum"]
+            target["count"] += data["count"]
+    return merged
+
+
+def load(path: Path) -> Dict[str, Any]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {"counters": {}, "histograms": {}}
+
+
+def persist(path: Path) -> None:
+    """Add this process's metrics to the totals in ``path`` and reset them."""
+    snapshot = REGISTRY.snapshot()
+    if not snapshot["counters"] and not snapshot["histograms"]:
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with FileLock(path).acquire():
+        atomic_write_text(path, json.dumps(merge_snapshots(load(path), snapshot), indent=2))
+    REGISTRY.reset()
+
+
+def _metric_name(name: str) -> str:
+    return PREFIX + name.replace(".", "_").replace("-", "_")
+
+
+def to_prometheus(snapshot: Dict[str, Any]) -> str:
+    """Render ``snapshot`` in the Prometheus text exposition format."""
+    lines: List[str] = []
+    for name, value in sorted(snapshot.get("counters", {}).items()):
+        metric = _metric_name(name) + "_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {int(value) if float(value).is_integer() else value}")
+    for name, data in sorted(snapshot.get("histograms", {}).items()):
+        metric = _metric_name(name) + "_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        cumulative = 0
+        for bound, count in zip((*BUCKETS, None), data["counts"]):
+            cumulative += count
+            label = "+Inf" if bound is None else f"{bound:g}"
+            lines.append(f'{metric}_bucket{{le="{label}"}} {cumulative}')
+        lines.append(f"{metric}_sum {data['sum']:.9g}")
+        lines.append(f"{metric}_count {data['count']}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,93 @@
+"""Whole-command profiling with cProfile or a lightweight sampling profiler."""
+from __future__ import annotations
+
+from collections import Counter
+from pathlib import Path
+import sys
+from threading import Event, Thread, get_ident
+from types import FrameType
+from typing import Optional
+
+PROFILERS = ("cprofile", "sample")
+
+
+class SamplingProfiler:
+    """Periodically record the stack of the thread that started it.
+
+    The output is in "folded stacks" format (``outer;inner;leaf count`` per line)
+    as consumed by flamegraph tools. Sampling costs nothing in the profiled
+    thread besides the interpreter switching to the sampler.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self._interval = interval
+        self._stacks: Counter[str] = Counter()
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+        self._target = 0
+
+    def start(self) -> None:
+        self._target = get_ident()
+        self._thread = Thread(target=self._run, name="archon-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self._interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is not None:
+                self._stacks[_fold(frame)] += 1
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def write(self, path: Path) -> None:
+        with path.open("w", encoding="utf-8") as fh:
+            for stack, count in self._stacks.most_common():
+                fh.write(f"{stack} {count}\n")
+
+
+def _fold(frame: Optional[FrameType]) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({Path(code.co_filename).name}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class CommandProfiler:
+    """Profile everything between ``start`` and ``stop`` and write the result to ``path``.
+
+    ``cprofile`` writes a ``pstats`` dump (``python -m pstats PATH``); ``sample``
+    writes folded stacks.
+    """
+
+    def __init__(self, path: Path, kind: str = "cprofile"):
+        if kind not in PROFILERS:
+            raise ValueError(f"Unsupported profiler: {kind!r}")
+        self._path = path
+        self._kind = kind
+        self._profiler = None
+
+    def start(self) -> None:
+        if self._kind == "cprofile":
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            self._profiler = SamplingProfiler()
+            self._profiler.start()
+
+    def stop(self) -> None:
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return
+        if self._kind == "cprofile":
+            profiler.disable()
+            profiler.dump_stats(str(self._path))
+        else:
+            profiler.stop()
+            profiler.write(self._path)
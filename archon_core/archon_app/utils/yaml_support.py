@@ -1,24 +1,56 @@
-"""Optional YAML support with a JSON fallback."""
+"""Optional YAML support with a JSON fallback.
+
+PyYAML is only imported the first time YAML is actually read or written, so
+commands that never touch YAML do not pay for importing it. The libyaml-backed
+loader and dumper are used when PyYAML was built with them.
+"""
 from __future__ import annotations
 
 import json
 from typing import Any
 
-try:  # pragma: no cover - PyYAML may be installed in some environments
-    import yaml as _yaml  # type: ignore
-except Exception:  # pragma: no cover - fallback path is tested separately
-    class _YamlFallback:
-        @staticmethod
-        def safe_dump(data: Any, stream: Any, sort_keys: bool = False) -> None:
-            json.dump(data, stream, indent=2, sort_keys=sort_keys)
+_yaml: Any = None
+
+
+class _YamlFallback:
+    @staticmethod
+    def safe_dump(data: Any, stream: Any, sort_keys: bool = False) -> None:
+        json.dump(data, stream, indent=2, sort_keys=sort_keys)
+
+    @staticmethod
+    def safe_load(stream: str | bytes | bytearray) -> Any:
+        if isinstance(stream, (bytes, bytearray)):
+            stream = stream.decode("utf-8")
+        return json.loads(stream)
+
+
+def _backend() -> Any:
+    global _yaml
+    if _yaml is None:
+        try:  # pragma: no cover - PyYAML may be installed in some environments
+            import yaml  # type: ignore
+
+            _yaml = yaml
+        except Exception:  # pragma: no cover - fallback path is tested separately
+            _yaml = _YamlFallback()
+    return _yaml
+
+
+def have_yaml() -> bool:
+    return not isinstance(_backend(), _YamlFallback)
+
 
-        @staticmethod
-        def safe_load(stream: str | bytes | bytearray) -> Any:
-            if isinstance(stream, (bytes, bytearray)):
-                stream = stream.decode("utf-8")
-            return json.loads(stream)
+def safe_dump(data: Any, stream: Any = None, **kwargs: Any) -> Any:
+    backend = _backend()
+    dumper = getattr(backend, "CSafeDumper", None)
+    if dumper is not None:
+        return backend.dump(data, stream, Dumper=dumper, **kwargs)
+    return backend.safe_dump(data, stream, **kwargs)
 
-    _yaml = _YamlFallback()
 
-safe_dump = _yaml.safe_dump
-safe_load = _yaml.safe_load
+def safe_load(stream: str | bytes | bytearray) -> Any:
+    backend = _backend()
+    loader = getattr(backend, "CSafeLoader", None)
+    if loader is not None:
+        return backend.load(stream, Loader=loader)
+    return backend.safe_load(stream)
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime, timedelta, timezone
+import hashlib
+import hmac
+import json
+import types
+
+import pytest
+
+from archon_app.security import auth, revocation
+from archon_app.security.auth import TokenManager
+from archon_app.security.revocation import RevocationStore
+
+
+def test_issue_and_validate_tokens_in_batches() -> None:
+    manager = TokenManager(ttl_seconds=60, secret=b"secret")
+    tokens = manager.issue_tokens({"task_id": str(i)} for i in range(50))
+    assert [payload["task_id"] for payload in manager.validate_tokens(tokens)] == [str(i) for i in range(50)]
+
+    tampered = base64.urlsafe_b64encode(b"\x01" + base64.urlsafe_b64decode(tokens[0])[1:-1] + b"x").decode()
+    assert manager.validate_tokens([tokens[1], tampered, "not a token"]) == [{"task_id": "1"}, None, None]
+    with pytest.raises(ValueError, match="signature"):
+        TokenManager(ttl_seconds=60, secret=b"other").validate_token(tokens[0])
+
+
+def test_validation_cache_honors_expiry(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = types.SimpleNamespace(now=1_000_000)
+    monkeypatch.setattr(auth, "time", types.SimpleNamespace(time=lambda: clock.now))
+    manager = TokenManager(ttl_seconds=10, secret=b"secret", cache_size=2)
+    token = manager.issue_token({"task_id": "a"})
+
+    payload = manager.validate_token(token)
+    payload["task_id"] = "mutated"
+    assert manager.validate_token(token) == {"task_id": "a"}
+
+    clock.now += 10
+    with pytest.raises(ValueError, match="expired"):
+        manager.validate_token(token)
+
+
+def test_validation_cache_is_bounded() -> None:
+    manager = TokenManager(ttl_seconds=60, secret=b"secret", cache_size=2)
+    manager.validate_tokens(manager.issue_tokens({"task_id": str(i)} for i in range(5)))
+    assert len(manager._cache) == 2
+
+
+def test_legacy_tokens_still_validate() -> None:
+    expires = datetime.now(timezone.utc) + timedelta(seconds=60)
+    envelope = {"payload": {"task_id": "old"}, "issued_at": "x", "expires_at": expires.isoformat()}
+    serialized = json.dumps(envelope, separators=(",", ":"), sort_keys=True).encode()
+    signature = hmac.new(b"secret", serialized, hashlib.sha256).digest()
+    token = base64.urlsafe_b64encode(serialized + b"." + signature).decode()
+    assert TokenManager(ttl_seconds=60, secret=b"secret").validate_token(token) == {"task_id": "old"}
+
+
+def test_revoked_tokens_fail_even_when_cached(tmp_path) -> None:
+    store = RevocationStore(tmp_path / "revocations.db")
+    manager = TokenManager(ttl_seconds=60, secret=b"secret", cache_size=8, revocations=store)
+    tokens = manager.issue_tokens({"task_id": str(i)} for i in range(3))
+    manager.validate_tokens(tokens)
+
+    assert manager.revoke(tokens[0]) == 1
+    with pytest.raises(ValueError, match="revoked"):
+        manager.validate_token(tokens[0])
+    assert manager.validate_tokens(tokens) == [None, {"task_id": "1"}, {"task_id": "2"}]
+    with pytest.raises(ValueError, match="Malformed"):
+        manager.revoke("not a token")
+
+    # Another process sharing the store sees the revocation, whatever its secret.
+    other = TokenManager(ttl_seconds=60, secret=b"other", revocations=RevocationStore(tmp_path / "revocations.db"))
+    other_token = other.issue_token({"task_id": "9"})
+    manager.revoke(other_token)
+    with pytest.raises(ValueError, match="revoked"):
+        other.validate_token(other_token)
+    assert len(store) == 2
+
+
+def test_task_revocation_spares_later_tokens_and_expires(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = types.SimpleNamespace(now=1_000_000)
+    fake_time = types.SimpleNamespace(time=lambda: clock.now, monotonic=lambda: clock.now)
+    monkeypatch.setattr(auth, "time", fake_time)
+    monkeypatch.setattr(revocation, "time", fake_time)
+    store = RevocationStore()
+    manager = TokenManager(ttl_seconds=10, secret=b"secret", revocations=store)
+    first = manager.issue_token({"task_id": "a"})
+    untouched = manager.issue_token({"task_id": "b"})
+
+    manager.revoke_task("a")
+    with pytest.raises(ValueError, match="revoked"):
+        manager.validate_token(first)
+    assert manager.validate_token(untouched) == {"task_id": "b"}
+
+    clock.now += 1
+    assert manager.validate_token(manager.issue_token({"task_id": "a"})) == {"task_id": "a"}
+
+    # Entries are pruned once every token they could cover has expired.
+    clock.now += 10
+    manager.revoke_task("c")
+    assert len(store) == 1
+
+
+def test_revocation_bloom_filter_stays_sparse_as_entries_expire(monkeypatch: pytest.MonkeyPatch) -> None:
+    clock = types.SimpleNamespace(now=1_000_000)
+    monkeypatch.setattr(revocation, "time", types.SimpleNamespace(time=lambda: clock.now, monotonic=lambda: clock.now))
+    store = RevocationStore()
+
+    def fill_ratio() -> float:
+        return sum(bin(byte).count("1") for byte in store._bloom.bits) / store._bloom.size
+
+    # Each round revokes far more keys than the filter was sized for; earlier rounds have expired by then.
+    for round_ in range(10):
+        store.revoke_signatures((f"{round_}:{i}".encode(), clock.now + 5) for i in range(1500))
+        assert len(store) == 1500
+        assert fill_ratio() < 0.2
+        clock.now += 10
+    store.revoke_task("last", clock.now + 5)
+    assert len(store) == 1
+    assert fill_ratio() < 0.01
@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from click.testing import CliRunner
+
+from archon_app import benchmarks
+from archon_app.cli import main
+
+
+def test_run_benchmarks_covers_hot_paths(tmp_path: Path) -> None:
+    results = benchmarks.run_benchmarks(
+        [50], reads=10, writes=2, tokens=20, startup_runs=0, trace_memory=True, workdir=tmp_path
+    )
+    names = {result.name for result in results}
+    assert {"cold_open", "get", "list", "save", "complete", "export_jsonl", "purge", "token_validate"} <= names
+    assert all(result.peak_bytes is not None for result in results)
+
+    baseline = {result.key: result.latency_us for result in results}
+    assert benchmarks.compare_results(results, baseline) == []
+    slowed = {key: latency / 10 for key, latency in baseline.items() if latency}
+    assert benchmarks.compare_results(results, slowed)
+
+
+def test_bench_command_writes_and_compares_results(tmp_path: Path) -> None:
+    output = tmp_path / "results.json"
+    args = ["bench", "--size", "20", "--reads", "5", "--writes", "1", "--tokens", "10", "--startup-runs", "0"]
+    env = {"ARCHON_DB_PATH": str(tmp_path / "tasks.json")}
+    result = CliRunner().invoke(main, [*args, "--output", str(output)], env=env)
+    assert result.exit_code == 0, result.output
+    document = json.loads(output.read_text())
+    assert {record["name"] for record in document["results"]} >= {"get", "token_issue"}
+
+    for record in document["results"]:
+        record["latency_us"] = 0.0001
+    output.write_text(json.dumps(document))
+    result = CliRunner().invoke(main, [*args, "--baseline", str(output)], env=env)
+    assert result.exit_code == 1
+    assert "regressed" in result.output
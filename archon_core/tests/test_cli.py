@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+from click.testing import CliRunner
+
+from archon_app.cli import main
+
+
+def _invoke(tmp_path: Path, args: list[str], input: str | None = None):
+    env = {"ARCHON_DB_PATH": str(tmp_path / "tasks.json")}
+    result = CliRunner().invoke(main, args, input=input, env=env)
+    assert result.exit_code == 0, result.output
+    return result
+
+
+def test_bulk_commands_read_jsonl_from_stdin(tmp_path: Path) -> None:
+    lines = "\n".join(json.dumps({"title": f"Task {i}", "owner": "QA"}) for i in range(3))
+    created = _invoke(tmp_path, ["create-many"], input=lines)
+    ids = [json.loads(line)["task_id"] for line in created.output.splitlines()]
+    assert len(ids) == 3
+
+    completed = _invoke(tmp_path, ["complete-many"], input="\n".join(json.dumps(i) for i in ids[:2]))
+    assert [json.loads(line)["task_id"] for line in completed.output.splitlines()] == ids[:2]
+
+    deleted = _invoke(tmp_path, ["delete-many"], input=json.dumps({"identifier": ids[2]}))
+    assert "Deleted 1 tasks" in deleted.output
+
+
+def test_bulk_command_reports_unknown_identifier(tmp_path: Path) -> None:
+    env = {"ARCHON_DB_PATH": str(tmp_path / "tasks.json")}
+    result = CliRunner().invoke(main, ["complete-many"], input='"missing"\n', env=env)
+    assert result.exit_code == 1
+    assert "Task 'missing' not found" in result.output
+
+
+def test_create_many_rejects_records_that_are_not_objects(tmp_path: Path) -> None:
+    env = {"ARCHON_DB_PATH": str(tmp_path / "tasks.json")}
+    lines = '{"title": "Fine", "owner": "QA"}\n\n[1]\n'
+    result = CliRunner().invoke(main, ["create-many"], input=lines, env=env)
+    assert result.exit_code == 2
+    assert "line 3: expected a task object" in result.output
+
+
+def test_list_and_export_apply_filters_and_pagination(tmp_path: Path) -> None:
+    records = [{"title": f"Task {i}", "owner": "alice" if i % 2 else "bob", "priority": "high"} for i in range(6)]
+    _invoke(tmp_path, ["create-many"], input="\n".join(json.dumps(r) for r in records))
+
+    listed = _invoke(tmp_path, ["list", "--owner", "alice", "--offset", "1", "--limit", "1", "--format", "jsonl"])
+    assert [json.loads(line)["title"] for line in listed.output.splitlines()] == ["Task 3"]
+
+    table = _invoke(tmp_path, ["list", "--open", "--owner", "bob"])
+    assert len(table.output.splitlines()) == 2 + 3
+
+    output = tmp_path / "export.jsonl"
+    exported = _invoke(tmp_path, ["export", str(output), "--format", "jsonl", "--priority", "high", "--limit", "4"])
+    assert "Exported 4 tasks" in exported.output
+    assert len(output.read_text(encoding="utf-8").splitlines()) == 4
+
+
+def test_cli_import_stays_lightweight() -> None:
+    root = Path(__file__).resolve().parents[1]
+    env = dict(os.environ, PYTHONPATH=str(root))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import archon_app.cli"],
+        capture_output=True, text=True, check=True, env=env,
+    )
+    imported = {line.rsplit("|", 1)[-1].strip() for line in result.stderr.splitlines() if "|" in line}
+    assert "archon_app.cli" in imported
+    heavy = {"yaml", "sqlite3", "asyncio", "hmac", "archon_app.data.repository", "archon_app.server"}
+    assert heavy.isdisjoint(imported), sorted(heavy & imported)
+
+
+def test_help_and_refused_purge_do_not_touch_the_store(tmp_path: Path) -> None:
+    env = {"ARCHON_DB_PATH": str(tmp_path / "tasks.json")}
+    assert CliRunner().invoke(main, ["--help"], env=env).exit_code == 0
+    refused = CliRunner().invoke(main, ["purge"], env=env)
+    assert refused.exit_code == 2
+    assert not (tmp_path / "tasks.json").exists()
+
+
+def test_import_command_merges_or_replaces(tmp_path: Path) -> None:
+    _invoke(tmp_path, ["create-many"], input=json.dumps({"title": "Existing", "owner": "QA"}))
+    backup = tmp_path / "backup.jsonl"
+    backup.write_text(
+        "\n".join(json.dumps({"identifier": f"t{i}", "title": f"Restored {i}", "owner": "QA"}) for i in range(3)),
+        encoding="utf-8",
+    )
+
+    result = _invoke(tmp_path, ["import", str(backup), "--batch-size", "2", "--workers", "0"])
+    assert "Imported 3 tasks" in result.output
+    _invoke(tmp_path, ["import", str(backup), "--workers", "0"])
+    listed = _invoke(tmp_path, ["list", "--format", "jsonl"]).output.splitlines()
+    assert len(listed) == 4
+
+    _invoke(tmp_path, ["import", str(backup), "--mode", "replace", "--workers", "0"])
+    titles = [json.loads(line)["title"] for line in _invoke(tmp_path, ["list", "--format", "jsonl"]).output.splitlines()]
+    assert titles == ["Restored 0", "Restored 1", "Restored 2"]
+
+
+def test_archive_command_requires_enabled_archive(tmp_path: Path) -> None:
+    config = tmp_path / "config.json"
+    config.write_text(
+        json.dumps(
+            {
+                "database": {"path": str(tmp_path / "tasks.json")},
+                "archive": {"enabled": True, "path": str(tmp_path / "archive")},
+                "aggregates": {"enabled": True, "path": str(tmp_path / "aggregates.json")},
+                "changes": {"enabled": True, "path": str(tmp_path / "changes.jsonl")},
+            }
+        ),
+        encoding="utf-8",
+    )
+    runner = CliRunner()
+    report = ["--config", str(config), "report", "--by", "owner", "--format", "json"]
+    created = runner.invoke(main, ["--config", str(config), "create-many"], input='{"title": "A", "owner": "QA"}\n')
+    task_id = json.loads(created.output)["task_id"]
+    completed = runner.invoke(main, ["--config", str(config), "complete", "--", task_id])
+    assert completed.exit_code == 0, completed.output
+    before = json.loads(runner.invoke(main, report).output)
+    assert before[0]["completed"] == 1
+
+    result = runner.invoke(main, ["--config", str(config), "archive", "--older-than", "0"])
+    assert result.exit_code == 0, result.output
+    assert "Archived 1 tasks" in result.output
+    listed = runner.invoke(main, ["--config", str(config), "list", "--count"])
+    assert listed.output.strip() == "0"
+    # Archiving is a move: the report keeps counting the task and the change feed records no delete.
+    assert json.loads(runner.invoke(main, report).output) == before
+    assert json.loads(runner.invoke(main, [*report, "--rebuild"]).output) == before
+    ops = [json.loads(line)["op"] for line in (tmp_path / "changes.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert "delete" not in ops
+
+    refused = CliRunner().invoke(main, ["archive"], env={"ARCHON_DB_PATH": str(tmp_path / "other.json")})
+    assert refused.exit_code == 2
+    assert "Archiving is disabled" in refused.output
+
+
+def test_incremental_export_follows_change_feed(tmp_path: Path) -> None:
+    config = tmp_path / "config.json"
+    config.write_text(
+        json.dumps(
+            {
+                "database": {"path": str(tmp_path / "tasks.json")},
+                "changes": {"enabled": True, "path": str(tmp_path / "changes.jsonl")},
+            }
+        ),
+        encoding="utf-8",
+    )
+    runner = CliRunner()
+
+    def invoke(*args: str, input: str | None = None):
+        result = runner.invoke(main, ["--config", str(config), *args], input=input)
+        assert result.exit_code == 0, result.output
+        return result
+
+    invoke("create-many", input="\n".join(json.dumps({"title": f"T{i}", "owner": "QA"}) for i in range(3)))
+    output = tmp_path / "delta.jsonl"
+    assert "Exported 3 tasks" in invoke("export", str(output), "--format", "jsonl", "--incremental").output
+
+    created = invoke("create", "--title", "Later", "--owner", "QA").output
+    assert "Exported 1 tasks" in invoke("export", str(output), "--format", "jsonl", "--incremental").output
+    assert [json.loads(line)["title"] for line in output.read_text(encoding="utf-8").splitlines()] == ["Later"]
+    assert "Exported 0 tasks" in invoke("export", str(output), "--format", "jsonl", "--incremental").output
+
+    changes = [json.loads(line) for line in invoke("changes", "--since", "3").output.splitlines()]
+    assert [(c["seq"], c["op"], c["id"]) for c in changes] == [(4, "upsert", created.split()[-1])]
+
+
+def test_run_command_completes_open_tasks(tmp_path: Path) -> None:
+    _invoke(tmp_path, ["create-many"], input="\n".join(json.dumps({"title": f"T{i}", "owner": "QA"}) for i in range(5)))
+    result = _invoke(tmp_path, ["run", "--handler", "archon_app.services.dispatch:noop_handler", "--fair"])
+    assert "Dispatched 5 tasks" in result.output
+    assert "5 completed" in result.output
+    assert _invoke(tmp_path, ["list", "--open", "--count"]).output.strip() == "0"
+
+    bad = CliRunner().invoke(main, ["run", "--handler", "nope"], env={"ARCHON_DB_PATH": str(tmp_path / "tasks.json")})
+    assert bad.exit_code == 2
+
+
+def test_search_command_ranks_and_paginates(tmp_path: Path) -> None:
+    env = {"ARCHON_DB_PATH": str(tmp_path / "tasks.json")}
+    runner = CliRunner()
+    lines = "\n".join(json.dumps({"title": f"Deploy service {i}", "owner": "QA"}) for i in range(3))
+    assert runner.invoke(main, ["create-many"], input=lines, env=env).exit_code == 0
+
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"search": {"enabled": True}}), encoding="utf-8")
+    args = ["--config", str(config), "search", "deploy", "--limit", "2", "--format", "jsonl"]
+    result = runner.invoke(main, args, env=env)
+    assert result.exit_code == 0, result.output
+    assert [json.loads(line)["title"] for line in result.output.splitlines()] == ["Deploy service 0", "Deploy service 1"]
+    assert (tmp_path / "tasks.json.search" / "index.bin").exists()
+
+    runner.invoke(main, ["--config", str(config), "create", "--title", "Deploy hotfix", "--owner", "QA"], env=env)
+    result = runner.invoke(main, ["--config", str(config), "search", "hotf", "--prefix", "--format", "jsonl"], env=env)
+    assert [json.loads(line)["title"] for line in result.output.splitlines()] == ["Deploy hotfix"]
+
+
+def test_report_reads_maintained_aggregates(tmp_path: Path) -> None:
+    env = {"ARCHON_DB_PATH": str(tmp_path / "tasks.json")}
+    runner = CliRunner()
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps({"aggregates": {"enabled": True}}), encoding="utf-8")
+    lines = "\n".join(json.dumps({"title": f"Task {i}", "owner": "QA" if i else "Ops"}) for i in range(3))
+    created = runner.invoke(main, ["--config", str(config), "create-many"], input=lines, env=env)
+    ids = [json.loads(line)["task_id"] for line in created.output.splitlines()]
+    runner.invoke(main, ["--config", str(config), "complete", "--", ids[1]], env=env)
+
+    result = runner.invoke(main, ["--config", str(config), "report", "--by", "owner", "--format", "json"], env=env)
+    assert result.exit_code == 0, result.output
+    rows = {row["owner"]: row for row in json.loads(result.output)}
+    assert (rows["QA"]["open"], rows["QA"]["completed"]) == (1, 1)
+    assert rows["QA"]["latency"]["p95"] is not None
+    assert (rows["Ops"]["open"], rows["Ops"]["completed"]) == (1, 0)
+    assert (tmp_path / "tasks.json.aggregates.json").exists()
+
+    # Without maintained aggregates the report scans the store instead.
+    table = runner.invoke(main, ["report", "--by", "none"], env=env)
+    assert table.exit_code == 0, table.output
+    open_count, completed_count = table.output.splitlines()[2].split(" | ")[:2]
+    assert (open_count.strip(), completed_count.strip()) == ("2", "1")
+
+
+def test_revoke_command_records_tokens_and_tasks(tmp_path: Path) -> None:
+    env = {"ARCHON_DB_PATH": str(tmp_path / "tasks.json"), "ARCHON_REVOCATIONS_PATH": str(tmp_path / "revoked.db")}
+    runner = CliRunner()
+    created = runner.invoke(main, ["create-many"], input=json.dumps({"title": "Ship", "owner": "QA"}), env=env)
+    task_id = json.loads(created.output)["task_id"]
+    completed = runner.invoke(main, ["complete", "--", task_id], env=env)
+    token = json.loads(completed.output)["completion_token"]
+
+    result = runner.invoke(main, ["revoke", token, "--task", task_id], env=env)
+    assert result.exit_code == 0, result.output
+    assert json.loads(result.output) == {"tokens_revoked": 1, "tasks_revoked": [task_id]}
+    assert runner.invoke(main, ["revoke"], env=env).exit_code == 2
+    assert runner.invoke(main, ["revoke", "--task", "missing"], env=env).exit_code == 1
+
+
+def test_snapshot_commands_create_list_and_restore(tmp_path: Path) -> None:
+    _invoke(tmp_path, ["create-many"], input=json.dumps({"title": "Keep", "owner": "QA"}))
+    created = json.loads(_invoke(tmp_path, ["snapshot", "create", "--name", "before"]).output)
+    assert created["kind"] == "full"
+    _invoke(tmp_path, ["create-many"], input=json.dumps({"title": "Later", "owner": "QA"}))
+
+    assert "before" in _invoke(tmp_path, ["snapshot", "list"]).output
+    env = {"ARCHON_DB_PATH": str(tmp_path / "tasks.json")}
+    assert CliRunner().invoke(main, ["snapshot", "restore", "before"], env=env).exit_code == 2
+    assert CliRunner().invoke(main, ["snapshot", "create", "--incremental"], env=env).exit_code == 1
+    assert "Restored 1 tasks" in _invoke(tmp_path, ["snapshot", "restore", "before", "--force"]).output
+    assert json.loads(_invoke(tmp_path, ["list", "--format", "jsonl"]).output)["title"] == "Keep"
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from archon_app.config import AppConfig
+from archon_app.data.factory import create_repository
+from archon_app.data.models import Task
+from archon_app.data.repository import VersionConflictError
+from archon_app.security.auth import TokenManager
+from archon_app.services.task_service import TaskService
+
+WRITERS = 4
+TASKS_PER_WRITER = 25
+
+
+def _service(path: str) -> TaskService:
+    config = AppConfig(environment="test", database_path=Path(path), token_ttl=60)
+    return TaskService(create_repository(config), TokenManager(ttl_seconds=60, secret=b"secret"))
+
+
+def _create_tasks(path: str, writer: int) -> None:
+    service = _service(path)
+    for index in range(TASKS_PER_WRITER):
+        service.create_task(title=f"{writer}-{index}", owner="QA", priority="low")
+    service.close()
+
+
+def _complete(path: str, identifier: str, results) -> None:
+    service = _service(path)
+    results.put(service.complete_task(identifier))
+    service.close()
+
+
+def _run(target, args_list) -> None:
+    processes = [multiprocessing.Process(target=target, args=args) for args in args_list]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+
+@pytest.mark.parametrize("filename", ["tasks.json", "tasks.jsonl", "tasks.db"])
+def test_concurrent_writers_do_not_lose_updates(tmp_path: Path, filename: str) -> None:
+    path = str(tmp_path / filename)
+    _run(_create_tasks, [(path, writer) for writer in range(WRITERS)])
+
+    titles = {task.title for task in _service(path).list_tasks()}
+    assert len(titles) == WRITERS * TASKS_PER_WRITER
+
+
+@pytest.mark.parametrize("filename", ["tasks.json", "tasks.jsonl"])
+def test_concurrent_completion_yields_a_single_token(tmp_path: Path, filename: str) -> None:
+    path = str(tmp_path / filename)
+    task = _service(path).create_task(title="Shared", owner="QA", priority="high")
+    results = multiprocessing.Queue()
+    _run(_complete, [(path, task.identifier, results) for _ in range(WRITERS)])
+
+    tokens = {results.get(timeout=5) for _ in range(WRITERS)}
+    assert tokens == {_service(path)._repository.get(task.identifier).completion_token}
+
+
+@pytest.mark.parametrize("filename", ["tasks.json", "tasks.jsonl", "tasks.db"])
+def test_stale_save_is_rejected(tmp_path: Path, filename: str) -> None:
+    config = AppConfig(environment="test", database_path=tmp_path / filename, token_ttl=60)
+    repo = create_repository(config)
+    task = repo.save(Task(title="Versioned", owner="QA", priority="low"))
+    assert task.version == 1
+
+    first, second = repo.get(task.identifier), repo.get(task.identifier)
+    first.title = "First writer"
+    repo.save(first)
+    second.title = "Second writer"
+    with pytest.raises(VersionConflictError):
+        repo.save(second)
+    assert second.version == 1
+    assert repo.get(task.identifier).title == "First writer"
+    repo.close()
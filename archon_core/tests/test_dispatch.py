@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from threading import Event, Lock
+import time
+from typing import Dict
+
+from archon_app.data.models import Task
+from archon_app.data.repository import FileTaskRepository
+from archon_app.security.auth import TokenManager
+from archon_app.services.dispatch import Dispatcher, ReadyQueue, noop_handler
+from archon_app.services.task_service import TaskService
+
+
+def _task(title: str, owner: str, priority: str, minute: int) -> Task:
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=minute)
+    return Task(title=title, owner=owner, priority=priority, created_at=created)
+
+
+def test_ready_queue_orders_by_priority_then_age_and_shares_between_owners() -> None:
+    tasks = [
+        _task("a-low", "alice", "low", 0),
+        _task("a-high-2", "alice", "high", 2),
+        _task("a-high-1", "alice", "high", 1),
+        _task("a-high-3", "alice", "high", 3),
+        _task("b-high", "bob", "high", 9),
+        _task("b-medium", "bob", "medium", 0),
+    ]
+    plain = ReadyQueue()
+    fair = ReadyQueue(fair=True)
+    for task in tasks:
+        plain.push(task)
+        fair.push(task)
+
+    assert [plain.pop()[0].title for _ in range(len(tasks))] == [
+        "a-high-1", "a-high-2", "a-high-3", "b-high", "b-medium", "a-low"
+    ]
+    assert [fair.pop()[0].title for _ in range(len(tasks))] == [
+        "a-high-1", "b-high", "a-high-2", "a-high-3", "b-medium", "a-low"
+    ]
+
+
+def test_dispatcher_batches_completions_and_retries_failures(tmp_path: Path) -> None:
+    service = TaskService(FileTaskRepository(tmp_path / "tasks.json"), TokenManager(ttl_seconds=60, secret=b"s"))
+    created = service.create_many({"title": f"Task {i}", "owner": "QA"} for i in range(50))
+    attempts: Dict[str, int] = {}
+    lock = Lock()
+
+    def flaky(task: Task) -> None:
+        with lock:
+            attempts[task.title] = attempts.get(task.title, 0) + 1
+            count = attempts[task.title]
+        if task.title == "Task 7" or (task.title == "Task 3" and count == 1):
+            raise RuntimeError("boom")
+
+    dispatcher = Dispatcher(service, flaky, workers=4, max_attempts=2, batch_size=16)
+    assert dispatcher.submit(service.iter_tasks()) == 50
+    stats = dispatcher.run()
+
+    assert (stats.completed, stats.failed, stats.retried) == (49, 1, 2)
+    open_tasks = [t.title for t in service.iter_tasks(completed=False)]
+    assert open_tasks == ["Task 7"]
+    assert all(service.get_task(t.identifier).completion_token for t in created if t.title != "Task 7")
+
+
+def test_dispatcher_requeues_expired_leases(tmp_path: Path) -> None:
+    service = TaskService(FileTaskRepository(tmp_path / "tasks.json"), TokenManager(ttl_seconds=60, secret=b"s"))
+    service.create_many([{"title": "Slow", "owner": "QA"}, {"title": "Fast", "owner": "QA"}])
+    first_run = Event()
+
+    def handler(task: Task) -> None:
+        if task.title == "Slow" and not first_run.is_set():
+            first_run.set()
+            time.sleep(0.3)
+            return
+        noop_handler(task)
+
+    dispatcher = Dispatcher(service, handler, workers=2, lease_timeout=0.1, max_attempts=2)
+    dispatcher.submit(service.iter_tasks())
+    stats = dispatcher.run()
+    assert stats.expired == 1
+    assert stats.completed == 2
+    assert service.count_tasks(completed=False) == 0
+
+
+def test_dispatcher_leases_start_when_handlers_do(tmp_path: Path) -> None:
+    service = TaskService(FileTaskRepository(tmp_path / "tasks.json"), TokenManager(ttl_seconds=60, secret=b"s"))
+    service.create_many({"title": f"Task {i}", "owner": "QA"} for i in range(8))
+
+    def handler(task: Task) -> None:
+        time.sleep(0.1)
+
+    # Eight tasks take 0.8s on one worker, far longer than any single lease.
+    dispatcher = Dispatcher(service, handler, workers=1, lease_timeout=0.25)
+    dispatcher.submit(service.iter_tasks())
+    stats = dispatcher.run()
+    assert (stats.dispatched, stats.completed, stats.expired, stats.failed) == (8, 8, 0, 0)
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import pstats
+from threading import RLock
+
+from click.testing import CliRunner
+import pytest
+
+from archon_app.cli import main
+from archon_app.data.models import Task
+from archon_app.data.repository import FileTaskRepository
+from archon_app.utils import metrics
+
+
+@pytest.fixture
+def registry():
+    metrics.REGISTRY.reset()
+    metrics.enable()
+    yield metrics.REGISTRY
+    metrics.enable(False)
+    metrics.REGISTRY.reset()
+
+
+def test_disabled_metrics_are_no_ops() -> None:
+    assert not metrics.is_enabled()
+    metrics.inc("calls")
+    with metrics.timer("work"):
+        pass
+    assert metrics.REGISTRY.snapshot() == {"counters": {}, "histograms": {}}
+    assert isinstance(metrics.tracked_lock("lock"), type(RLock()))
+
+
+def test_repository_reports_bytes_and_latency(tmp_path: Path, registry) -> None:
+    repo = FileTaskRepository(tmp_path / "tasks.json")
+    repo.save(Task(title="Measured", owner="QA", priority="low"))
+    FileTaskRepository(tmp_path / "tasks.json").list()
+
+    snapshot = registry.snapshot()
+    assert snapshot["counters"]["repository.bytes_written"] > 0
+    assert snapshot["counters"]["repository.bytes_read"] > 0
+    assert snapshot["histograms"]["repository.write"]["count"] >= 1
+
+    text = metrics.to_prometheus(snapshot)
+    assert "# TYPE archon_repository_bytes_read_total counter" in text
+    assert "# TYPE archon_repository_write_seconds histogram" in text
+    assert 'archon_repository_write_seconds_bucket{le="+Inf"}' in text
+
+    path = tmp_path / "metrics.json"
+    metrics.persist(path)
+    metrics.inc("repository.bytes_read", 5)
+    metrics.persist(path)
+    assert metrics.load(path)["counters"]["repository.bytes_read"] == snapshot["counters"]["repository.bytes_read"] + 5
+
+
+def test_stats_command_and_profiling(tmp_path: Path) -> None:
+    env = {
+        "ARCHON_DB_PATH": str(tmp_path / "tasks.json"),
+        "ARCHON_METRICS": "1",
+        "ARCHON_METRICS_PATH": str(tmp_path / "metrics.json"),
+    }
+    runner = CliRunner()
+    profile = tmp_path / "create.prof"
+    args = ["--profile", str(profile), "create"]
+    result = runner.invoke(main, [*args, "--title", "Profiled", "--owner", "QA"], env=env)
+    assert result.exit_code == 0, result.output
+    assert pstats.Stats(str(profile)).total_calls > 0
+    assert not metrics.is_enabled()
+
+    sampled = tmp_path / "list.folded"
+    result = runner.invoke(main, ["--profile", str(sampled), "--profiler", "sample", "list"], env=env)
+    assert result.exit_code == 0, result.output
+    assert sampled.exists()
+
+    stats = runner.invoke(main, ["stats"], env=env)
+    assert "archon_service_create_task_seconds_count 1" in stats.output
+    dumped = json.loads(runner.invoke(main, ["stats", "--format", "json", "--reset"], env=env).output)
+    assert dumped["histograms"]["service.create_task"]["count"] == 1
+    assert json.loads(runner.invoke(main, ["stats", "--format", "json"], env=env).output)["counters"] == {}
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from threading import Event
+import time
+from typing import List, Sequence
+
+from archon_app.data.repository import FileTaskRepository
+from archon_app.security.auth import TokenManager
+from archon_app.services.notifications import Notification, NotificationSink, Notifier, build_notifier
+from archon_app.services.task_service import TaskService
+
+
+class _FlakySink(NotificationSink):
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.sent: List[tuple] = []
+
+    def send(self, channel: str, recipient: str, notifications: Sequence[Notification]) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("SMTP unavailable")
+        self.sent.append((channel, recipient, [n.task_id for n in notifications]))
+
+
+class _BlockedSink(NotificationSink):
+    def __init__(self) -> None:
+        self.release = Event()
+
+    def send(self, channel: str, recipient: str, notifications: Sequence[Notification]) -> None:
+        self.release.wait(5)
+
+
+def test_service_events_are_coalesced_per_recipient(tmp_path: Path) -> None:
+    outbox = tmp_path / "outbox.jsonl"
+    notifier = build_notifier({"email_enabled": True, "sink": "file", "path": str(outbox), "flush_interval": 0.5})
+    service = TaskService(FileTaskRepository(tmp_path / "tasks.json"), TokenManager(60), notifier)
+    tasks = service.create_many([{"title": f"Task {i}", "owner": "alice" if i % 2 else "bob"} for i in range(4)])
+    service.complete_task(tasks[0].identifier)
+    service.close()
+
+    messages = [json.loads(line) for line in outbox.read_text().splitlines()]
+    assert sorted(m["recipient"] for m in messages) == ["alice", "bob"]
+    events = {m["recipient"]: [(n["event"], n["task_id"]) for n in m["notifications"]] for m in messages}
+    assert ("completed", tasks[0].identifier) in events["bob"]
+    assert len(events["alice"]) == 2 and {m["channel"] for m in messages} == {"email"}
+
+
+def test_failed_deliveries_are_retried_with_backoff() -> None:
+    sink = _FlakySink(failures=2)
+    notifier = Notifier(sink, ["email", "sms"], backoff=0.001, flush_interval=0.01)
+    notifier.publish(Notification("created", "alice", "t1"))
+    notifier.close()
+    assert sorted(sink.sent) == [("email", "alice", ["t1"]), ("sms", "alice", ["t1"])]
+    assert notifier.stats["retries"] == 2 and notifier.stats["failed"] == 0
+
+    broken = Notifier(_FlakySink(failures=100), max_retries=1, backoff=0.001, flush_interval=0.01)
+    broken.publish(Notification("created", "bob", "t2"))
+    broken.close()
+    assert broken.stats["failed"] == 1
+
+
+def test_full_queue_drops_instead_of_blocking_publishers() -> None:
+    sink = _BlockedSink()
+    notifier = Notifier(sink, queue_size=5, batch_size=1, flush_interval=0, overflow="drop_new")
+    started = time.perf_counter()
+    accepted = sum(notifier.publish(Notification("created", "alice", f"t{i}")) for i in range(100))
+    assert time.perf_counter() - started < 1
+    assert accepted <= 6
+    assert notifier.stats["dropped"] == 100 - accepted
+    sink.release.set()
+    notifier.close()
@@ -0,0 +1,577 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+import json
+from pathlib import Path
+
+import pytest
+
+from click.testing import CliRunner
+
+from archon_app.cli import main
+from archon_app.config import AppConfig
+from archon_app.data import identifiers, repository as repository_module
+from archon_app.data.aggregates import AggregateStore, AggregatingRepository, TaskAggregates
+from archon_app.data.archive import ArchiveTaskRepository, TaskArchive
+from archon_app.data.changes import ChangeFeed, ChangeTrackingRepository, collapse
+from archon_app.data.codecs import CODECS, detect_codec
+from archon_app.data.columnar import ColumnarTaskRepository
+from archon_app.data.factory import create_repository
+from archon_app.data.journal import JournalTaskRepository
+from archon_app.data.models import Task
+from archon_app.data.repository import FileTaskRepository, VersionConflictError
+from archon_app.data.search import SearchIndex, SearchIndexingRepository
+from archon_app.data.sharded import ShardedTaskRepository, shard_index
+from archon_app.data.snapshot import SnapshotStore
+from archon_app.data.sqlite import SqliteTaskRepository
+from archon_app.security.auth import TokenManager
+from archon_app.services.task_service import TaskService
+
+
+def test_journal_replays_mutations(tmp_path: Path) -> None:
+    path = tmp_path / "tasks.jsonl"
+    repo = JournalTaskRepository(path)
+    first = repo.save(Task(title="One", owner="QA", priority="low"))
+    second = repo.save(Task(title="Two", owner="QA", priority="high"))
+    first.title = "One (edited)"
+    repo.save(first)
+    repo.delete(second.identifier)
+    repo.close()
+
+    reopened = JournalTaskRepository(path)
+    tasks = reopened.list()
+    assert [t.title for t in tasks] == ["One (edited)"]
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 4
+
+
+def test_journal_compaction_keeps_live_state(tmp_path: Path) -> None:
+    path = tmp_path / "tasks.jsonl"
+    repo = JournalTaskRepository(path, compaction_threshold=2048, background_compaction=False)
+    task = repo.save(Task(title="Hot", owner="QA", priority="medium"))
+    for index in range(50):
+        task.description = f"revision {index}"
+        repo.save(task)
+    repo.close()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert len(lines) < 50
+    assert JournalTaskRepository(path).get(task.identifier).description == "revision 49"
+
+
+def test_journal_discards_torn_trailing_record(tmp_path: Path) -> None:
+    path = tmp_path / "tasks.jsonl"
+    repo = JournalTaskRepository(path)
+    task = repo.save(Task(title="Kept", owner="QA", priority="low"))
+    repo.close()
+    with path.open("a", encoding="utf-8") as fh:
+        fh.write('{"op":"upsert","task":{"identi')
+
+    reopened = JournalTaskRepository(path)
+    assert [t.identifier for t in reopened.list()] == [task.identifier]
+
+
+def test_journal_adopts_legacy_json_store(tmp_path: Path) -> None:
+    path = tmp_path / "tasks.json"
+    legacy = FileTaskRepository(path)
+    legacy.save(Task(title="Legacy", owner="QA", priority="high"))
+
+    repo = JournalTaskRepository(path)
+    assert [t.title for t in repo.list()] == ["Legacy"]
+    assert json.loads(path.read_text(encoding="utf-8").splitlines()[0])["op"] == "upsert"
+
+
+def test_create_repository_selects_backend(tmp_path: Path) -> None:
+    journal = AppConfig(environment="test", database_path=tmp_path / "tasks.jsonl", token_ttl=60)
+    assert isinstance(create_repository(journal), JournalTaskRepository)
+    explicit = AppConfig(
+        environment="test", database_path=tmp_path / "tasks.json", token_ttl=60, database_backend="journal"
+    )
+    assert isinstance(create_repository(explicit), JournalTaskRepository)
+    sqlite = AppConfig(environment="test", database_path=tmp_path / "tasks.db", token_ttl=60)
+    assert isinstance(create_repository(sqlite), SqliteTaskRepository)
+    default = AppConfig(environment="test", database_path=tmp_path / "tasks.json", token_ttl=60)
+    assert isinstance(create_repository(default), FileTaskRepository)
+
+
+def test_file_repository_caches_parsed_tasks(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    repo = FileTaskRepository(tmp_path / "tasks.json")
+    task = repo.save(Task(title="Cached", owner="QA", priority="low"))
+    calls = []
+    original = repository_module.detect_codec
+    monkeypatch.setattr(repository_module, "detect_codec", lambda payload: calls.append(1) or original(payload))
+
+    for _ in range(3):
+        assert repo.get(task.identifier).title == "Cached"
+        assert len(repo.list()) == 1
+    assert calls == []
+
+    fetched = repo.get(task.identifier)
+    fetched.title = "Mutated"
+    assert repo.get(task.identifier).title == "Cached"
+
+
+def test_file_repository_reloads_on_external_change(tmp_path: Path) -> None:
+    path = tmp_path / "tasks.json"
+    repo = FileTaskRepository(path)
+    other = FileTaskRepository(path)
+    task = repo.save(Task(title="Original", owner="QA", priority="low"))
+    assert other.get(task.identifier).title == "Original"
+
+    task.title = "Changed elsewhere"
+    repo.save(task)
+    assert other.get(task.identifier).title == "Changed elsewhere"
+
+
+@pytest.mark.parametrize("fmt", ["json", "jsonl", "binary"])
+def test_codecs_round_trip_tasks(fmt: str) -> None:
+    codec = CODECS[fmt]
+    done = Task(title="Done", owner="QA", priority="high", description="ünïcode")
+    done.completed_at = done.created_at
+    done.completion_token = "token"
+    done.version = 3
+    tasks = [Task(title="Open", owner="Ops", priority="low"), done]
+
+    payload = codec.encode(tasks)
+    assert detect_codec(payload) is codec
+    assert codec.decode(payload) == tasks
+    assert codec.decode(codec.encode([])) == []
+
+
+def test_file_repository_migrates_format_on_write(tmp_path: Path) -> None:
+    path = tmp_path / "tasks.json"
+    task = FileTaskRepository(path).save(Task(title="Legacy", owner="QA", priority="low"))
+    assert path.read_bytes().startswith(b"[")
+
+    repo = FileTaskRepository(path, codec=CODECS["binary"])
+    assert repo.get(task.identifier).title == "Legacy"
+    repo.save(Task(title="New", owner="QA", priority="high"))
+    assert detect_codec(path.read_bytes()) is CODECS["binary"]
+    assert {t.title for t in FileTaskRepository(path).list()} == {"Legacy", "New"}
+
+
+def test_sqlite_repository_filters_with_indexes(tmp_path: Path) -> None:
+    repo = SqliteTaskRepository(tmp_path / "tasks.db")
+    wanted = repo.save(Task(title="Open", owner="alice", priority="high"))
+    done = Task(title="Done", owner="alice", priority="high")
+    done.completed_at = done.created_at
+    repo.save(done)
+    repo.save(Task(title="Other", owner="bob", priority="high"))
+
+    found = repo.find(owner="alice", priority="HIGH", completed=False)
+    assert [t.identifier for t in found] == [wanted.identifier]
+    assert repo.get(done.identifier).is_completed
+    assert repo.count() == 3
+    assert repo.count_matching(owner="alice", priority="HIGH") == 2
+    assert repo.count_matching(owner="alice", completed=True) == 1
+    assert repo.count_matching(priority="low") == 0
+    plan = repo._conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM tasks WHERE owner = ? AND priority = ?", ("alice", "high")
+    ).fetchall()
+    assert "idx_tasks_owner" in " ".join(str(row) for row in plan)
+    repo.close()
+
+
+def test_migrate_command_imports_json_store(tmp_path: Path) -> None:
+    source = tmp_path / "archon-data.json"
+    legacy = FileTaskRepository(source)
+    legacy.replace_all([Task(title=f"Task {i}", owner="QA", priority="low") for i in range(3)])
+    target = tmp_path / "archon-data.db"
+
+    env = {"ARCHON_DB_PATH": str(tmp_path / "cli.json")}
+    result = CliRunner().invoke(main, ["migrate", str(source), str(target)], env=env)
+    assert result.exit_code == 0, result.output
+    repo = SqliteTaskRepository(target)
+    assert sorted(t.title for t in repo.list()) == ["Task 0", "Task 1", "Task 2"]
+    repo.close()
+
+
+@pytest.mark.parametrize("filename", ["tasks.json", "tasks.jsonl", "tasks.db"])
+def test_batch_operations_across_backends(tmp_path: Path, filename: str) -> None:
+    config = AppConfig(environment="test", database_path=tmp_path / filename, token_ttl=60)
+    repo = create_repository(config)
+    tasks = repo.save_many([Task(title=f"Task {i}", owner="QA", priority="low") for i in range(5)])
+    ids = [t.identifier for t in tasks]
+
+    assert [t.identifier for t in repo.get_many(reversed(ids))] == ids[::-1]
+    with pytest.raises(KeyError):
+        repo.get_many([ids[0], "missing"])
+    repo.delete_many(ids[:3])
+    assert sorted(t.identifier for t in repo.list()) == sorted(ids[3:])
+    repo.close()
+
+
+@pytest.mark.parametrize("filename", ["tasks.json", "tasks.jsonl", "tasks.db"])
+def test_iter_tasks_pages_in_creation_order(tmp_path: Path, filename: str) -> None:
+    config = AppConfig(environment="test", database_path=tmp_path / filename, token_ttl=60)
+    repo = create_repository(config)
+    tasks = [Task(title=f"Task {i}", owner="QA", priority="high" if i % 2 else "low") for i in range(6)]
+    repo.save_many(reversed(tasks))
+
+    page = repo.iter_tasks(priority="high", offset=1, limit=2)
+    assert [t.title for t in page] == ["Task 3", "Task 5"]
+    assert [t.title for t in repo.iter_tasks(offset=4)] == ["Task 4", "Task 5"]
+    repo.close()
+
+
+@pytest.mark.parametrize("filename", ["tasks.json", "tasks.jsonl", "tasks.db", "sharded"])
+def test_iter_created_seeks_time_ranges(tmp_path: Path, filename: str) -> None:
+    backend = "sharded" if filename == "sharded" else "auto"
+    config = AppConfig(environment="test", database_path=tmp_path / filename, token_ttl=60, database_backend=backend)
+    repo = create_repository(config)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    repo.save_many(
+        Task(title=f"Task {i}", owner="QA", priority="low", created_at=start + timedelta(hours=i)) for i in range(10)
+    )
+
+    window = repo.iter_created(since=start + timedelta(hours=3), until=start + timedelta(hours=6))
+    assert [t.title for t in window] == ["Task 3", "Task 4", "Task 5"]
+    assert [t.title for t in repo.iter_created(newest_first=True, limit=2)] == ["Task 9", "Task 8"]
+    repo.close()
+
+
+def test_ulid_identifiers_sort_by_creation_time(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(identifiers, "_scheme", "ulid")
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    tasks = [
+        Task(title="t", owner="QA", priority="low", created_at=start + timedelta(milliseconds=i)) for i in range(50)
+    ]
+    ids = [task.identifier for task in tasks]
+    assert ids == sorted(ids) and len(set(ids)) == 50
+    assert identifiers.identifier_time(ids[7]) == start + timedelta(milliseconds=7)
+    assert identifiers.identifier_time("legacy-random-id") is None
+    with pytest.raises(ValueError):
+        identifiers.set_scheme("uuid")
+
+
+def test_sharded_repository_writes_one_shard(tmp_path: Path) -> None:
+    directory = tmp_path / "tasks"
+    repo = ShardedTaskRepository(directory, shards=4)
+    tasks = [Task(title=f"Task {i}", owner="QA", priority="high" if i % 2 else "low") for i in range(12)]
+    repo.save_many(reversed(tasks))
+    assert [t.title for t in repo.iter_tasks(priority="high", offset=1, limit=2)] == ["Task 3", "Task 5"]
+    assert [t.identifier for t in repo.get_many([tasks[2].identifier, tasks[0].identifier])] == [
+        tasks[2].identifier,
+        tasks[0].identifier,
+    ]
+
+    shard_files = sorted(directory.glob("shard-*.json"))
+    before = {path: path.read_bytes() for path in shard_files}
+    target = tasks[5]
+    target.title = "Edited"
+    repo.save(target)
+    changed = [path for path in shard_files if path.read_bytes() != before[path]]
+    assert changed == [directory / f"shard-{shard_index(target.identifier, 4):04d}.json"]
+    repo.close()
+
+    # The manifest's shard count wins over the requested one.
+    reopened = ShardedTaskRepository(directory, shards=8)
+    assert reopened.shard_count == 4
+    assert reopened.get(target.identifier).title == "Edited"
+    assert reopened.count() == 12
+    reopened.close()
+
+
+def test_reshard_command_redistributes_tasks(tmp_path: Path) -> None:
+    source = tmp_path / "archon-data.json"
+    FileTaskRepository(source).replace_all([Task(title=f"Task {i}", owner="QA", priority="low") for i in range(20)])
+    target = tmp_path / "sharded"
+
+    runner = CliRunner()
+    env = {"ARCHON_DB_PATH": str(source)}
+    result = runner.invoke(main, ["reshard", "--shards", "3", "--target", str(target)], env=env)
+    assert result.exit_code == 0, result.output
+    result = runner.invoke(main, ["reshard", "--shards", "5"], env={"ARCHON_DB_PATH": str(target)})
+    assert result.exit_code == 0, result.output
+
+    config = AppConfig(environment="test", database_path=target, token_ttl=60)
+    repo = create_repository(config)
+    assert isinstance(repo, ShardedTaskRepository) and repo.shard_count == 5
+    assert sorted(t.title for t in repo.list()) == sorted(f"Task {i}" for i in range(20))
+    repo.close()
+    assert not list(tmp_path.glob(".sharded.*"))
+
+
+def test_columnar_repository_filters_and_counts(tmp_path: Path) -> None:
+    backing = FileTaskRepository(tmp_path / "tasks.json")
+    repo = ColumnarTaskRepository(backing)
+    tasks = [
+        Task(title=f"Task {i}", owner="alice" if i % 3 else "bob", priority=("low", "medium", "high")[i % 3])
+        for i in range(30)
+    ]
+    repo.save_many(reversed(tasks))
+    service = TaskService(repo, TokenManager(ttl_seconds=60, secret=b"secret"))
+    service.complete_many([t.identifier for t in tasks[:10]])
+
+    assert repo.count_matching(owner="alice", priority="high", completed=False) == 7
+    assert repo.count_matching(owner="nobody") == 0
+    page = list(repo.iter_tasks(owner="bob", completed=False, limit=2))
+    assert [t.title for t in page] == ["Task 12", "Task 15"]
+    assert repo.get(tasks[0].identifier).completion_token
+    repo.delete_many([t.identifier for t in tasks[::2]])
+    assert repo.count() == 15
+    moved = repo.get(tasks[1].identifier)
+    moved.owner = "carol"
+    repo.save(moved)
+    assert [t.title for t in repo.iter_tasks(owner="carol")] == ["Task 1"]
+    assert repo.count_matching(owner="alice") == 9
+
+    # Writes are persisted to the backing store.
+    assert sorted(t.identifier for t in FileTaskRepository(tmp_path / "tasks.json").list()) == sorted(
+        t.identifier for t in repo.list()
+    )
+
+
+def test_columnar_repository_refreshes_after_conflict(tmp_path: Path) -> None:
+    repo = ColumnarTaskRepository(FileTaskRepository(tmp_path / "tasks.json"))
+    task = repo.save(Task(title="Shared", owner="QA", priority="low"))
+    other = FileTaskRepository(tmp_path / "tasks.json")
+    edited = other.get(task.identifier)
+    edited.title = "Changed elsewhere"
+    other.save(edited)
+
+    with pytest.raises(VersionConflictError):
+        repo.save(task)
+    assert repo.get(task.identifier).title == "Changed elsewhere"
+
+
+def test_archive_moves_old_completed_tasks(tmp_path: Path) -> None:
+    now = datetime.now(timezone.utc)
+    old = [
+        Task(
+            title=f"Old {i}",
+            owner="QA",
+            priority="low",
+            completed_at=now - timedelta(days=40 + i % 40),
+            completion_token=f"t{i}",
+        )
+        for i in range(1200)
+    ]
+    recent = Task(title="Recent", owner="QA", priority="low", completed_at=now, completion_token="r")
+    open_task = Task(title="Open", owner="QA", priority="high")
+    repo = ArchiveTaskRepository(FileTaskRepository(tmp_path / "tasks.json"), TaskArchive(tmp_path / "archive"))
+    repo.save_many([*old, recent, open_task])
+
+    assert repo.archive_completed(now - timedelta(days=30)) == 1200
+    assert sorted(t.title for t in repo.list()) == ["Open", "Recent"]
+    segments = repo.archive.segments()
+    assert sum(index["count"] for index in segments) == 1200
+    assert any(len(index["blocks"]) > 1 for index in segments)
+
+    archived = repo.get(old[700].identifier)
+    assert (archived.title, archived.completion_token) == ("Old 700", "t700")
+    assert [t.title for t in repo.get_many([open_task.identifier, old[3].identifier])] == ["Open", "Old 3"]
+    with pytest.raises(KeyError):
+        repo.get("missing")
+    # The reopened archive reads the same immutable segments.
+    assert TaskArchive(tmp_path / "archive").get(old[0].identifier).title == "Old 0"
+
+
+def test_archive_deletes_hide_archived_tasks_until_archived_again(tmp_path: Path) -> None:
+    completed_at = datetime.now(timezone.utc) - timedelta(days=60)
+    tasks = [Task(title=f"Old {i}", owner="QA", priority="low", completed_at=completed_at) for i in range(3)]
+    repo = ArchiveTaskRepository(FileTaskRepository(tmp_path / "tasks.json"), TaskArchive(tmp_path / "archive"))
+    repo.save_many(tasks)
+    repo.archive_completed(datetime.now(timezone.utc))
+
+    # Ids outside every segment's identifier range are not tombstoned.
+    hot = repo.save(Task(identifier="~hot", title="Hot", owner="QA", priority="low"))
+    repo.delete_many([tasks[0].identifier, "~missing", hot.identifier])
+    repo.delete_many(["~missing", hot.identifier])
+    assert len(list((tmp_path / "archive").glob("*.del.json"))) == 1
+    repo.delete(tasks[1].identifier)
+    for task in tasks[:2]:
+        with pytest.raises(KeyError):
+            repo.get(task.identifier)
+    assert [t.title for t in TaskArchive(tmp_path / "archive").iter_tasks()] == ["Old 2"]
+
+    revived = Task(identifier=tasks[0].identifier, title="Revived", owner="QA", priority="low", completed_at=completed_at)
+    repo.save(revived)
+    repo.archive_completed(datetime.now(timezone.utc))
+    assert repo.get(tasks[0].identifier).title == "Revived"
+
+
+def test_purge_and_replace_clear_the_archive(tmp_path: Path) -> None:
+    completed_at = datetime.now(timezone.utc) - timedelta(days=60)
+    repo = ArchiveTaskRepository(FileTaskRepository(tmp_path / "tasks.json"), TaskArchive(tmp_path / "archive"))
+    service = TaskService(repo, TokenManager(ttl_seconds=60, secret=b"secret"))
+    old = repo.save(Task(title="Old", owner="QA", priority="low", completed_at=completed_at))
+    repo.archive_completed(datetime.now(timezone.utc))
+    repo.save(Task(title="Hot", owner="QA", priority="low"))
+
+    assert service.purge_tasks() == 2
+    with pytest.raises(KeyError):
+        repo.get(old.identifier)
+    assert list(TaskArchive(tmp_path / "archive").iter_tasks()) == []
+
+    again = repo.save(Task(title="Again", owner="QA", priority="low", completed_at=completed_at))
+    repo.archive_completed(datetime.now(timezone.utc))
+    assert repo.get(again.identifier).title == "Again"
+    repo.replace_all([Task(title="Fresh", owner="QA", priority="low")])
+    with pytest.raises(KeyError):
+        repo.get(again.identifier)
+
+
+def test_change_feed_sequences_mutations(tmp_path: Path) -> None:
+    feed = ChangeFeed(tmp_path / "changes.jsonl")
+    repo = ChangeTrackingRepository(FileTaskRepository(tmp_path / "tasks.json"), feed)
+    tasks = repo.save_many([Task(title=f"Task {i}", owner="QA", priority="low") for i in range(3000)])
+    tasks[0].title = "Edited"
+    repo.save(tasks[0])
+    repo.delete(tasks[1].identifier)
+
+    assert feed.last_seq() == 3002
+    tail = list(feed.read(since=3000))
+    assert [(c.seq, c.op, c.identifier) for c in tail] == [
+        (3001, "upsert", tasks[0].identifier),
+        (3002, "delete", tasks[1].identifier),
+    ]
+    assert [c.seq for c in feed.read(since=1499, limit=2)] == [1500, 1501]
+
+    delta = collapse(feed.read(since=2999), 2999)
+    assert set(delta.tasks) == {tasks[2999].identifier, tasks[0].identifier}
+    assert delta.tasks[tasks[0].identifier].title == "Edited"
+    assert delta.deleted == {tasks[1].identifier}
+    assert delta.last_seq == 3002
+
+    # A torn trailing record is ignored by readers and dropped by the next writer.
+    with feed.path.open("ab") as fh:
+        fh.write(b'{"seq":3003,"op":"del')
+    assert ChangeFeed(feed.path).last_seq() == 3002
+    repo.delete(tasks[2].identifier)
+    assert [c.seq for c in ChangeFeed(feed.path).read(since=3002)] == [3003]
+
+
+def test_search_index_ranks_filters_and_persists_incrementally(tmp_path: Path) -> None:
+    index = SearchIndex(tmp_path / "tasks.search")
+    repo = SearchIndexingRepository(FileTaskRepository(tmp_path / "tasks.json"), index)
+    tasks = repo.save_many(
+        [
+            Task(title="Fix login bug", owner="alice", priority="high", description="Users cannot log in"),
+            Task(title="Write docs", owner="bob", priority="low", description="Explain the login flow"),
+            Task(title="Refactor billing", owner="alice", priority="medium", description="bug in invoices"),
+        ]
+    )
+    total, hits = index.search("login")
+    assert total == 2
+    assert hits[0][0] == tasks[0].identifier  # title matches rank above description matches
+    assert index.search("login", owner="bob")[1][0][0] == tasks[1].identifier
+    assert index.search("bug", priority="high")[0] == 1
+    assert index.search("log", prefix=True)[0] == 2
+    assert index.search("login bug")[0] == 1
+    assert index.search("login", offset=1, limit=1)[1][0][0] == tasks[1].identifier
+
+    tasks[1].title = "Write billing docs"
+    repo.save(tasks[1])
+    repo.delete(tasks[0].identifier)
+    # Another process sees the delta without rebuilding.
+    reopened = SearchIndex(tmp_path / "tasks.search")
+    assert [identifier for identifier, _ in reopened.search("login")[1]] == [tasks[1].identifier]
+    billing = {identifier for identifier, _ in reopened.search("billing")[1]}
+    assert billing == {tasks[1].identifier, tasks[2].identifier}
+    assert (tmp_path / "tasks.search" / "delta.jsonl").stat().st_size > 0
+
+    reopened.rebuild(repo.list())
+    assert (tmp_path / "tasks.search" / "delta.jsonl").stat().st_size == 0
+    assert index.search("billing")[0] == 2
+
+
+def test_aggregates_follow_updates_and_deletes(tmp_path: Path) -> None:
+    store = AggregateStore(tmp_path / "tasks.aggregates.json")
+    repo = AggregatingRepository(FileTaskRepository(tmp_path / "tasks.json"), store)
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    tasks = repo.save_many(
+        Task(title=f"Task {i}", owner="alice" if i < 8 else "bob", priority="high", created_at=created)
+        for i in range(10)
+    )
+    for minutes, task in enumerate(tasks[:5], start=1):
+        task.completed_at = created + timedelta(minutes=minutes)
+        repo.save(task)
+    repo.delete(tasks[9].identifier)
+
+    groups = dict(AggregateStore(tmp_path / "tasks.aggregates.json").load().summarize(["owner"]))
+    assert (groups[("alice",)].open, groups[("alice",)].completed) == (3, 5)
+    assert (groups[("bob",)].open, groups[("bob",)].completed) == (1, 0)
+    latency = groups[("alice",)].latency
+    assert latency.mean == 180.0
+    assert abs(latency.quantile(0.5) - 180) / 180 < 0.01
+    assert abs(latency.quantile(1.0) - 300) / 300 < 0.01
+    assert store.load().to_dict() == TaskAggregates.from_tasks(repo.list()).to_dict()
+
+
+@pytest.mark.parametrize("filename", ["tasks.json", "tasks.jsonl", "tasks.db", "sharded"])
+def test_snapshots_restore_full_and_incremental_states(tmp_path: Path, filename: str) -> None:
+    config = AppConfig(
+        environment="test",
+        database_path=tmp_path / filename,
+        token_ttl=60,
+        database_backend="sharded" if filename == "sharded" else "auto",
+        search={"enabled": True, "path": tmp_path / "search"},
+        aggregates={"enabled": True, "path": tmp_path / "aggregates.json"},
+        changes={"enabled": True, "path": tmp_path / "changes.jsonl"},
+    )
+    snapshots = SnapshotStore(config, tmp_path / "snapshots")
+    repo = create_repository(config)
+    first, second, third = repo.save_many(Task(title=f"Task {i}", owner="QA", priority="low") for i in range(3))
+    full = snapshots.create("full")
+
+    first.title = "Renamed"
+    repo.save(first)
+    repo.delete(second.identifier)
+    repo.save(Task(title="Added", owner="Ops", priority="high"))
+    incremental = snapshots.create("nightly", incremental=True)
+    assert (incremental["base"], incremental["changed"], incremental["deleted"]) == ("full", 2, 1)
+    repo.replace_all([])
+    repo.close()
+
+    assert [m["name"] for m in snapshots.list()] == ["full", "nightly"]
+    assert snapshots.restore("full") == 3
+    reopened = create_repository(config)
+    assert sorted(t.title for t in reopened.list()) == ["Task 0", "Task 1", "Task 2"]
+    reopened.close()
+
+    assert snapshots.restore("nightly") == 3
+    reopened = create_repository(config)
+    assert sorted(t.title for t in reopened.list()) == ["Added", "Renamed", "Task 2"]
+    reopened.close()
+    assert SearchIndex(tmp_path / "search").search("renamed")[1][0][0] == first.identifier
+    assert AggregateStore(tmp_path / "aggregates.json").load().summarize([])[0][1].open == 3
+    assert full["kind"] == "full" and full["seq"] == 3
+
+
+@pytest.mark.parametrize("filename", ["tasks.json", "tasks.jsonl", "tasks.db", "sharded"])
+def test_replace_batches_is_all_or_nothing(tmp_path: Path, filename: str) -> None:
+    config = AppConfig(
+        environment="test",
+        database_path=tmp_path / filename,
+        token_ttl=60,
+        database_backend="sharded" if filename == "sharded" else "auto",
+        database_columnar=True,
+        search={"enabled": True, "path": tmp_path / "search"},
+        aggregates={"enabled": True, "path": tmp_path / "aggregates.json"},
+        changes={"enabled": True, "path": tmp_path / "changes.jsonl"},
+    )
+    repo = create_repository(config)
+    existing = repo.save(Task(title="Existing", owner="QA", priority="low"))
+    imported = [Task(title=f"Imported {i}", owner="Ops", priority="high") for i in range(5)]
+
+    def failing():
+        yield imported[:3]
+        raise ValueError("Record 4: title must not be empty")
+
+    with pytest.raises(ValueError, match="Record 4"):
+        repo.replace_batches(failing())
+    assert [t.identifier for t in repo.list()] == [existing.identifier]
+    assert not [path for path in tmp_path.rglob("*") if ".replace" in path.name]
+
+    assert repo.replace_batches(iter([imported[:3], imported[2:]])) == 6
+    assert sorted(t.title for t in repo.list()) == [f"Imported {i}" for i in range(5)]
+    assert repo.count_matching(owner="QA") == 0
+    repo.close()
+
+    reopened = create_repository(config)
+    assert reopened.count() == 5
+    assert SearchIndex(tmp_path / "search").search("imported")[0] == 5
+    assert AggregateStore(tmp_path / "aggregates.json").load().summarize([])[0][1].open == 5
+    changes = list(ChangeFeed(tmp_path / "changes.jsonl").read())
+    assert [c.op for c in changes[-6:]] == ["reset", *["upsert"] * 5]
+    reopened.close()
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+import http.client
+import json
+from pathlib import Path
+from typing import Any, Tuple
+
+from archon_app.data.repository import FileTaskRepository
+from archon_app.security.auth import TokenManager
+from archon_app.server import TaskServer
+from archon_app.services.async_service import AsyncTaskService
+from archon_app.services.task_service import TaskService
+
+
+def _request(port: int, method: str, path: str, body: Any = None) -> Tuple[int, Any]:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    payload = json.dumps(body) if body is not None else None
+    conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    data = json.loads(response.read())
+    conn.close()
+    return response.status, data
+
+
+def _run_with_server(tmp_path: Path, scenario) -> None:
+    service = TaskService(FileTaskRepository(tmp_path / "tasks.json"), TokenManager(ttl_seconds=60, secret=b"secret"))
+
+    async def _main() -> None:
+        async_service = AsyncTaskService(service)
+        server = TaskServer(async_service, port=0)
+        await server.start()
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, scenario, server.port)
+        finally:
+            await server.close()
+            await async_service.close()
+
+    asyncio.run(_main())
+
+
+def test_server_task_lifecycle(tmp_path: Path) -> None:
+    def scenario(port: int) -> None:
+        status, created = _request(port, "POST", "/tasks", {"title": "Serve", "owner": "QA", "priority": "high"})
+        assert status == 201
+        identifier = created["identifier"]
+
+        status, fetched = _request(port, "GET", f"/tasks/{identifier}")
+        assert status == 200 and fetched["title"] == "Serve"
+
+        status, completed = _request(port, "POST", f"/tasks/{identifier}/complete")
+        assert status == 200 and completed["completion_token"]
+
+        status, listed = _request(port, "GET", "/tasks?completed=true&priority=high")
+        assert [task["identifier"] for task in listed["tasks"]] == [identifier]
+
+        assert _request(port, "POST", "/purge")[0] == 400
+        assert _request(port, "POST", "/purge", {"force": True}) == (200, {"purged": 1})
+
+    _run_with_server(tmp_path, scenario)
+
+
+def test_server_reports_errors(tmp_path: Path) -> None:
+    def scenario(port: int) -> None:
+        assert _request(port, "GET", "/tasks/missing")[0] == 404
+        assert _request(port, "POST", "/tasks", {"title": "", "owner": "QA"})[0] == 400
+        assert _request(port, "POST", "/tasks", [{"title": "A", "owner": "QA"}, "x"])[0] == 400
+        assert _request(port, "POST", "/import", [{"title": "A"}, "x"])[0] == 400
+        assert _request(port, "DELETE", "/tasks")[0] == 405
+        assert _request(port, "GET", "/nowhere")[0] == 404
+
+    _run_with_server(tmp_path, scenario)
+
+
+def test_server_keeps_connections_alive(tmp_path: Path) -> None:
+    def scenario(port: int) -> None:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        for _ in range(3):
+            conn.request("GET", "/health")
+            response = conn.getresponse()
+            assert json.loads(response.read()) == {"status": "ok"}
+        conn.close()
+
+    _run_with_server(tmp_path, scenario)
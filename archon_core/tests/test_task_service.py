@@ -1,10 +1,11 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 import pytest
 
+from archon_app.data.archive import ArchiveTaskRepository, TaskArchive
 from archon_app.data.models import Task
 from archon_app.data.repository import FileTaskRepository
 from archon_app.security.auth import TokenManager
@@ -48,3 +49,63 @@ def test_complete_task_is_idempotent(tmp_path: Path) -> None:
     token1 = service.complete_task(task.identifier)
     token2 = service.complete_task(task.identifier)
     assert token1 == token2
+
+
+def test_create_many_validates_before_writing(tmp_path: Path) -> None:
+    repo = FileTaskRepository(tmp_path / "tasks.json")
+    service = TaskService(repo, TokenManager(ttl_seconds=60, secret=b"secret"))
+    with pytest.raises(ValueError, match="Task #2"):
+        service.create_many([{"title": "One", "owner": "QA"}, {"title": " ", "owner": "QA"}])
+    assert service.list_tasks() == []
+
+    created = service.create_many([{"title": "One", "owner": "QA"}, {"title": "Two", "owner": "QA", "priority": "high"}])
+    assert [t.title for t in service.list_tasks()] == ["One", "Two"]
+    assert created[1].priority == "high"
+
+
+def test_complete_and_delete_many(tmp_path: Path) -> None:
+    repo = FileTaskRepository(tmp_path / "tasks.json")
+    service = TaskService(repo, TokenManager(ttl_seconds=60, secret=b"secret"))
+    tasks = service.create_many([{"title": f"Task {i}", "owner": "QA"} for i in range(3)])
+    ids = [t.identifier for t in tasks]
+
+    tokens = service.complete_many(ids[:2])
+    assert set(tokens) == set(ids[:2])
+    assert service.complete_many(ids[:1]) == {ids[0]: tokens[ids[0]]}
+    assert service._token_manager.validate_token(tokens[ids[1]])["task_id"] == ids[1]
+
+    with pytest.raises(KeyError):
+        service.delete_many([ids[0], "missing"])
+    assert len(service.list_tasks()) == 3
+    assert service.delete_many(ids[:2]) == 2
+    assert [t.identifier for t in service.list_tasks()] == [ids[2]]
+
+
+def test_failed_replace_import_keeps_existing_tasks(tmp_path: Path) -> None:
+    service = TaskService(FileTaskRepository(tmp_path / "tasks.json"), TokenManager(ttl_seconds=60, secret=b"secret"))
+    existing = service.create_task(title="Existing", owner="QA", priority="low")
+
+    def batches():
+        yield [Task(title="Imported", owner="QA", priority="low")]
+        raise ValueError("Record 2: title must not be empty")
+
+    with pytest.raises(ValueError, match="Record 2"):
+        service.import_batches(batches(), replace=True)
+    assert [t.identifier for t in service.list_tasks()] == [existing.identifier]
+
+    assert service.import_batches(iter([[Task(title="Imported", owner="QA", priority="low")]]), replace=True) == 1
+    assert [t.title for t in service.list_tasks()] == ["Imported"]
+
+
+def test_archive_completed_needs_an_archiving_repository(tmp_path: Path) -> None:
+    plain = TaskService(FileTaskRepository(tmp_path / "plain.json"), TokenManager(ttl_seconds=60, secret=b"secret"))
+    with pytest.raises(ValueError, match="Archiving is disabled"):
+        plain.archive_completed(timedelta(0))
+
+    repo = ArchiveTaskRepository(FileTaskRepository(tmp_path / "tasks.json"), TaskArchive(tmp_path / "archive"))
+    service = TaskService(repo, TokenManager(ttl_seconds=60, secret=b"secret"))
+    task = service.create_task(title="Done", owner="QA", priority="low")
+    service.complete_task(task.identifier)
+    assert service.archive_completed(timedelta(0)) == 1
+    assert service.list_tasks() == []
+    assert service.get_task(task.identifier).title == "Done"
@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import io
+import json
 from pathlib import Path
 
+import pytest
+
 from archon_app.data.models import Task
-from archon_app.utils.exporter import export_tasks_to_yaml
-from archon_app.utils.formatting import format_task_table
+from archon_app.utils import importer
+from archon_app.utils.exporter import export_tasks, export_tasks_to_yaml
+from archon_app.utils.formatting import format_task_table, iter_task_table
 from archon_app.utils.validation import ensure_non_empty
 from archon_app.utils.yaml_support import safe_load
 
@@ -17,10 +22,28 @@ def test_export_tasks_to_yaml(tmp_path: Path) -> None:
     assert data[0]["title"] == "Export"
 
 
+def test_export_tasks_to_yaml_streams_many_records(tmp_path: Path) -> None:
+    tasks = [Task(title=f"Export {i}", owner="QA", priority="low") for i in range(3)]
+    output = tmp_path / "tasks.yml"
+    export_tasks_to_yaml(iter(tasks), output)
+    data = safe_load(output.read_text(encoding="utf-8"))
+    assert [record["title"] for record in data] == ["Export 0", "Export 1", "Export 2"]
+
+    export_tasks_to_yaml([], output)
+    assert safe_load(output.read_text(encoding="utf-8")) == []
+
+
 def test_format_task_table_contains_headers() -> None:
     table = format_task_table([Task(title="A", owner="B", priority="low")])
     assert "Title" in table
     assert "Owner" in table
+    assert "Priority" in format_task_table([])
+
+
+def test_iter_task_table_yields_lines_lazily() -> None:
+    lines = iter_task_table(Task(title=f"T{i}", owner="B", priority="low") for i in range(2))
+    assert next(lines).startswith("ID")
+    assert len(list(lines)) == 3
 
 
 def test_ensure_non_empty_rejects_blank_values() -> None:
@@ -30,3 +53,30 @@ def test_ensure_non_empty_rejects_blank_values() -> None:
         assert "name" in str(exc)
     else:  # pragma: no cover - defensive guard
         raise AssertionError("Expected ValueError")
+
+
+@pytest.mark.parametrize("fmt", ["yaml", "jsonl", "json"])
+def test_import_streams_exported_tasks_in_batches(tmp_path: Path, fmt: str) -> None:
+    tasks = [Task(title=f"Backup {i}", owner="QA", priority="high", description="a: b\n- c") for i in range(7)]
+    output = tmp_path / f"backup.{fmt}"
+    if fmt == "json":
+        output.write_text(json.dumps([task.to_dict() for task in tasks]), encoding="utf-8")
+    else:
+        export_tasks(tasks, output, fmt)
+
+    with output.open(encoding="utf-8") as fh:
+        batches = list(importer.iter_task_batches(fh, importer.detect_format(output), batch_size=3, chunk_size=2))
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert [task for batch in batches for task in batch] == tasks
+
+
+def test_import_decodes_on_a_process_pool_and_reports_bad_records() -> None:
+    lines = [json.dumps({"title": f"Task {i}", "owner": "QA"}) for i in range(5)]
+    batches = importer.iter_task_batches(io.StringIO("\n".join(lines)), "jsonl", chunk_size=2, workers=2)
+    assert sum(len(batch) for batch in batches) == 5
+
+    lines[3] = json.dumps({"title": "Task 3", "owner": " "})
+    with pytest.raises(ValueError, match="Record #4: owner must not be empty"):
+        list(importer.iter_task_batches(io.StringIO("\n".join(lines)), "jsonl", chunk_size=2, workers=2))
+    with pytest.raises(ValueError, match="Record #2"):
+        list(importer.iter_task_batches(io.StringIO('[{"title": "a", "owner": "b"}, {"title": "x"'), "json"))